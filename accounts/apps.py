@@ -5,5 +5,9 @@ class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
 
-def ready(self):
-        import accounts.signals
\ No newline at end of file
+    def ready(self):
+        # Entrega de notificaciones y versiones de recursos (ETag). accounts.signals
+        # (perfil automático al crear un User) sigue sin conectarse, como hasta ahora:
+        # los perfiles los crean las vistas y un usuario sin perfil se trata como dueño.
+        import accounts.notifications  # noqa: F401
+        import accounts.versions  # noqa: F401
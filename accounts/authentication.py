@@ -0,0 +1,122 @@
+# accounts/authentication.py
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework import permissions
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .tokens import TENANT_CLAIMS, StreamTicket, get_token_version
+
+
+def token_revoked():
+    return AuthenticationFailed(_("Token has been revoked."), code="token_revoked")
+
+
+class TenantJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication que carga al usuario junto con su perfil y su jefe en una
+    sola query (SELECT ... JOIN), para que resolver el taller de la request no
+    dispare más lecturas. Rechaza los tokens emitidos con otra token_version.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        try:
+            user = self.user_model.objects.select_related('profile__employer').get(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        # Tokens antiguos (sin 'ver') siguen valiendo hasta que expiren
+        if 'ver' in validated_token:
+            profile = getattr(user, 'profile', None)
+            if validated_token['ver'] != (profile.token_version if profile else 0):
+                raise token_revoked()
+
+        return user
+
+
+class StatelessTenantJWTAuthentication(TenantJWTAuthentication):
+    """
+    En lecturas (GET/HEAD/OPTIONS) con un token que trae los claims del taller,
+    arma el usuario desde el token sin leer la tabla de usuarios: sólo se compara
+    `ver` con la versión cacheada. Escrituras y tokens antiguos pasan por la carga
+    completa de TenantJWTAuthentication.
+
+    El usuario resultante es una instancia de User con pk y username (sirve para
+    filtrar por FK), pero sin el resto de columnas ni perfil: las vistas que
+    necesitan esos datos (ej. MeView) deben usar TenantJWTAuthentication.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if request.method in permissions.SAFE_METHODS and all(claim in validated_token for claim in TENANT_CLAIMS):
+            return self.get_stateless_user(validated_token), validated_token
+        return self.get_user(validated_token), validated_token
+
+    def get_stateless_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        if validated_token['ver'] != get_token_version(user_id):
+            raise token_revoked()
+
+        user = self.user_model(
+            **{api_settings.USER_ID_FIELD: user_id},
+            username=validated_token.get('username', ''),
+            is_active=True,
+        )
+        # Se comporta como una fila ya guardada (para usarla en filtros y comparaciones)
+        user._state.adding = False
+        user._state.db = DEFAULT_DB_ALIAS
+        user.token_claims = {
+            'role': validated_token['role'],
+            'data_owner_id': validated_token['data_owner_id'],
+        }
+        return user
+
+
+class EventStreamJWTAuthentication(StatelessTenantJWTAuthentication):
+    """
+    Para los endpoints SSE: EventSource no puede mandar el header Authorization,
+    así que además se acepta en ?token= un StreamTicket (POST /api/auth/stream-ticket/).
+    En la URL no se aceptan access tokens: quedan en logs y duran mucho más.
+    """
+
+    def authenticate(self, request):
+        if self.get_header(request) is not None:
+            return super().authenticate(request)
+        raw_token = request.query_params.get('token')
+        if not raw_token:
+            return None
+        try:
+            ticket = StreamTicket(raw_token)
+        except TokenError as e:
+            raise InvalidToken(e.args[0]) from e
+        if ticket.get('scope') != 'stream':
+            raise InvalidToken(_("Token is not a stream ticket"))
+        return self.get_stateless_user(ticket), ticket
@@ -0,0 +1,24 @@
+# accounts/management/commands/response_cache_stats.py
+from django.core.management.base import BaseCommand
+
+from backend.conditional import STATS_KEYS, response_cache, response_cache_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Muestra los aciertos y fallos de la caché de respuestas (backend/conditional.py). "
+        "Con la caché en memoria (sin CACHE_URL) cada proceso cuenta por separado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Pone los contadores en cero después de mostrarlos.")
+
+    def handle(self, *args, **options):
+        stats = response_cache_stats()
+        total = stats['hits'] + stats['misses']
+        ratio = f"{stats['hits'] / total:.1%}" if total else "-"
+        self.stdout.write(f"Aciertos: {stats['hits']}  Fallos: {stats['misses']}  Tasa de acierto: {ratio}")
+
+        if options["reset"]:
+            response_cache().delete_many(STATS_KEYS.values())
+            self.stdout.write(self.style.SUCCESS("Contadores reiniciados."))
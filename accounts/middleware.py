@@ -0,0 +1,22 @@
+# accounts/middleware.py
+from django.utils.functional import SimpleLazyObject
+
+from .utils import TenantContext
+
+
+class TenantMiddleware:
+    """
+    Deja `request.tenant` (TenantContext) en cada request.
+
+    Es perezoso: se resuelve la primera vez que alguien lo lee, que en las vistas
+    DRF es después de autenticar con JWT (DRF copia el usuario autenticado a la
+    request de Django). Con TenantJWTAuthentication el usuario ya viene con perfil
+    y jefe en el mismo JOIN, así que armar el contexto no cuesta queries.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.tenant = SimpleLazyObject(lambda: TenantContext(getattr(request, 'user', None)))
+        return self.get_response(request)
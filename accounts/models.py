@@ -1,5 +1,8 @@
 # accounts/models.py
-from django.db import models
+import uuid
+
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth.models import User
 
 class UserProfile(models.Model):
@@ -17,6 +20,27 @@ class UserProfile(models.Model):
     
     employer = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='employees')
 
+    # Sube cada vez que cambia el rol o el jefe: los JWT con otra versión dejan de valer
+    token_version = models.PositiveIntegerField(default=0, editable=False)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_claims = (instance.__dict__.get('role'), instance.__dict__.get('employer_id'))
+        return instance
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_loaded_claims', None)
+        claims_changed = loaded is not None and loaded != (self.role, self.employer_id)
+        if claims_changed:
+            self.token_version = F('token_version') + 1
+        super().save(*args, **kwargs)
+        if claims_changed:
+            self.refresh_from_db(fields=['token_version'])
+            self._loaded_claims = (self.role, self.employer_id)
+            from .tokens import forget_token_version
+            transaction.on_commit(lambda: forget_token_version(self.user_id))
+
     def __str__(self):
         return f"{self.user.username} - {self.role}"
     
@@ -31,6 +55,37 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Bandeja: WHERE recipient = ? ORDER BY is_read, created_at DESC
+            models.Index(fields=['recipient', 'is_read', '-created_at'], name='notification_inbox_idx'),
+            # Conteo de no leídas (parcial: sólo filas con is_read = false)
+            models.Index(fields=['recipient'], condition=models.Q(is_read=False), name='notification_unread_idx'),
+            # Polling incremental: WHERE recipient = ? AND id > ? ORDER BY id
+            models.Index(fields=['recipient', 'id'], name='notification_recipient_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"Notif para {self.recipient}: {self.message}"
+
+class ResourceVersion(models.Model):
+    """
+    Versión de un recurso ('clients', 'products', ...) de un taller: cambia con cada
+    escritura (ver accounts/versions.py) y con ella se arman los ETag de los listados,
+    así un GET condicional se contesta sin correr la query del listado.
+    Sin owner es un recurso compartido por todos los talleres (ej. 'catalog').
+    """
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name="resource_versions")
+    resource = models.CharField(max_length=30)
+    version = models.UUIDField(default=uuid.uuid4)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'resource'], name='resource_version_owner_resource_uniq'),
+            # En el UNIQUE de arriba los NULL no chocan entre sí: una sola fila global por recurso
+            models.UniqueConstraint(
+                fields=['resource'], condition=models.Q(owner__isnull=True), name='resource_version_global_uniq',
+            ),
+        ]
 
     def __str__(self):
-        return f"Notif para {self.recipient}: {self.message}"
\ No newline at end of file
+        return f"{self.resource} de {self.owner_id or 'todos'}: {self.version}"
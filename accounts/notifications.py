@@ -0,0 +1,91 @@
+# accounts/notifications.py
+"""
+Entrega de notificaciones en vivo y conteo de no leídas.
+
+- Cada Notification creada (venga de generate_order o de donde sea) se publica,
+  al confirmar la transacción, en el canal `notifications:<destinatario>` de
+  backend.pubsub; el endpoint SSE de NotificationStreamView la reenvía.
+- El conteo de no leídas se guarda en la caché (UNREAD_CACHE_SECONDS) y se
+  recalcula con el índice parcial notification_unread_idx sólo cuando cambia.
+  La clave lleva una versión por destinatario que también vive en la caché y se
+  renueva al confirmar cada cambio (nueva notificación, marcar como leídas,
+  borrar), así el polling no lee la base. Sólo si la versión falta en la caché
+  se toma la 'notifications' de accounts.versions, que se renueva en la misma
+  transacción. Con varios workers la caché tiene que ser compartida (CACHE_URL).
+"""
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from backend.pubsub import get_broker
+from .models import Notification
+from .serializers import NotificationSerializer
+from .versions import get_versions, touch
+
+
+def notification_channel(user_id):
+    return f"notifications:{user_id}"
+
+
+def _version_key(user_id):
+    return f"accounts:notifications_version:{user_id}"
+
+
+def _unread_key(user_id):
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        version = get_versions(user_id, ['notifications'])['notifications']
+        cache.set(_version_key(user_id), version, getattr(settings, 'NOTIFICATION_UNREAD_CACHE_SECONDS', 300))
+    return f"accounts:notifications_unread:{user_id}:{version}"
+
+
+def unread_count(user_id):
+    key = _unread_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+        cache.set(key, count, getattr(settings, 'NOTIFICATION_UNREAD_CACHE_SECONDS', 300))
+    return count
+
+
+def forget_unread_count(user_id):
+    """Versión nueva para el conteo del usuario, en la base ahora y en la caché al confirmar."""
+    touch(user_id, 'notifications')
+    transaction.on_commit(lambda: cache.set(
+        _version_key(user_id), uuid.uuid4(), getattr(settings, 'NOTIFICATION_UNREAD_CACHE_SECONDS', 300),
+    ))
+
+
+def publish(user_id, event, data):
+    get_broker().publish(notification_channel(user_id), {'event': event, 'data': data})
+
+
+def notifications_read(user_id):
+    """Llamar después de marcar notificaciones como leídas con un UPDATE (que no dispara señales)."""
+    forget_unread_count(user_id)
+    transaction.on_commit(lambda: publish(user_id, 'unread', {'unread': unread_count(user_id)}))
+
+
+def notification_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    user_id = instance.recipient_id
+    data = NotificationSerializer(instance).data if created else None
+
+    forget_unread_count(user_id)
+    if data is not None:
+        transaction.on_commit(lambda: publish(user_id, 'notification', data))
+
+
+def notification_deleted(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, User):  # se está borrando la cuenta: su versión se borra con ella
+        return
+    forget_unread_count(instance.recipient_id)
+
+
+post_save.connect(notification_saved, sender=Notification, dispatch_uid="notification_publish")
+post_delete.connect(notification_deleted, sender=Notification, dispatch_uid="notification_unread_delete")
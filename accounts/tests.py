@@ -1,3 +1,221 @@
-from django.test import TestCase
+import asyncio
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.db import connection
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from clients.models import Client
+from backend.pubsub import get_broker
+from .models import Notification, UserProfile
+from .notifications import _version_key, notification_channel
+from .tokens import StreamTicket, TenantRefreshToken
+
+
+class TenantResolutionTests(TestCase):
+    """El usuario, su perfil y su jefe se resuelven en una sola query por request."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('dueno')
+        UserProfile.objects.create(user=self.owner, role='owner')
+        self.mechanic = User.objects.create_user('mecanico')
+        UserProfile.objects.create(user=self.mechanic, role='mechanic', employer=self.owner)
+        Client.objects.create(owner=self.owner, first_name='Ana', last_name='Test')
+
+        self.api = APIClient()
+        token = RefreshToken.for_user(self.mechanic).access_token
+        self.api.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_mechanic_sees_employer_data_with_one_auth_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.api.get('/api/clients/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c['first_name'] for c in response.json()['results']], ['Ana'])
+        # auth (usuario + perfil + jefe en un JOIN) + versión para el ETag + página de clientes + vehículos
+        self.assertEqual(len(ctx), 4)
+
+    def test_role_checks_read_the_tenant_context(self):
+        response = self.api.post('/api/external/', {'name': 'Grúa'}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+        response = self.api.get('/api/auth/me/')
+        self.assertEqual(response.json()['role'], 'mechanic')
+
+
+class StatelessTokenTests(TestCase):
+    """Las lecturas con un token con claims del taller no cargan al usuario desde la base."""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('dueno', password='clave-segura-1')
+        UserProfile.objects.create(user=self.owner, role='owner')
+        self.mechanic = User.objects.create_user('mecanico')
+        self.profile = UserProfile.objects.create(user=self.mechanic, role='mechanic', employer=self.owner)
+        Client.objects.create(owner=self.owner, first_name='Ana', last_name='Test')
+
+        self.refresh = TenantRefreshToken.for_user(User.objects.get(pk=self.mechanic.pk))
+        self.api = APIClient()
+        self.api.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh.access_token}')
+
+    def test_tokens_carry_tenant_claims(self):
+        access = self.refresh.access_token
+        self.assertEqual(access['role'], 'mechanic')
+        self.assertEqual(access['data_owner_id'], self.owner.pk)
+        self.assertEqual(access['ver'], 0)
+
+    def test_reads_skip_the_user_query(self):
+        # Llena la caché de token_version (con otro listado: el de clientes quedaría en la caché de respuestas)
+        self.api.get('/api/vehicles/')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.api.get('/api/clients/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c['first_name'] for c in response.json()['results']], ['Ana'])
+        # sólo versión para el ETag + página de clientes + vehículos
+        self.assertEqual(len(ctx), 3)
+
+    def test_role_change_revokes_outstanding_tokens(self):
+        self.assertEqual(self.api.get('/api/clients/').status_code, 200)
+
+        owner_api = APIClient()
+        owner_api.credentials(HTTP_AUTHORIZATION=f'Bearer {TenantRefreshToken.for_user(self.owner).access_token}')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = owner_api.put(f'/api/mechanics/{self.mechanic.pk}/', {'role': 'assistant'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.api.get('/api/clients/').status_code, 401)
+        self.assertEqual(self.api.post('/api/clients/', {'first_name': 'X', 'last_name': 'Y'}).status_code, 401)
+        refresh = APIClient().post('/api/auth/token/refresh/', {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(refresh.status_code, 401)
+
+    def test_refresh_issues_current_claims(self):
+        # Token antiguo sin claims: el refresh agrega los vigentes
+        legacy = RefreshToken.for_user(self.mechanic)
+        response = APIClient().post('/api/auth/token/refresh/', {'refresh': str(legacy)}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        access = TenantRefreshToken.access_token_class(response.json()['access'])
+        self.assertEqual(access['role'], 'mechanic')
+        self.assertEqual(access['data_owner_id'], self.owner.pk)
+
+
+class NotificationPushTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('dueno')
+        UserProfile.objects.create(user=self.user, role='owner')
+        self.token = TenantRefreshToken.for_user(User.objects.get(pk=self.user.pk)).access_token
+        self.api = APIClient()
+        self.api.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.ticket = self.api.post('/api/auth/stream-ticket/').json()['ticket']
+
+    def notify(self, message):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notification.objects.create(recipient=self.user, message=message)
+
+    def unread(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.api.get('/api/notifications/unread-count/')
+        return response.json()['unread'], len(ctx)
+
+    def test_unread_count_is_cached_until_it_changes(self):
+        self.notify('Uno')
+        self.get_token_version_cached()
+        # versión del conteo (de la base, no estaba en caché) + conteo; después nada
+        self.assertEqual(self.unread(), (1, 2))
+        self.assertEqual(self.unread(), (1, 0))
+
+        # El cambio renueva la versión en la caché: sólo se vuelve a contar
+        self.notify('Dos')
+        self.assertEqual(self.unread(), (2, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.api.put('/api/notifications/')
+        self.assertEqual(self.unread()[0], 0)
+
+    def test_unread_version_falls_back_to_the_database(self):
+        self.assertEqual(self.unread()[0], 0)
+        # Sin on_commit la caché no se entera; si su versión falta, se usa la de la base
+        Notification.objects.create(recipient=self.user, message='Sin confirmar')
+        self.assertEqual(self.unread()[0], 0)
+        cache.delete(_version_key(self.user.pk))
+        self.assertEqual(self.unread()[0], 1)
+
+    def test_deleting_the_account_deletes_its_notifications(self):
+        self.notify('Uno')
+        self.user.delete()
+        connection.check_constraints()
+        self.assertFalse(Notification.objects.exists())
+
+    def get_token_version_cached(self):
+        # La primera request también lee token_version; la dejamos en caché y olvidamos la del conteo
+        self.api.get('/api/notifications/unread-count/')
+        cache.delete(_version_key(self.user.pk))
+
+    def test_since_id_returns_only_newer_notifications(self):
+        first = self.notify('Uno')
+        response = self.api.get('/api/notifications/', {'since_id': first.pk})
+        self.assertEqual((response.status_code, response.content), (204, b''))
+
+        second, third = self.notify('Dos'), self.notify('Tres')
+        Notification.objects.create(recipient=User.objects.create_user('otro'), message='Ajena')
+        response = self.api.get('/api/notifications/', {'since_id': first.pk})
+        self.assertEqual([n['id'] for n in response.json()], [second.pk, third.pk])
+
+    def test_new_notifications_are_published_after_commit(self):
+        with mock.patch('accounts.notifications.publish') as publish:
+            notification = self.notify('Nueva solicitud')
+        publish.assert_called_once()
+        user_id, event, data = publish.call_args.args
+        self.assertEqual((user_id, event), (self.user.pk, 'notification'))
+        self.assertEqual((data['id'], data['message']), (notification.pk, 'Nueva solicitud'))
+
+    async def test_stream_pushes_published_events(self):
+        client = AsyncClient()
+        response = await client.get('/api/notifications/stream/', {'token': self.ticket})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        events = response.streaming_content
+        self.assertTrue((await anext(events)).startswith(b'retry:'))
+        self.assertEqual(await anext(events), b'event: unread\ndata: {"unread": 0}\n\n')
+
+        # Se publica desde otro hilo, como lo haría una vista síncrona
+        await sync_to_async(get_broker().publish, thread_sensitive=False)(
+            notification_channel(self.user.pk), {'event': 'notification', 'data': {'message': 'Hola'}},
+        )
+        chunk = await asyncio.wait_for(anext(events), timeout=5)
+        self.assertEqual(chunk, b'event: notification\ndata: {"message": "Hola"}\n\n')
+        await events.aclose()
+
+    def test_stream_requires_a_token(self):
+        self.assertEqual(APIClient().get('/api/notifications/stream/').status_code, 401)
+
+    def test_stream_only_takes_short_lived_tickets_in_the_url(self):
+        ticket = StreamTicket(self.ticket)
+        self.assertEqual((ticket['scope'], ticket['data_owner_id']), ('stream', self.user.pk))
+        self.assertEqual(ticket['exp'] - ticket['iat'], 60)
+
+        # El access token no va en la URL, y el ticket no sirve como access token
+        self.assertEqual(APIClient().get('/api/notifications/stream/', {'token': str(self.token)}).status_code, 401)
+        api = APIClient()
+        api.credentials(HTTP_AUTHORIZATION=f'Bearer {self.ticket}')
+        self.assertEqual(api.get('/api/notifications/unread-count/').status_code, 401)
+
+        expired = StreamTicket.for_user(User.objects.get(pk=self.user.pk))
+        expired.set_exp(lifetime=-StreamTicket.lifetime)
+        self.assertEqual(APIClient().get('/api/notifications/stream/', {'token': str(expired)}).status_code, 401)
+
+    def test_wsgi_falls_back_to_a_single_snapshot(self):
+        self.notify('Uno')
+        response = APIClient().get('/api/notifications/stream/', {'token': self.ticket})
+        body = b''.join(response.streaming_content).decode()
+        self.assertTrue(body.startswith('retry: 15000'))
+        self.assertIn('event: unread\ndata: {"unread": 1}', body)
@@ -0,0 +1,88 @@
+# accounts/tokens.py
+"""
+JWT con los datos del taller dentro del token.
+
+Además de user_id, los tokens que entrega LoginView (y los access que salen del
+refresh) llevan:
+- role:          rol del usuario (None si no tiene perfil)
+- data_owner_id: dueño de los datos (su jefe si es empleado, él mismo si es dueño)
+- username
+- ver:           UserProfile.token_version al momento de emitirlo
+
+Con eso StatelessTenantJWTAuthentication atiende las lecturas sin ir a la base.
+Cuando cambia el rol o el jefe sube token_version y los tokens viejos se rechazan.
+La versión vigente se lee de la caché (TOKEN_VERSION_CACHE_SECONDS) para no
+consultarla en cada request.
+
+StreamTicket es un token aparte para los streams SSE, que lo reciben en la URL:
+dura STREAM_TICKET_SECONDS y sólo sirve para abrir esas conexiones.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework_simplejwt.tokens import RefreshToken, Token
+
+from .utils import TenantContext
+
+TENANT_CLAIMS = ('role', 'data_owner_id', 'ver')
+
+# Versión para usuarios borrados o inactivos: nunca coincide con la de un token
+REVOKED = -1
+
+
+def _cache_key(user_id):
+    return f"accounts:token_version:{user_id}"
+
+
+def get_token_version(user_id):
+    """Versión vigente de los tokens del usuario (0 si no tiene perfil, REVOKED si ya no puede entrar)."""
+    key = _cache_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        row = (
+            get_user_model().objects.filter(pk=user_id, is_active=True)
+            .values_list('pk', 'profile__token_version')
+            .first()
+        )
+        version = REVOKED if row is None else (row[1] or 0)
+        cache.set(key, version, getattr(settings, 'TOKEN_VERSION_CACHE_SECONDS', 60))
+    return version
+
+
+def forget_token_version(user_id):
+    """Borra la versión cacheada: la próxima request la vuelve a leer de la base."""
+    cache.delete(_cache_key(user_id))
+
+
+def add_tenant_claims(token, user):
+    tenant = TenantContext(user)
+    token['username'] = user.get_username()
+    token['role'] = tenant.role
+    token['data_owner_id'] = tenant.data_owner.pk
+    token['ver'] = tenant.profile.token_version if tenant.profile else 0
+    return token
+
+
+class TenantRefreshToken(RefreshToken):
+    """RefreshToken con los claims del taller; su access_token los hereda."""
+
+    @classmethod
+    def for_user(cls, user):
+        return add_tenant_claims(super().for_user(user), user)
+
+
+class StreamTicket(Token):
+    """
+    Ticket corto para ?token= de los endpoints SSE (EventSource no manda headers).
+    Tiene su propio token_type: no sirve como access token ni al revés.
+    """
+    token_type = 'stream'
+    lifetime = timedelta(seconds=getattr(settings, 'STREAM_TICKET_SECONDS', 60))
+
+    @classmethod
+    def for_user(cls, user):
+        ticket = add_tenant_claims(super().for_user(user), user)
+        ticket['scope'] = 'stream'
+        return ticket
@@ -1,9 +1,40 @@
 # accounts/utils.py
-def get_data_owner(user):
+class TenantContext:
     """
-    Si el usuario es mecánico, retorna a su jefe (employer).
-    Si el usuario es dueño, retorna al mismo usuario.
+    Usuario, perfil, rol y dueño de los datos (el "taller") de una request.
+    Se arma una sola vez por request (ver TenantMiddleware) y las vistas, permisos
+    y serializers lo leen desde `request.tenant` en vez de recorrer user.profile.employer.
     """
-    if hasattr(user, 'profile') and user.profile.employer:
-        return user.profile.employer
-    return user
\ No newline at end of file
+
+    def __init__(self, user):
+        self.user = user
+        claims = getattr(user, 'token_claims', None)
+        if claims is not None:
+            self._from_claims(user, claims)
+            return
+
+        authenticated = user is not None and user.is_authenticated
+        # RelatedObjectDoesNotExist hereda de AttributeError: sin perfil queda en None
+        self.profile = getattr(user, 'profile', None) if authenticated else None
+        self.role = self.profile.role if self.profile else None
+        if not authenticated:
+            self.data_owner = None
+        elif self.profile and self.profile.employer_id:
+            self.data_owner = self.profile.employer
+        else:
+            self.data_owner = user
+
+    def _from_claims(self, user, claims):
+        # Usuario armado desde el JWT (StatelessTenantJWTAuthentication): sin perfil cargado
+        self.profile = None
+        self.role = claims['role']
+        if claims['data_owner_id'] == user.pk:
+            self.data_owner = user
+        else:
+            self.data_owner = type(user)(pk=claims['data_owner_id'])
+            self.data_owner._state.adding = False
+            self.data_owner._state.db = user._state.db
+
+    @property
+    def is_owner(self):
+        return self.role == 'owner'
@@ -0,0 +1,125 @@
+# accounts/versions.py
+"""
+Versiones por taller y recurso ('clients', 'products', 'evaluations', 'orders')
+para los ETag de backend/conditional.py, más las globales (owner NULL) de lo que
+comparten todos los talleres: 'catalog', el marketplace de servicios externos.
+
+Cada escritura de un modelo seguido le da una versión nueva a su recurso
+dentro de la misma transacción, así que si la versión no cambió el listado
+muestra exactamente lo mismo. Lo que no pasa por save()/delete() (bulk_create,
+bulk_update, update()) no dispara señales: las importaciones y
+inventory.services.consume_stock llaman a touch() o mandan su propia señal.
+Los nombres de usuario que muestran algunos listados (mecánico, creador) no se
+siguen: cambian muy rara vez y se refrescan con la próxima escritura del recurso.
+"""
+import uuid
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+
+from clients.models import Client, Vehicle
+from evaluations.models import Evaluation, EvaluationItem
+from external.models import ExternalService
+from inventory.models import InventoryBatch, Product
+from inventory.signals import batches_consumed
+from orders.models import WorkOrder
+from .models import ResourceVersion
+
+# modelo -> (recurso, relación hacia el modelo que tiene owner o None si lo tiene él mismo)
+TRACKED = {
+    Client: ('clients', None),
+    Vehicle: ('clients', None),
+    Evaluation: ('evaluations', None),
+    EvaluationItem: ('evaluations', 'evaluation'),
+    WorkOrder: ('orders', None),
+    Product: ('products', None),
+    InventoryBatch: ('products', 'product'),
+}
+
+
+def touch(owner_id, *resources):
+    """Versión nueva para `resources` del taller (un solo upsert)."""
+    if owner_id is None or not resources:
+        return
+    ResourceVersion.objects.bulk_create(
+        [ResourceVersion(owner_id=owner_id, resource=resource, version=uuid.uuid4()) for resource in sorted(set(resources))],
+        update_conflicts=True,
+        unique_fields=['owner', 'resource'],
+        update_fields=['version'],
+    )
+
+
+def touch_global(resource):
+    """Versión nueva para un recurso global (un UPDATE; la primera vez crea la fila)."""
+    rows = ResourceVersion.objects.filter(owner=None, resource=resource)
+    if not rows.update(version=uuid.uuid4()):
+        # No hay upsert contra el UNIQUE parcial: se crea (o la creó otro recién) y se actualiza
+        ResourceVersion.objects.bulk_create([ResourceVersion(resource=resource)], ignore_conflicts=True)
+        rows.update(version=uuid.uuid4())
+
+
+def get_versions(owner_id, resources):
+    """
+    {recurso: versión} en una query (dos más la primera vez que se pide un recurso del taller).
+    Con owner_id None, las versiones globales.
+    """
+    versions = ResourceVersion.objects.filter(owner_id=owner_id, resource__in=resources)
+    found = dict(versions.values_list('resource', 'version'))
+    missing = [resource for resource in resources if resource not in found]
+    if missing:
+        # Recurso nunca escrito: se le crea una versión. Si una escritura la creó en
+        # paralelo gana la de la escritura (ignore_conflicts) y se vuelve a leer.
+        ResourceVersion.objects.bulk_create(
+            [ResourceVersion(owner_id=owner_id, resource=resource) for resource in missing],
+            ignore_conflicts=True,
+        )
+        found = dict(versions.values_list('resource', 'version'))
+    return found
+
+
+def _owner_id(instance, relation):
+    if relation is None:
+        return instance.owner_id
+    # Con la relación ya cargada no hace falta leer nada
+    parent = instance._state.fields_cache.get(relation)
+    if parent is not None:
+        return parent.owner_id
+    parent_model = instance._meta.get_field(relation).related_model
+    return parent_model.objects.filter(pk=getattr(instance, f'{relation}_id')).values_list('owner_id', flat=True).first()
+
+
+def version_on_save(sender, instance, raw=False, **kwargs):
+    if raw:  # loaddata
+        return
+    resource, relation = TRACKED[sender]
+    touch(_owner_id(instance, relation), resource)
+
+
+def version_on_delete(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, User):  # se está borrando la cuenta: sus versiones se borran con ella
+        return
+    resource, relation = TRACKED[sender]
+    # Lotes e ítems: sólo el borrado de uno en uno. En cascada ya cambia la versión el
+    # producto / evaluación borrado, y los DELETE en bloque llaman a touch() (sync_items)
+    if relation is not None and origin is not instance:
+        return
+    touch(_owner_id(instance, relation), resource)
+
+
+def catalog_version_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    touch_global('catalog')
+
+
+def version_on_consumption(sender, changes, **kwargs):
+    for owner_id in {owner_id for owner_id, _, _ in changes}:
+        touch(owner_id, 'products')
+
+
+for model in TRACKED:
+    post_save.connect(version_on_save, sender=model, dispatch_uid=f"resource_version_save_{model.__name__}")
+    post_delete.connect(version_on_delete, sender=model, dispatch_uid=f"resource_version_delete_{model.__name__}")
+batches_consumed.connect(version_on_consumption, dispatch_uid="resource_version_consumption")
+post_save.connect(catalog_version_changed, sender=ExternalService, dispatch_uid="resource_version_catalog_save")
+post_delete.connect(catalog_version_changed, sender=ExternalService, dispatch_uid="resource_version_catalog_delete")
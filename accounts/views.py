@@ -4,11 +4,11 @@ from django.db.models import Q
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from rest_framework_simplejwt.tokens import RefreshToken
+from .authentication import TenantJWTAuthentication
+from .tokens import StreamTicket, TenantRefreshToken, forget_token_version
 from .serializers import RegisterSerializer
 from .models import UserProfile
 from django.shortcuts import get_object_or_404
-from .utils import get_data_owner  # 👈 IMPORTANTE: Importar la utilidad corregida
 from django.db import IntegrityError
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
@@ -51,7 +51,7 @@ class LoginView(APIView):
         if not user_auth:
             return Response({"detail": "Credenciales inválidas."}, status=status.HTTP_401_UNAUTHORIZED)
 
-        refresh = RefreshToken.for_user(user_auth)
+        refresh = TenantRefreshToken.for_user(user_auth)
         
         role = 'owner'
         if hasattr(user_auth, 'profile'):
@@ -66,21 +66,21 @@ class LoginView(APIView):
         }, status=status.HTTP_200_OK)
 
 class MeView(APIView):
+    # Siempre contra la base: devuelve datos del usuario que no van en el token
+    authentication_classes = [TenantJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
         u = request.user
-        role = 'owner'
-        if hasattr(u, 'profile'):
-            role = u.profile.role
+        tenant = request.tenant
             
         return Response({
             "id": u.id,
             "username": u.username,
             "email": u.email,
-            "role": role,
+            "role": tenant.role or 'owner',
             # Agregamos phone si existe en el perfil
-            "phone": u.profile.phone if hasattr(u, 'profile') else "" 
+            "phone": tenant.profile.phone if tenant.profile else "" 
         })
 
     # 👇 AGREGAR ESTE MÉTODO PUT 👇
@@ -126,10 +126,10 @@ class CreateMechanicView(APIView):
 
     def get(self, request):
         # --- CORRECCIÓN IMPLEMENTADA AQUÍ ---
-        # Usamos get_data_owner para obtener al "jefe" real.
+        # Usamos el dueño de los datos (request.tenant) para obtener al "jefe" real.
         # Si el usuario es mecánico, target_user será su jefe.
         # Si el usuario es dueño, target_user será él mismo.
-        target_user = get_data_owner(request.user)
+        target_user = request.tenant.data_owner
         
         # Filtramos los perfiles que trabajan para ese jefe
         profiles = UserProfile.objects.filter(employer=target_user).select_related('user')
@@ -149,7 +149,7 @@ class CreateMechanicView(APIView):
 
     def post(self, request):
         # Para CREAR (POST), mantenemos la restricción estricta: SOLO DUEÑOS
-        if not hasattr(request.user, 'profile') or request.user.profile.role != 'owner':
+        if not request.tenant.is_owner:
              return Response({"error": "Solo los dueños pueden registrar personal."}, status=403)
 
         data = request.data
@@ -191,7 +191,7 @@ class MechanicDetailView(APIView):
 
     def get_employee(self, request, pk):
         # Solo el dueño puede editar/borrar a sus empleados
-        if not hasattr(request.user, 'profile') or request.user.profile.role != 'owner': return None
+        if not request.tenant.is_owner: return None
         employee = get_object_or_404(User, pk=pk)
         if not hasattr(employee, 'profile') or employee.profile.employer != request.user: return None
         return employee
@@ -230,7 +230,9 @@ class MechanicDetailView(APIView):
     def delete(self, request, pk):
         employee = self.get_employee(request, pk)
         if not employee: return Response({"error": "Error."}, status=403)
+        employee_id = employee.pk
         employee.delete()
+        forget_token_version(employee_id)
         return Response({"message": "Eliminado."}, status=200)
     
 class RequestPasswordResetView(APIView):
@@ -307,11 +309,24 @@ class ResetPasswordConfirmView(APIView):
     
 from .models import Notification
 from .serializers import NotificationSerializer
+from .authentication import EventStreamJWTAuthentication
+from .notifications import notification_channel, notifications_read, unread_count
+from backend.sse import EventStreamRenderer, event_stream
+from backend.pagination import rows_since, since_id
+from rest_framework.renderers import JSONRenderer
 
 class NotificationListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
+        # ?since_id=<último id recibido>: sólo las nuevas, en orden de id; 204 si no hay
+        last_id = since_id(request.query_params)
+        if last_id is not None:
+            notifs = rows_since(Notification.objects.filter(recipient=request.user), last_id)
+            if not notifs:
+                return Response(status=status.HTTP_204_NO_CONTENT)
+            return Response(NotificationSerializer(notifs, many=True).data)
+
         # Obtener notificaciones del usuario actual (no leídas primero)
         notifs = Notification.objects.filter(recipient=request.user).order_by('is_read', '-created_at')[:20]
         serializer = NotificationSerializer(notifs, many=True)
@@ -320,4 +335,47 @@ class NotificationListView(APIView):
     def put(self, request):
         # Marcar todas como leídas
         Notification.objects.filter(recipient=request.user, is_read=False).update(is_read=True)
-        return Response({"status": "marked as read"})
\ No newline at end of file
+        notifications_read(request.user.pk)
+        return Response({"status": "marked as read"})
+
+
+class NotificationUnreadCountView(APIView):
+    """Contador del ícono de campana: sale de la caché, sin tocar la base mientras no cambie."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({"unread": unread_count(request.user.pk)})
+
+
+class StreamTicketView(APIView):
+    """
+    POST /api/auth/stream-ticket/ -> {"ticket", "expires_in"}
+    Ticket corto para abrir los streams SSE con ?token=. Al reconectar después de
+    que venza, el cliente pide uno nuevo.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        ticket = StreamTicket.for_user(request.user)
+        return Response({"ticket": str(ticket), "expires_in": int(StreamTicket.lifetime.total_seconds())})
+
+
+class NotificationStreamView(APIView):
+    """
+    GET /api/notifications/stream/?token=<ticket>  (text/event-stream)
+
+    Al conectar envía `unread` con el conteo actual; después, un evento
+    `notification` por cada notificación nueva y `unread` cuando se marcan como
+    leídas. Reemplaza el polling a NotificationListView (ver backend/sse.py).
+    """
+    authentication_classes = [EventStreamJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [EventStreamRenderer, JSONRenderer]
+
+    def get(self, request):
+        user_id = request.user.pk
+        return event_stream(
+            request,
+            notification_channel(user_id),
+            initial=lambda: [('unread', {'unread': unread_count(user_id)})],
+        )
@@ -0,0 +1,123 @@
+# backend/conditional.py
+"""
+GET condicionales (ETag / If-None-Match) y caché de respuestas para los
+listados y detalles del taller.
+
+El ETag no sale del cuerpo de la respuesta (eso obligaría a armarla igual): se
+calcula antes de correr la vista, con las versiones de accounts.versions de los
+recursos que muestra la vista más el taller, el rol, el formato y la URL
+completa (filtros, cursor, ?fields=).
+
+- Si el If-None-Match del cliente coincide se contesta 304 sin correr la query
+  del listado ni los serializers.
+- Si no, se busca la respuesta ya serializada en la caché 'responses' con el
+  mismo ETag como clave. Una escritura cambia la versión (señales post_save /
+  post_delete) y con eso la clave: no hay que borrar nada a mano, lo viejo vence
+  solo con RESPONSE_CACHE_SECONDS.
+
+Las respuestas llevan X-Cache: HIT|MISS; los totales se ven con
+`python manage.py response_cache_stats`.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response, patch_cache_control
+from rest_framework.response import Response
+
+from accounts.versions import get_versions
+
+STATS_KEYS = {True: 'stats:hits', False: 'stats:misses'}
+
+
+def response_cache():
+    return caches['responses']
+
+
+def record_cache_result(hit):
+    key = STATS_KEYS[hit]
+    try:
+        response_cache().incr(key)
+    except ValueError:  # primera vez (o la caché se limpió)
+        if not response_cache().add(key, 1, timeout=None):
+            response_cache().incr(key)
+
+
+def response_cache_stats():
+    values = response_cache().get_many(STATS_KEYS.values())
+    return {'hits': values.get(STATS_KEYS[True], 0), 'misses': values.get(STATS_KEYS[False], 0)}
+
+
+class _EarlyResponse(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    Para los viewsets (y APIView) del taller. `etag_resources` son los recursos de
+    los que depende lo que muestra la vista (ej. las órdenes incluyen datos de la
+    evaluación y del cliente). En un viewset sólo aplica a `etag_actions`.
+    """
+    etag_resources = ()
+    etag_actions = ('list', 'retrieve')
+    cache_responses = True
+
+    def get_etag_extra(self, request):
+        """Algo más de lo que dependa la respuesta (ej. la fecha de hoy)."""
+        return ''
+
+    def get_resource_versions(self, request):
+        """Versiones de lo que muestra la vista; por defecto, las de `etag_resources` del taller."""
+        versions = get_versions(request.tenant.data_owner.pk, self.etag_resources)
+        return [f'{resource}={versions[resource]}' for resource in self.etag_resources]
+
+    def get_etag(self, request):
+        key = '|'.join([
+            str(request.tenant.data_owner.pk),
+            str(request.tenant.role),
+            *self.get_resource_versions(request),
+            self.get_etag_extra(request),
+            request.accepted_media_type,
+            request.build_absolute_uri(),
+        ])
+        return f'W/"{hashlib.md5(key.encode()).hexdigest()}"'
+
+    def _cache_timeout(self):
+        return getattr(settings, 'RESPONSE_CACHE_SECONDS', 0) if self.cache_responses else 0
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = self.cache_key = None
+        action = getattr(self, 'action', None)
+        if request.method not in ('GET', 'HEAD') or (action is not None and action not in self.etag_actions):
+            return
+
+        self.etag = self.get_etag(request)
+        not_modified = get_conditional_response(request, etag=self.etag)
+        if not_modified is not None:
+            raise _EarlyResponse(not_modified)
+
+        if self._cache_timeout():
+            self.cache_key = f'response:{self.etag}'
+            data = response_cache().get(self.cache_key)
+            record_cache_result(data is not None)
+            if data is not None:
+                self.cache_key = None  # ya está guardada
+                raise _EarlyResponse(Response(data, headers={'X-Cache': 'HIT'}))
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _EarlyResponse):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'etag', None) and response.status_code in (200, 304):
+            response['ETag'] = self.etag
+            # El navegador puede guardarla, pero siempre revalida
+            patch_cache_control(response, private=True, no_cache=True)
+        if getattr(self, 'cache_key', None) and response.status_code == 200 and isinstance(response, Response):
+            response_cache().set(self.cache_key, response.data, self._cache_timeout())
+            response['X-Cache'] = 'MISS'
+        return response
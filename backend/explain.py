@@ -0,0 +1,65 @@
+# backend/explain.py
+"""
+Planes de ejecución (EXPLAIN) de las queries que corre un bloque de código.
+
+    with capture_selects() as queries:
+        api.get('/api/orders/')
+    for sql, params in queries:
+        sequential_scans(sql, params)  # -> ['orders_workorder', ...] si alguna tabla se lee completa
+
+En PostgreSQL se usa EXPLAIN (FORMAT JSON) con enable_seqscan = off: con pocas
+filas el planner prefiere un Seq Scan aunque exista el índice, así que lo
+desincentivamos y si igual aparece es porque no hay índice que sirva.
+En SQLite se usa EXPLAIN QUERY PLAN (un "SCAN tabla" sin "USING ... INDEX").
+"""
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+
+
+@contextmanager
+def capture_selects(using=connection):
+    """Junta (sql, params) de cada SELECT ejecutado dentro del bloque."""
+    queries = []
+
+    def wrapper(execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith('SELECT'):
+            queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with using.execute_wrapper(wrapper):
+        yield queries
+
+
+def explain(sql, params=None, using=connection):
+    """Plan de la query: lista de nodos (PostgreSQL) o de filas de EXPLAIN QUERY PLAN (SQLite)."""
+    if using.vendor == 'postgresql':
+        with transaction.atomic(using=using.alias), using.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+        return plan[0]['Plan'] if isinstance(plan, list) else plan
+    with using.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def _pg_nodes(node):
+    yield node
+    for child in node.get('Plans', ()):
+        yield from _pg_nodes(child)
+
+
+def sequential_scans(sql, params=None, using=connection):
+    """Tablas que la query recorre completas (vacío si todo va por índice)."""
+    plan = explain(sql, params, using)
+    if using.vendor == 'postgresql':
+        return [node.get('Relation Name') for node in _pg_nodes(plan) if node['Node Type'] == 'Seq Scan']
+    if using.vendor == 'sqlite':
+        # "SCAN tabla" sin índice; "SCAN CONSTANT ROW" y los subquery materializados no leen tablas
+        return [
+            detail.split()[1] for detail in plan
+            if detail.startswith('SCAN ') and 'USING' not in detail
+            and not detail.startswith(('SCAN CONSTANT ROW', 'SCAN (subquery'))
+        ]
+    return []
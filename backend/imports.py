@@ -0,0 +1,156 @@
+# backend/imports.py
+"""
+Lectura en streaming de planillas para las importaciones masivas (CSV, XLSX o JSON lines).
+
+read_rows() entrega una fila a la vez como (línea, {columna: texto}), sin cargar el
+archivo completo: el CSV y el JSON lines se leen línea a línea y el XLSX con
+openpyxl en modo read_only. Las columnas se normalizan a minúsculas y sin espacios en los bordes;
+las celdas vacías llegan como ''.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+# Filas por lote al validar/insertar
+IMPORT_CHUNK_SIZE = 1000
+
+# Errores que se devuelven en el reporte (el resto sólo se cuenta)
+MAX_REPORTED_ERRORS = 500
+
+
+class TooManyRows(ValueError):
+    """El archivo subido supera settings.IMPORT_MAX_UPLOAD_ROWS."""
+
+    def __init__(self, limit):
+        super().__init__(f"El archivo tiene más de {limit} filas.")
+        self.limit = limit
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # Excel guarda 2018 como 2018.0
+    return str(value).strip()
+
+
+def _header(values):
+    return [_cell(value).lower() for value in values]
+
+
+def _csv_rows(fileobj):
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    try:
+        sample = text.read(4096)
+        text.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(text, dialect)
+        header = _header(next(reader, []))
+        for values in reader:
+            if any(values):
+                yield reader.line_num, dict(zip(header, map(_cell, values)))
+    finally:
+        text.detach()  # no cerrar el archivo de quien nos llamó
+
+
+def _jsonl_rows(fileobj):
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig')
+    try:
+        for number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                values = json.loads(line)
+            except ValueError:
+                values = None
+            if not isinstance(values, dict):
+                raise ValueError(f"Línea {number}: se esperaba un objeto JSON.")
+            yield number, {str(key).strip().lower(): _cell(value) for key, value in values.items()}
+    finally:
+        text.detach()
+
+
+def _xlsx_rows(fileobj):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:  # pragma: no cover - openpyxl está en requirements.txt
+        raise ValueError("El servidor no tiene soporte para archivos XLSX; sube un CSV.")
+
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception:
+        raise ValueError("No se pudo leer el archivo XLSX.")
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = _header(next(rows, ()))
+        for number, values in enumerate(rows, start=2):
+            if any(value is not None for value in values):
+                yield number, dict(zip(header, map(_cell, values)))
+    finally:
+        workbook.close()
+
+
+def read_rows(fileobj, filename):
+    """Itera las filas de un CSV, XLSX o JSON lines (según la extensión de `filename`)."""
+    fileobj = getattr(fileobj, 'file', fileobj)  # UploadedFile de Django -> archivo real
+    if filename.lower().endswith('.xlsx'):
+        return _xlsx_rows(fileobj)
+    if filename.lower().endswith(('.jsonl', '.ndjson')):
+        return _jsonl_rows(fileobj)
+    if filename.lower().endswith(('.csv', '.txt')):
+        return _csv_rows(fileobj)
+    raise ValueError("Formato no soportado: sube un archivo .csv, .xlsx o .jsonl.")
+
+
+def chunked(rows, size=IMPORT_CHUNK_SIZE):
+    """Agrupa las filas (línea, fila) de read_rows en listas de `size`."""
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+class ImportReport:
+    """Resumen de una importación: contadores y errores por línea del archivo."""
+
+    def __init__(self):
+        self.rows = 0
+        self.counts = {}
+        self.errors = []
+        self.error_count = 0
+
+    def count(self, name, amount=1):
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    def add_error(self, line, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "errors": errors})
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            **self.counts,
+            "error_count": self.error_count,
+            "errors": sorted(self.errors, key=lambda error: error["line"]),
+        }
+
+
+def check_upload_rows(upload, limit):
+    """
+    Cuenta las filas de un archivo subido (hasta `limit` + 1, sin guardarlas) y lo
+    deja al inicio para leerlo de nuevo. Con más de `limit` lanza TooManyRows antes
+    de importar nada: la request no alcanzaría a terminar dentro del timeout del
+    servidor, y esas cargas van por el comando de importación.
+    """
+    rows = read_rows(upload, upload.name)
+    try:
+        count = sum(1 for _ in islice(rows, limit + 1))
+    finally:
+        rows.close()
+    upload.seek(0)
+    if count > limit:
+        raise TooManyRows(limit)
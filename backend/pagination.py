@@ -0,0 +1,125 @@
+# backend/pagination.py
+import json
+import operator
+from functools import reduce
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import CursorPagination
+
+
+class TenantCursorPagination(CursorPagination):
+    """
+    Paginación por cursor (keyset) para los listados del taller.
+
+    En vez de OFFSET usa WHERE <campo> < <último visto>, así la página 500 cuesta
+    lo mismo que la primera. El campo de orden sale del atributo `ordering` de
+    cada viewset (o del OrderingFilter si la vista lo usa) y cada uno tiene su
+    índice compuesto (dueño, campo) en el modelo.
+
+    ?page_size=N permite pedir páginas más chicas o más grandes, hasta max_page_size.
+    """
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-created_at'
+
+    def get_ordering(self, request, queryset, view):
+        uses_ordering_filter = any(
+            hasattr(backend, 'get_ordering') for backend in getattr(view, 'filter_backends', [])
+        )
+        view_ordering = getattr(view, 'ordering', None)
+        if view_ordering and not uses_ordering_filter:
+            return (view_ordering,) if isinstance(view_ordering, str) else tuple(view_ordering)
+        return super().get_ordering(request, queryset, view)
+
+
+class KeysetCursorPagination(TenantCursorPagination):
+    """
+    Cursor sobre todos los campos del orden, para listados que ordenan por campos
+    con valores repetidos (nombre, stock). DRF se posiciona sólo con el primero y
+    salta los empates con OFFSET; acá la posición es la tupla completa de la última
+    fila y el filtro es  (name > x) OR (name = x AND sku > y).
+
+    Al orden se le agrega al final `cursor_tiebreaker` de la vista (por defecto pk),
+    un campo único, para que cada fila tenga una posición distinta.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        tiebreaker = getattr(view, 'cursor_tiebreaker', 'pk')
+        if tiebreaker not in (field.lstrip('-') for field in ordering):
+            ordering += (('-' if ordering[-1].startswith('-') else '') + tiebreaker,)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        cursor = super().decode_cursor(request)
+        position = None
+        if cursor is not None and cursor.position is not None:
+            ordering = self.get_ordering(request, queryset, view)
+            position = self._decode_position(cursor.position, ordering)
+            queryset = queryset.filter(self._after(ordering, position, cursor.reverse))
+
+        page = super().paginate_queryset(queryset, request, view)
+
+        # DRF no vio la posición (ya se aplicó como filtro): hay páginas hacia atrás
+        if position is not None:
+            if cursor.reverse:
+                self.has_next, self.next_position = True, cursor.position
+            else:
+                self.has_previous, self.previous_position = True, cursor.position
+            self.display_page_controls = self.template is not None
+        return page
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        return cursor and cursor._replace(position=None)
+
+    def _decode_position(self, position, ordering):
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def _after(self, ordering, values, reverse):
+        """Filas que van después de `values` en `ordering` (antes, si reverse)."""
+        conditions, equal = [], Q()
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+            conditions.append(equal & Q(**{f'{name}__{lookup}': value}))
+            equal &= Q(**{name: value})
+        return reduce(operator.or_, conditions)
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            name = field.lstrip('-')
+            values.append(str(instance[name] if isinstance(instance, dict) else getattr(instance, name)))
+        return json.dumps(values)
+
+
+# Sincronización incremental (?since_id=): máximo de filas por respuesta
+SINCE_LIMIT = 100
+
+
+def since_id(params, param='since_id'):
+    """Último id que el cliente ya tiene (None si no vino el parámetro)."""
+    value = params.get(param)
+    if value in (None, ''):
+        return None
+    if not str(value).isdigit():
+        raise ValidationError({param: "Debe ser un id numérico."})
+    return int(value)
+
+
+def rows_since(queryset, last_id, limit=SINCE_LIMIT):
+    """
+    Filas con id > last_id en orden de id, hasta `limit` (si vienen `limit`
+    puede haber más: el cliente repite con el último id recibido).
+    Cada modelo tiene su índice (dueño, id) para que esto sea un range scan.
+    """
+    return list(queryset.filter(pk__gt=last_id).order_by('pk')[:limit])
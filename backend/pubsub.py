@@ -0,0 +1,92 @@
+# backend/pubsub.py
+"""
+Pub/sub para empujar eventos a las conexiones abiertas (Server-Sent Events).
+
+    get_broker().publish('notifications:7', {'event': 'notification', 'data': {...}})
+
+    with get_broker().subscribe('notifications:7') as subscription:   # dentro del event loop
+        message = await subscription.get(timeout=15)                  # None si no llegó nada
+
+El broker se elige con settings.PUBSUB_BROKER. InProcessBroker (por defecto)
+reparte en memoria: sólo llega a las conexiones abiertas en el mismo proceso,
+así que con varios workers hay que cambiarlo por uno respaldado en un servidor
+(ej. Redis pub/sub) que implemente publish() y subscribe() con la misma forma.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Mensajes sin leer por conexión; si un cliente lento se atrasa se descartan los más viejos
+SUBSCRIPTION_BUFFER = 100
+
+
+class Subscription:
+    """Cola de mensajes de un canal para una conexión; vive en el event loop que la creó."""
+
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIPTION_BUFFER)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def _put(self, message):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    def deliver(self, message):
+        # publish() puede correr en otro hilo (vistas síncronas): se encola desde el loop
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:  # loop cerrado: la conexión ya terminó
+            self.close()
+
+    async def get(self, timeout=None):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class InProcessBroker:
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.deliver(message)
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(getattr(settings, 'PUBSUB_BROKER', 'backend.pubsub.InProcessBroker'))()
@@ -0,0 +1,102 @@
+# backend/serializers.py
+"""
+Respuestas parciales para los serializers de la API: ?fields= y ?expand=.
+
+- ?fields=id,folio,status       sólo esos campos simples.
+- ?expand=evaluation_data       incluye un objeto anidado (con sus campos simples).
+- ?expand=evaluation_data.items se puede bajar de nivel con puntos.
+- ?fields=folio,evaluation_data.status  también sirve para elegir campos del anidado.
+
+Los campos anidados de cada serializer se declaran en Meta.expandable_fields.
+Si la request trae ?fields o ?expand, los anidados sólo salen cuando se piden, y
+el plan de carga (setup_eager_loading) tampoco los consulta. Sin parámetros la
+respuesta es la de siempre.
+"""
+from rest_framework import serializers
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def parse_field_tree(value):
+    """'a,b.c,b.d' -> {'a': {}, 'b': {'c': {}, 'd': {}}}"""
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for part in path.strip().split('.'):
+            if part:
+                node = node.setdefault(part, {})
+    return tree
+
+
+class FieldSelection:
+    """Campos pedidos en un nivel: `only` (None = todos los simples) y `expand` (anidados a incluir)."""
+
+    def __init__(self, only=None, expand=None):
+        self.only = only
+        self.expand = expand or {}
+
+    @classmethod
+    def from_request(cls, request):
+        # Sólo en lecturas: en un POST/PATCH no queremos descartar campos de entrada
+        if request is None or request.method not in READ_METHODS:
+            return None
+        params = request.query_params
+        if 'fields' not in params and 'expand' not in params:
+            return None
+        only = parse_field_tree(params['fields']) if params.get('fields') else None
+        return cls(only, parse_field_tree(params.get('expand', '')))
+
+    def includes(self, name, nested=False):
+        if nested:
+            return name in self.expand or (self.only is not None and name in self.only)
+        return self.only is None or name in self.only
+
+    def nested(self, name):
+        return FieldSelection((self.only or {}).get(name) or None, self.expand.get(name))
+
+
+def expands(selection, name):
+    """¿Va el anidado `name` en la respuesta? Sin selección (salida clásica) siempre."""
+    return selection is None or selection.includes(name, nested=True)
+
+
+def nested_selection(selection, name):
+    return None if selection is None else selection.nested(name)
+
+
+class DynamicFieldsMixin:
+    """
+    Aplica la FieldSelection de la request a los campos del serializer y de sus anidados.
+    También se puede fijar desde el código: Serializer(obj, selection=FieldSelection(...)).
+    """
+
+    def __init__(self, *args, selection=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if selection is not None:
+            self._field_selection = selection
+
+    @property
+    def field_selection(self):
+        if hasattr(self, '_field_selection'):
+            return self._field_selection
+        # Sólo el serializer raíz lee la request; los anidados reciben su parte desde el padre
+        parent = self.parent
+        if parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None):
+            return FieldSelection.from_request(self.context.get('request'))
+        return None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selection = self.field_selection
+        if selection is None:
+            return fields
+
+        expandable = getattr(self.Meta, 'expandable_fields', ())
+        for name in list(fields):
+            is_nested = name in expandable
+            if not selection.includes(name, nested=is_nested):
+                del fields[name]
+            elif is_nested:
+                child = getattr(fields[name], 'child', fields[name])
+                child._field_selection = selection.nested(name)
+        return fields
@@ -47,6 +47,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'clients',
     'evaluations',
     "rest_framework",
@@ -66,6 +67,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.TenantMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -97,7 +99,9 @@ DATABASES = {
     'default': dj_database_url.config(
         # Busca la variable DATABASE_URL, si no la encuentra, usa tu local
         default=f"postgres://{os.environ.get('DB_USER')}:{os.environ.get('DB_PASSWORD')}@{os.environ.get('DB_HOST')}:{os.environ.get('DB_PORT')}/{os.environ.get('DB_NAME')}",
-        conn_max_age=600
+        # Bajo ASGI cada request corre en un hilo distinto y las conexiones
+        # persistentes se acumulan sin cerrarse: 0 salvo que haya un pooler delante.
+        conn_max_age=int(os.environ.get('DB_CONN_MAX_AGE', '0'))
     )
 }
 
@@ -157,11 +161,18 @@ CSRF_TRUSTED_ORIGINS = [
 # --- DRF básico ---
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        # Si usas JWT más adelante, descomenta:
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # JWT de simplejwt: las lecturas se atienden con los claims del token (rol,
+        # dueño de los datos) sin leer la base; las escrituras cargan usuario + perfil
+        "accounts.authentication.StatelessTenantJWTAuthentication",
     ],
+    # Listados paginados por cursor; cada viewset define su `ordering`
+    "DEFAULT_PAGINATION_CLASS": "backend.pagination.TenantCursorPagination",
 }
 
+# Folios de evaluaciones: por defecto siempre crecen; con True se reutilizan los
+# folios de evaluaciones borradas (el menor disponible primero)
+EVALUATION_FOLIO_REUSE_GAPS = os.environ.get('EVALUATION_FOLIO_REUSE_GAPS', 'False') == 'True'
+
 # --- ⬇️ REEMPLAZA TU SECCIÓN DE PAYPAL POR ESTA ⬇️ ---
 
 # Ahora lee las claves de PayPal desde el .env
@@ -178,8 +189,56 @@ SIMPLE_JWT = {
     # Antes tenías minutes=15, cámbialo por días o semanas
     "ACCESS_TOKEN_LIFETIME": timedelta(days=365),  # 👈 Ahora la sesión dura 1 año
     "REFRESH_TOKEN_LIFETIME": timedelta(days=365), # 👈 El refresh también
+    # El refresh pone rol y dueño de los datos actualizados en el nuevo access token
+    "TOKEN_REFRESH_SERIALIZER": "accounts.serializers.TenantTokenRefreshSerializer",
 }
 
+# Cuánto se cachea la token_version de cada usuario (tope de demora para que un
+# cambio de rol/jefe invalide los tokens en otros procesos)
+TOKEN_VERSION_CACHE_SECONDS = 60
+
+# Vida de los tickets para abrir los streams SSE (?token=, ver accounts.tokens.StreamTicket)
+STREAM_TICKET_SECONDS = 60
+
+# Pub/sub de los endpoints SSE (backend/pubsub.py). El de memoria sólo reparte dentro
+# de un proceso: con varios workers ASGI hay que apuntar a un broker compartido.
+PUBSUB_BROKER = os.environ.get('PUBSUB_BROKER', 'backend.pubsub.InProcessBroker')
+
+# Cuánto vive en caché el conteo de notificaciones no leídas (se invalida al cambiar)
+NOTIFICATION_UNREAD_CACHE_SECONDS = 300
+
+# Caché. Por defecto en memoria de cada proceso; con varios workers tiene que ser
+# compartida para que las invalidaciones (ej. la versión del conteo de notificaciones
+# no leídas) y las respuestas cacheadas lleguen a todos:
+#   CACHE_URL=redis://host:6379/0   (necesita el paquete redis)
+#   CACHE_URL=file:///var/tmp/atgest-cache
+CACHE_URL = os.environ.get('CACHE_URL', '')
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_URL},
+        'responses': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_URL, 'KEY_PREFIX': 'responses'},
+    }
+elif CACHE_URL.startswith('file://'):
+    CACHE_DIR = CACHE_URL[len('file://'):]
+    CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': CACHE_DIR},
+        'responses': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': os.path.join(CACHE_DIR, 'responses')},
+    }
+else:
+    CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'atgest'},
+        # Respuestas de los listados (backend/conditional.py): más entradas que el default
+        'responses': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'atgest-responses', 'OPTIONS': {'MAX_ENTRIES': 5000}},
+    }
+
+# Cuánto vive una respuesta cacheada (0 la desactiva). La clave lleva las versiones de
+# accounts.versions, así que una escritura la deja obsoleta antes de que venza.
+RESPONSE_CACHE_SECONDS = 600
+
+# Filas máximas de una importación por la API (se procesa dentro de la request, ~0,4 ms
+# por fila). Archivos más grandes: `python manage.py import_clients` / `import_inventory`.
+IMPORT_MAX_UPLOAD_ROWS = int(os.environ.get('IMPORT_MAX_UPLOAD_ROWS', 20000))
+
 # --- Configuración de Email ---
 # (Usamos Gmail como ejemplo, puedes cambiar el HOST y PORT si usas otro)
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -0,0 +1,102 @@
+# backend/sse.py
+"""
+Respuestas Server-Sent Events alimentadas por backend.pubsub.
+
+event_stream() se suscribe a un canal y reenvía cada mensaje publicado como un
+evento SSE, con un comentario de keep-alive cada KEEPALIVE_SECONDS para que
+proxies y balanceadores no corten la conexión.
+
+La conexión larga necesita el servidor ASGI (backend/asgi.py; en producción
+start.sh levanta gunicorn con workers de uvicorn). Bajo WSGI cada conexión ocuparía un worker
+completo, así que ahí se envía sólo el estado inicial y se cierra: EventSource
+se reconecta solo pasados WSGI_RETRY_MS, y el endpoint queda como un polling.
+
+Si el estado inicial no cabe en una conexión (la vista retorna un PartialBacklog)
+se envía esa parte y se cierra con un retry corto: EventSource reconecta con el
+Last-Event-ID del último evento enviado y recibe lo que sigue.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+from .pubsub import get_broker
+
+KEEPALIVE_SECONDS = 15
+RETRY_MS = 3000
+WSGI_RETRY_MS = 15000
+RESUME_RETRY_MS = 100
+
+
+class PartialBacklog(list):
+    """Eventos iniciales incompletos: después de enviarlos se cierra el stream para que el cliente pida el resto."""
+
+
+def format_event(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, cls=DjangoJSONEncoder)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Deja pasar 'Accept: text/event-stream' (lo manda EventSource); los errores salen como JSON."""
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+
+def _is_asgi(request):
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+async def _live_events(channel, initial):
+    with get_broker().subscribe(channel) as subscription:
+        yield f'retry: {RETRY_MS}\n\n'
+        # Estado inicial después de suscribirse: lo que se publique mientras tanto no se pierde
+        # (y si llega por los dos lados, el id ya enviado no se repite)
+        last_id = None
+        events = await sync_to_async(initial)() if initial is not None else []
+        for event in events:
+            yield format_event(*event)
+            if len(event) > 2:
+                last_id = event[2]
+        if isinstance(events, PartialBacklog):
+            yield f'retry: {RESUME_RETRY_MS}\n\n'
+            return
+        while True:
+            message = await subscription.get(timeout=KEEPALIVE_SECONDS)
+            if message is None:
+                yield ': keep-alive\n\n'
+            elif last_id is None or message.get('id') is None or message['id'] > last_id:
+                yield format_event(message['event'], message['data'], message.get('id'))
+
+
+def _snapshot_events(initial):
+    yield f'retry: {WSGI_RETRY_MS}\n\n'
+    events = initial() if initial is not None else []
+    for event in events:
+        yield format_event(*event)
+    if isinstance(events, PartialBacklog):
+        yield f'retry: {RESUME_RETRY_MS}\n\n'
+
+
+def event_stream(request, channel, initial=None):
+    """
+    StreamingHttpResponse SSE del canal `channel`.
+    `initial` (opcional) es una función síncrona que retorna [(evento, datos[, id])] a enviar al conectar
+    (un PartialBacklog si quedan más por enviar).
+    """
+    content = _live_events(channel, initial) if _is_asgi(request) else _snapshot_events(initial)
+    response = StreamingHttpResponse(content, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: no acumular la respuesta
+    return response
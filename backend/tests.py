@@ -0,0 +1,207 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from accounts.models import Notification, ResourceVersion, UserProfile
+from clients.models import Client, Vehicle
+from evaluations.models import Evaluation, EvaluationItem
+from evaluations.services import sync_items
+from external.models import ExternalService, Message, ServiceRequest
+from inventory.models import InventoryBatch, Product
+from inventory.services import consume_stock
+from orders.models import WorkOrder
+
+from .conditional import response_cache, response_cache_stats
+from .explain import capture_selects, sequential_scans
+
+
+class ListQueryPlanTests(TestCase):
+    """
+    Ningún listado debe leer una tabla completa: cada query que corre un GET de
+    listado se pasa por EXPLAIN y se falla si el plan trae un scan secuencial.
+    """
+
+    LIST_URLS = [
+        '/api/clients/',
+        '/api/vehicles/',
+        '/api/products/',
+        '/api/batches/',
+        '/api/evaluations/',
+        '/api/orders/',
+        '/api/requests/',
+        '/api/messages/',
+        '/api/notifications/',
+        '/api/external/?exclude_self=true',
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        # Dos talleres con datos, para que el filtro por dueño tenga algo que descartar
+        cls.owner = User.objects.create_user('dueno')
+        cls.other = User.objects.create_user('otro')
+        for owner in (cls.owner, cls.other):
+            UserProfile.objects.create(user=owner, role='owner')
+            cls.seed(owner)
+
+        service = ExternalService.objects.get(owner=cls.other)
+        service_request = ServiceRequest.objects.create(requester=cls.owner, provider=cls.other, service=service)
+        Message.objects.create(service_request=service_request, sender=cls.owner, content='Hola')
+
+    @staticmethod
+    def seed(owner, count=5):
+        service = ExternalService.objects.create(
+            owner=owner, name='Rectificado', provider_name=owner.username, cost=50000,
+        )
+        for i in range(count):
+            client = Client.objects.create(owner=owner, first_name=f'Cliente {i}', last_name=owner.username)
+            vehicle = Vehicle.objects.create(client=client, brand='Toyota', model='Yaris', year=2018, plate=f'{owner.username[:2]}{i:04d}')
+            evaluation = Evaluation.objects.create(owner=owner, created_by=owner, client=client, vehicle=vehicle)
+            EvaluationItem.objects.create(evaluation=evaluation, description='Cambio de aceite', price=10000)
+            WorkOrder.objects.create(evaluation=evaluation, owner=owner, folio=evaluation.folio)
+
+            product = Product.objects.create(owner=owner, name=f'Producto {i}', sku=f'{owner.username}-{i}')
+            InventoryBatch.objects.create(product=product, initial_quantity=10, current_quantity=10)
+            Notification.objects.create(recipient=owner, message=f'Aviso {i}', is_read=i % 2 == 0)
+
+            ServiceRequest.objects.create(requester=owner, provider=owner, service=service)
+
+    def test_list_queries_use_indexes(self):
+        api = APIClient()
+        api.force_authenticate(User.objects.get(pk=self.owner.pk))
+        for url in self.LIST_URLS:
+            with self.subTest(url=url):
+                with capture_selects() as queries:
+                    response = api.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(queries)
+                for sql, params in queries:
+                    self.assertEqual(sequential_scans(sql, params), [], sql)
+
+    def test_detects_sequential_scan(self):
+        # Control del propio arnés: filtrar por una columna sin índice sí recorre la tabla
+        queryset = Client.objects.filter(first_name='Cliente 1')
+        sql, params = queryset.query.sql_with_params()
+        self.assertEqual(sequential_scans(sql, params), [Client._meta.db_table])
+
+
+class ConditionalGetTests(TestCase):
+    """Los listados y detalles del taller contestan If-None-Match con 304 sin correr su query."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('dueno')
+        UserProfile.objects.create(user=self.owner, role='owner')
+        self.client_record = Client.objects.create(owner=self.owner, first_name='Ana', last_name='Pérez')
+        self.vehicle = Vehicle.objects.create(client=self.client_record, brand='Toyota', model='Yaris', year=2018, plate='AB1234')
+        self.evaluation = Evaluation.objects.create(owner=self.owner, created_by=self.owner, client=self.client_record, vehicle=self.vehicle)
+        self.order = WorkOrder.objects.create(evaluation=self.evaluation, owner=self.owner, folio=self.evaluation.folio)
+        self.product = Product.objects.create(owner=self.owner, name='Filtro', sku='FA-1')
+        InventoryBatch.objects.create(product=self.product, initial_quantity=5, current_quantity=5)
+        self.api = APIClient()
+        self.api.force_authenticate(self.owner)
+
+    def etag(self, url):
+        response = self.api.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_deleting_the_account_does_not_recreate_its_versions(self):
+        self.etag('/api/clients/')
+        self.owner.delete()
+        connection.check_constraints()
+        self.assertFalse(ResourceVersion.objects.exists())
+
+    def test_unchanged_list_answers_304_without_the_list_query(self):
+        etag = self.etag('/api/clients/')
+        self.assertTrue(etag.startswith('W/"'))
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.api.get('/api/clients/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.content), (304, b''))
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse([q for q in ctx.captured_queries if 'clients_client' in q['sql']])
+
+        # Otra URL (filtros, cursor, ?fields=) es otra representación
+        self.assertNotEqual(self.etag('/api/clients/?fields=id'), etag)
+        detail = self.etag(f'/api/clients/{self.client_record.pk}/')
+        self.assertEqual(self.api.get(f'/api/clients/{self.client_record.pk}/', HTTP_IF_NONE_MATCH=detail).status_code, 304)
+
+    def test_writes_change_the_etag_of_dependent_resources(self):
+        urls = ['/api/clients/', '/api/evaluations/', '/api/orders/', '/api/products/']
+        before = {url: self.etag(url) for url in urls}
+
+        # Otro taller no invalida nada
+        Client.objects.create(owner=User.objects.create_user('otro'), first_name='Ajeno')
+        self.assertEqual({url: self.etag(url) for url in urls}, before)
+
+        # Las órdenes muestran datos del vehículo: cambia clientes, evaluaciones y órdenes
+        self.vehicle.color = 'Rojo'
+        self.vehicle.save()
+        after = {url: self.etag(url) for url in urls}
+        self.assertEqual([url for url in urls if after[url] == before[url]], ['/api/products/'])
+
+    def test_bulk_writes_change_the_etag(self):
+        evaluations, products = self.etag('/api/evaluations/'), self.etag('/api/products/')
+
+        sync_items(self.evaluation, [{
+            'description': 'Cambio de aceite', 'price': 10000, 'is_approved': True,
+            'externalId': None, 'inventoryId': None, 'qty': 1,
+        }])
+        consume_stock([(self.product.pk, 2)], owner=self.owner)
+
+        self.assertNotEqual(self.etag('/api/evaluations/'), evaluations)
+        self.assertNotEqual(self.etag('/api/products/'), products)
+        self.assertEqual(self.api.get('/api/products/', HTTP_IF_NONE_MATCH=products).status_code, 200)
+
+
+class ResponseCacheTests(TestCase):
+    """Los GET repetidos salen de la caché 'responses' hasta que una escritura cambia la versión."""
+
+    def setUp(self):
+        response_cache().clear()
+        self.owner = User.objects.create_user('dueno')
+        UserProfile.objects.create(user=self.owner, role='owner')
+        self.client_record = Client.objects.create(owner=self.owner, first_name='Ana', last_name='Pérez')
+        self.api = APIClient()
+        self.api.force_authenticate(self.owner)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.api.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, [q['sql'] for q in ctx.captured_queries]
+
+    def test_repeated_list_is_served_from_cache_until_a_write(self):
+        first, _ = self.get('/api/clients/')
+        second, queries = self.get('/api/clients/')
+        self.assertEqual((first['X-Cache'], second['X-Cache']), ('MISS', 'HIT'))
+        self.assertEqual(second.json(), first.json())
+        self.assertFalse([sql for sql in queries if 'clients_client' in sql])
+
+        # ?fields= y otro taller son otras claves
+        self.assertEqual(self.get('/api/clients/?fields=id')[0]['X-Cache'], 'MISS')
+        other = User.objects.create_user('otro')
+        Client.objects.create(owner=other, first_name='Ajeno')
+        self.api.force_authenticate(other)
+        self.assertEqual([c['first_name'] for c in self.get('/api/clients/')[0].json()['results']], ['Ajeno'])
+        self.api.force_authenticate(self.owner)
+
+        self.client_record.first_name = 'Ana María'
+        self.client_record.save()
+        third, _ = self.get('/api/clients/')
+        self.assertEqual(third['X-Cache'], 'MISS')
+        self.assertEqual(third.json()['results'][0]['first_name'], 'Ana María')
+        self.assertEqual(response_cache_stats(), {'hits': 1, 'misses': 4})
+
+    def test_dashboard_is_cached_and_invalidated_by_orders(self):
+        self.assertEqual(self.get('/api/orders/stats/')[0]['X-Cache'], 'MISS')
+        self.assertEqual(self.get('/api/orders/stats/')[0]['X-Cache'], 'HIT')
+
+        vehicle = Vehicle.objects.create(client=self.client_record, brand='Toyota', model='Yaris', year=2018, plate='AB1234')
+        evaluation = Evaluation.objects.create(owner=self.owner, created_by=self.owner, client=self.client_record, vehicle=vehicle)
+        WorkOrder.objects.create(evaluation=evaluation, owner=self.owner, folio=evaluation.folio)
+
+        response, _ = self.get('/api/orders/stats/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['kpis']['active_orders'], 1)
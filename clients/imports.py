@@ -0,0 +1,121 @@
+# clients/imports.py
+"""
+Importación masiva de clientes y vehículos (carga inicial de un taller).
+
+Una fila por vehículo con los datos de su cliente; un cliente sin vehículos va
+en una fila con las columnas del vehículo vacías:
+
+    first_name, last_name, rut, email, phone, address, plate, brand, model, year, color, vin
+
+Se procesa por lotes de IMPORT_CHUNK_SIZE filas (memoria acotada aunque el
+archivo tenga 100k filas). Por lote: validación de campos sin queries, una
+query para los RUT ya existentes, otra para las patentes ya existentes, y dos
+bulk_create (clientes y vehículos) en una transacción.
+
+- Un RUT que ya existe en el taller (o que apareció antes en el archivo) no crea
+  otro cliente: sus vehículos se agregan al cliente existente.
+- Una patente que ya existe en el taller se omite y se reporta en la fila.
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from accounts.versions import touch
+from backend.imports import IMPORT_CHUNK_SIZE, ImportReport, chunked
+from orders.stats import bump
+from .models import Client, Vehicle
+
+CLIENT_COLUMNS = ('first_name', 'last_name', 'rut', 'email', 'phone', 'address')
+VEHICLE_COLUMNS = ('plate', 'brand', 'model', 'year', 'color', 'vin')
+
+
+def _values(model, row, columns):
+    values = {}
+    for column in columns:
+        value = row.get(column, '')
+        values[column] = None if value == '' and model._meta.get_field(column).null else value
+    return values
+
+
+def _build(row, owner):
+    """Arma (cliente, vehículo o None) desde una fila y valida sus campos."""
+    errors = {}
+    client = Client(owner=owner, **_values(Client, row, CLIENT_COLUMNS))
+    try:
+        client.clean_fields(exclude=['owner'])
+    except ValidationError as exc:
+        errors.update(exc.message_dict)
+    client.set_derived_fields()
+
+    vehicle = None
+    if any(row.get(column) for column in VEHICLE_COLUMNS):
+        vehicle = Vehicle(owner=owner, **_values(Vehicle, row, VEHICLE_COLUMNS))
+        try:
+            vehicle.clean_fields(exclude=['client', 'owner'])
+        except ValidationError as exc:
+            errors.update(exc.message_dict)
+        vehicle.set_derived_fields()
+    return client, vehicle, errors
+
+
+def _import_chunk(chunk, owner, report):
+    rows = []
+    for line, row in chunk:
+        report.rows += 1
+        client, vehicle, errors = _build(row, owner)
+        if errors:
+            report.add_error(line, errors)
+        else:
+            rows.append((line, client, vehicle))
+
+    ruts = {client.normalized_rut for _, client, _ in rows if client.normalized_rut}
+    known_clients = dict(
+        Client.objects.filter(owner=owner, normalized_rut__in=ruts)
+        .order_by('-id')
+        .values_list('normalized_rut', 'id')
+    )
+    plates = {vehicle.normalized_plate for _, _, vehicle in rows if vehicle}
+    taken_plates = set(
+        Vehicle.objects.filter(owner=owner, normalized_plate__in=plates).values_list('normalized_plate', flat=True)
+    )
+
+    new_clients = {}
+    new_vehicles = []
+    for line, client, vehicle in rows:
+        rut = client.normalized_rut
+        if rut in known_clients:
+            client = known_clients[rut]  # id de un cliente ya guardado
+        elif rut and rut in new_clients:
+            client = new_clients[rut]
+        else:
+            new_clients[rut or ('line', line)] = client
+
+        if vehicle is None:
+            continue
+        if vehicle.normalized_plate in taken_plates:
+            report.count('vehicles_skipped')
+            report.add_error(line, {"plate": ["Ya existe un vehículo con esta patente."]})
+            continue
+        taken_plates.add(vehicle.normalized_plate)
+        new_vehicles.append((vehicle, client))
+
+    with transaction.atomic():
+        created = Client.objects.bulk_create(new_clients.values())
+        for vehicle, client in new_vehicles:
+            vehicle.client_id = client if isinstance(client, int) else client.pk
+        Vehicle.objects.bulk_create([vehicle for vehicle, _ in new_vehicles])
+        # bulk_create no dispara las señales de los contadores del dashboard
+        bump(owner.pk, total_clients=len(created), total_vehicles=len(new_vehicles))
+        if created or new_vehicles:
+            touch(owner.pk, 'clients')
+
+    report.count('clients_created', len(created))
+    report.count('vehicles_created', len(new_vehicles))
+
+
+def import_clients(rows, owner, chunk_size=IMPORT_CHUNK_SIZE):
+    """Importa las filas (línea, dict) de backend.imports.read_rows al taller `owner`."""
+    report = ImportReport()
+    report.counts = {'clients_created': 0, 'vehicles_created': 0, 'vehicles_skipped': 0}
+    for chunk in chunked(rows, chunk_size):
+        _import_chunk(chunk, owner, report)
+    return report
@@ -0,0 +1,110 @@
+# clients/management/commands/bench_client_search.py
+import random
+import statistics
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+
+from clients.models import Client
+from clients.search import SEARCH_LIMIT, client_search_document, search_clients
+
+FIRST_NAMES = [
+    "José", "María", "Juan", "Ana", "Luis", "Camila", "Martín", "Sofía", "Andrés", "Valentina",
+    "Ignacio", "Fernanda", "Tomás", "Catalina", "Matías", "Josefa", "Benjamín", "Constanza",
+]
+LAST_NAMES = [
+    "González", "Muñoz", "Rojas", "Díaz", "Pérez", "Soto", "Contreras", "Silva", "Martínez",
+    "Sepúlveda", "Morales", "Rodríguez", "López", "Fuentes", "Hernández", "Torres", "Araya", "Núñez",
+]
+
+# (término, descripción)
+TERMS = [
+    ("gonzalez", "sin tilde"),
+    ("gonzales", "error de tipeo"),
+    ("maria nunez", "dos palabras"),
+    ("12345678", "RUT sin formato"),
+    ("sepulveda.4", "email"),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga clientes de prueba (por defecto 1.000.000) en un dueño y compara la búsqueda "
+        "anterior (4 ILIKE '%término%' con OR) contra clients.search."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=1_000_000, help="Clientes a generar.")
+        parser.add_argument("--repeat", type=int, default=5, help="Repeticiones por término.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--keep", action="store_true", help="No borrar los datos de prueba.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stdout.write(self.style.WARNING(
+                "Sin PostgreSQL se mide el fallback (LIKE sin índice, sin tolerancia a errores)."
+            ))
+
+        User = get_user_model()
+        owner = User.objects.create_user(username=f"bench-{uuid.uuid4().hex[:10]}")
+        try:
+            self._load(owner, options["clients"], options["batch_size"])
+            self._measure(owner, options["repeat"])
+        finally:
+            if not options["keep"]:
+                owner.delete()
+
+    def _load(self, owner, total, batch_size):
+        rng = random.Random(42)
+        started = time.perf_counter()
+        for offset in range(0, total, batch_size):
+            batch = []
+            for i in range(offset, min(offset + batch_size, total)):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                client = Client(
+                    owner=owner,
+                    first_name=first,
+                    last_name=f"{last} {rng.choice(LAST_NAMES)}",
+                    rut=f"{10_000_000 + i}-{rng.randint(0, 9)}",
+                    email=f"{last.lower()}.{i}@example.com",
+                )
+                # bulk_create no pasa por save(): el documento se arma a mano
+                client.search_document = client_search_document(client)
+                batch.append(client)
+            Client.objects.bulk_create(batch)
+        # Un cliente conocido para los términos de RUT
+        Client.objects.create(owner=owner, first_name="María", last_name="Núñez", rut="12.345.678-5")
+        self.stdout.write(f"{total} clientes cargados en {time.perf_counter() - started:.1f}s")
+
+    def _time(self, build, repeat):
+        timings, count = [], 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            count = len(list(build()))
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), count
+
+    def _measure(self, owner, repeat):
+        base = Client.objects.filter(owner=owner).order_by("-created_at")
+
+        def legacy(term):
+            # Lo que generaba SearchFilter con search_fields = first_name, last_name, rut, email
+            query = Q()
+            for word in term.split():
+                query &= (
+                    Q(first_name__icontains=word) | Q(last_name__icontains=word)
+                    | Q(rut__icontains=word) | Q(email__icontains=word)
+                )
+            return base.filter(query)[:SEARCH_LIMIT]
+
+        self.stdout.write(f"{'término':<14} {'caso':<16} {'anterior':>16} {'nueva':>16}")
+        for term, description in TERMS:
+            legacy_ms, legacy_count = self._time(lambda: legacy(term), repeat)
+            new_ms, new_count = self._time(lambda: search_clients(base, term)[:SEARCH_LIMIT], repeat)
+            self.stdout.write(
+                f"{term:<14} {description:<16} {legacy_ms:>9.1f}ms ({legacy_count:>2}) {new_ms:>9.1f}ms ({new_count:>2})"
+            )
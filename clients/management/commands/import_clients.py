@@ -0,0 +1,44 @@
+# clients/management/commands/import_clients.py
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.imports import IMPORT_CHUNK_SIZE, read_rows
+from clients.imports import import_clients
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa clientes y vehículos desde un CSV o XLSX a un taller, por lotes "
+        "(ver clients/imports.py para las columnas)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Archivo .csv o .xlsx.")
+        parser.add_argument("--owner", required=True, help="Usuario dueño del taller.")
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="Filas por lote.")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            owner = User.objects.get(username=options["owner"])
+        except User.DoesNotExist:
+            raise CommandError(f"No existe el usuario {options['owner']!r}.")
+
+        started = time.perf_counter()
+        try:
+            with open(options["path"], "rb") as fileobj:
+                report = import_clients(read_rows(fileobj, options["path"]), owner, options["chunk_size"])
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+
+        result = report.as_dict()
+        self.stdout.write(
+            f"{result['rows']} filas en {elapsed:.2f}s: {result['clients_created']} clientes, "
+            f"{result['vehicles_created']} vehículos, {result['vehicles_skipped']} patentes repetidas, "
+            f"{result['error_count']} filas con errores"
+        )
+        for error in result["errors"]:
+            self.stdout.write(self.style.ERROR(f"línea {error['line']}: {error['errors']}"))
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:38
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+def normalize(*parts):
+    # Copia de clients.search.normalize_search_text (las migraciones no importan código de la app)
+    text = unicodedata.normalize('NFKD', ' '.join(part for part in parts if part))
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return re.sub(r'\s+', ' ', text.lower()).strip()
+
+
+def fill_search_document(apps, schema_editor):
+    Client = apps.get_model('clients', 'Client')
+    batch = []
+    for client in Client.objects.only('first_name', 'last_name', 'rut', 'email').iterator(chunk_size=2000):
+        rut_digits = re.sub(r'[^0-9kK]', '', client.rut or '')
+        client.search_document = normalize(client.first_name, client.last_name, client.rut, rut_digits, client.email)
+        batch.append(client)
+        if len(batch) >= 2000:
+            Client.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    if batch:
+        Client.objects.bulk_update(batch, ['search_document'])
+
+
+def create_search_indexes(apps, schema_editor):
+    # Sólo PostgreSQL: en SQLite la búsqueda usa el fallback sin índice
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS client_search_fts_idx ON clients_client "
+        "USING gin (to_tsvector('simple', search_document))"
+    )
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS client_search_trgm_idx ON clients_client "
+        "USING gin (search_document gin_trgm_ops)"
+    )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS client_search_fts_idx")
+    schema_editor.execute("DROP INDEX IF EXISTS client_search_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0002_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(fill_search_document, migrations.RunPython.noop),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
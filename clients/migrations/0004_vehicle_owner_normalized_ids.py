@@ -0,0 +1,82 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:43
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def normalize_identifier(value):
+    # Copia de clients.search.normalize_identifier
+    text = unicodedata.normalize('NFKD', value or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return re.sub(r'[^0-9A-Z]', '', text.upper())
+
+
+def fill_vehicle_columns(apps, schema_editor):
+    Client = apps.get_model('clients', 'Client')
+    Vehicle = apps.get_model('clients', 'Vehicle')
+    Vehicle.objects.update(
+        owner=Subquery(Client.objects.filter(pk=OuterRef('client_id')).values('owner_id')[:1])
+    )
+    batch = []
+    for vehicle in Vehicle.objects.only('plate', 'vin').iterator(chunk_size=2000):
+        vehicle.normalized_plate = normalize_identifier(vehicle.plate)
+        vehicle.normalized_vin = normalize_identifier(vehicle.vin)
+        batch.append(vehicle)
+        if len(batch) >= 2000:
+            Vehicle.objects.bulk_update(batch, ['normalized_plate', 'normalized_vin'])
+            batch = []
+    if batch:
+        Vehicle.objects.bulk_update(batch, ['normalized_plate', 'normalized_vin'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0003_client_search_document'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='vehicle',
+            name='vehicle_created_idx',
+        ),
+        migrations.AddField(
+            model_name='vehicle',
+            name='normalized_plate',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='vehicle',
+            name='normalized_vin',
+            field=models.CharField(blank=True, default='', editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='vehicle',
+            name='owner',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='vehicles', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(fill_vehicle_columns, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='vehicle',
+            name='owner',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='vehicles', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['owner', '-created_at'], name='vehicle_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['owner', 'normalized_plate'], name='vehicle_owner_plate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['owner', 'normalized_vin'], name='vehicle_owner_vin_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:47
+
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def normalize_identifier(value):
+    # Copia de clients.search.normalize_identifier
+    text = unicodedata.normalize('NFKD', value or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return re.sub(r'[^0-9A-Z]', '', text.upper())
+
+
+def fill_normalized_rut(apps, schema_editor):
+    Client = apps.get_model('clients', 'Client')
+    batch = []
+    for client in Client.objects.exclude(rut=None).exclude(rut='').only('rut').iterator(chunk_size=2000):
+        client.normalized_rut = normalize_identifier(client.rut)
+        batch.append(client)
+        if len(batch) >= 2000:
+            Client.objects.bulk_update(batch, ['normalized_rut'])
+            batch = []
+    if batch:
+        Client.objects.bulk_update(batch, ['normalized_rut'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0004_vehicle_owner_normalized_ids'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='normalized_rut',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.RunPython(fill_normalized_rut, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['owner', 'normalized_rut'], name='client_owner_rut_idx'),
+        ),
+    ]
@@ -2,6 +2,8 @@
 from django.db import models
 from django.conf import settings
 
+from .search import client_search_document, normalize_identifier
+
 class Client(models.Model):
     owner = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -18,12 +20,43 @@ class Client(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Nombre, RUT y email normalizados para la búsqueda (ver clients/search.py).
+    # En PostgreSQL tiene índices GIN de texto completo y trigramas.
+    search_document = models.TextField(blank=True, default='', editable=False)
+    # RUT sin puntos ni guion ("12.345.678-k" -> "12345678K"), para deduplicar al importar
+    normalized_rut = models.CharField(max_length=20, blank=True, default='', editable=False)
+
+    DERIVED_FIELDS = ('search_document', 'normalized_rut')
+
+    class Meta:
+        indexes = [
+            # Listado paginado por cursor: WHERE owner = ? ORDER BY created_at DESC
+            models.Index(fields=['owner', '-created_at'], name='client_owner_created_idx'),
+            models.Index(fields=['owner', 'normalized_rut'], name='client_owner_rut_idx'),
+        ]
+
+    def set_derived_fields(self):
+        """Calcula las columnas derivadas; save() lo hace solo, bulk_create necesita llamarlo."""
+        self.search_document = client_search_document(self)
+        self.normalized_rut = normalize_identifier(self.rut)
+
+    def save(self, *args, **kwargs):
+        self.set_derived_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, *self.DERIVED_FIELDS}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
 # 👇 NUEVO MODELO
 class Vehicle(models.Model):
     client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name="vehicles")
+    # Copia del dueño del cliente, para filtrar y buscar por taller sin JOIN
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="vehicles", editable=False
+    )
     brand = models.CharField(max_length=50, verbose_name="Marca")     # Ej: Toyota
     model = models.CharField(max_length=50, verbose_name="Modelo")    # Ej: Yaris
     year = models.PositiveIntegerField(verbose_name="Año")            # Ej: 2018
@@ -31,7 +64,37 @@ class Vehicle(models.Model):
     color = models.CharField(max_length=30, blank=True, null=True)
     vin = models.CharField(max_length=50, blank=True, null=True, verbose_name="Chasis/VIN")
 
+    # Patente y VIN en mayúsculas y sin separadores ("hy kg-99" -> "HYKG99"), para la búsqueda exacta
+    normalized_plate = models.CharField(max_length=20, blank=True, default='', editable=False)
+    normalized_vin = models.CharField(max_length=50, blank=True, default='', editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    DERIVED_FIELDS = ('owner', 'normalized_plate', 'normalized_vin')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', '-created_at'], name='vehicle_owner_created_idx'),
+            models.Index(fields=['owner', 'normalized_plate'], name='vehicle_owner_plate_idx'),
+            models.Index(fields=['owner', 'normalized_vin'], name='vehicle_owner_vin_idx'),
+        ]
+
+    def set_derived_fields(self):
+        """Dueño y patente/VIN normalizados; save() lo hace solo, bulk_create necesita llamarlo."""
+        if self.owner_id is None:
+            self.owner_id = self.client.owner_id
+        self.normalized_plate = normalize_identifier(self.plate)
+        self.normalized_vin = normalize_identifier(self.vin)
+
+    def save(self, *args, **kwargs):
+        # El dueño siempre se copia del cliente (puede haber cambiado de cliente)
+        self.owner_id = self.client.owner_id
+        self.set_derived_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, *self.DERIVED_FIELDS}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.brand} {self.model} ({self.plate})"
\ No newline at end of file
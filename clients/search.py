@@ -0,0 +1,79 @@
+# clients/search.py
+"""
+Búsqueda de clientes.
+
+Cada cliente guarda en `search_document` su nombre, apellido, RUT (tal cual y
+sólo dígitos) y email en minúsculas y sin tildes. Sobre esa columna:
+
+- PostgreSQL: índice GIN de tsvector (palabras completas, con ranking) y GIN de
+  trigramas (pg_trgm) para tolerar errores de tipeo ("gonzales" encuentra
+  "González"). Ambos los crea la migración 0003_client_search_document.
+- Otros motores (SQLite en desarrollo): cada palabra buscada debe aparecer en el
+  documento; sin tildes, pero sin tolerancia a errores ni ranking.
+"""
+import re
+import unicodedata
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField, TrigramWordSimilarity
+from django.db import connections
+from django.db.models import F, Func, Q
+from rest_framework.filters import BaseFilterBackend
+
+# Resultados máximos de una búsqueda (van en una sola página, ordenados por relevancia)
+SEARCH_LIMIT = 50
+
+
+def normalize_search_text(*parts):
+    """Une los textos, en minúsculas y sin tildes: 'José  Núñez' -> 'jose nunez'."""
+    text = unicodedata.normalize('NFKD', ' '.join(part for part in parts if part))
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return re.sub(r'\s+', ' ', text.lower()).strip()
+
+
+def normalize_identifier(value):
+    """Patente/VIN comparable: mayúsculas, sólo letras y números ('hy kg-99' -> 'HYKG99')."""
+    return re.sub(r'[^0-9A-Z]', '', normalize_search_text(value).upper())
+
+
+def client_search_document(client):
+    rut_digits = re.sub(r'[^0-9kK]', '', client.rut or '')
+    return normalize_search_text(client.first_name, client.last_name, client.rut, rut_digits, client.email)
+
+
+class SearchDocumentVector(Func):
+    """to_tsvector('simple', search_document): la misma expresión que usa el índice GIN."""
+    function = 'to_tsvector'
+    template = "%(function)s('simple', %(expressions)s)"
+    output_field = SearchVectorField()
+
+
+def search_clients(queryset, term):
+    """Filtra `queryset` por `term`; en PostgreSQL además lo ordena por relevancia."""
+    normalized = normalize_search_text(term)
+    if not normalized:
+        return queryset
+
+    if connections[queryset.db].vendor == 'postgresql':
+        query = SearchQuery(normalized, config='simple', search_type='plain')
+        return (
+            queryset.annotate(document=SearchDocumentVector('search_document'))
+            .filter(Q(document=query) | Q(search_document__trigram_word_similar=normalized))
+            .annotate(rank=SearchRank(F('document'), query) + TrigramWordSimilarity(normalized, 'search_document'))
+            .order_by('-rank', '-created_at')
+        )
+
+    for word in normalized.split():
+        queryset = queryset.filter(search_document__contains=word)
+    return queryset
+
+
+class ClientSearchFilter(BaseFilterBackend):
+    """Reemplaza a SearchFilter en clientes; usa el mismo parámetro ?search=."""
+    search_param = 'search'
+
+    def get_search_term(self, request):
+        return request.query_params.get(self.search_param, '').strip()
+
+    def filter_queryset(self, request, queryset, view):
+        term = self.get_search_term(request)
+        return search_clients(queryset, term) if term else queryset
@@ -1,17 +1,27 @@
 # clients/serializers.py
 from rest_framework import serializers
 from .models import Client, Vehicle
+from backend.serializers import DynamicFieldsMixin, expands
 
-class VehicleSerializer(serializers.ModelSerializer):
+# Sólo el id del cliente, sin anidados: no necesita setup_eager_loading (ver VehicleListQueryTests)
+class VehicleSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Vehicle
         fields = ['id', 'client', 'brand', 'model', 'year', 'plate', 'color', 'vin', 'created_at']
 
-class ClientSerializer(serializers.ModelSerializer):
+class ClientSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     # Incluimos los vehículos en modo lectura para verlos fácil al cargar el cliente
     vehicles = VehicleSerializer(many=True, read_only=True)
 
     class Meta:
         model = Client
         fields = ['id', 'first_name', 'last_name', 'rut', 'email', 'phone', 'address', 'vehicles', 'created_at']
-        read_only_fields = ['owner', 'created_at']
\ No newline at end of file
+        read_only_fields = ['owner', 'created_at']
+        expandable_fields = ['vehicles']
+
+    @staticmethod
+    def setup_eager_loading(queryset, prefix='', selection=None):
+        """Plan de carga para este serializer; `prefix` es la ruta cuando va anidado."""
+        if expands(selection, 'vehicles'):
+            queryset = queryset.prefetch_related(f'{prefix}vehicles')
+        return queryset
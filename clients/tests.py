@@ -1,3 +1,264 @@
-from django.test import TestCase
+import io
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from evaluations.models import Evaluation, EvaluationItem
+from orders.models import WorkOrder
+from orders.stats import compute_stats, get_stats
+from .imports import import_clients
+from .models import Client, Vehicle
+
+
+class ClientListQueryTests(TestCase):
+    """El listado de clientes trae los vehículos en una sola query extra."""
+
+    # auth (perfil) + versión para el ETag + página de clientes + vehículos
+    EXPECTED_QUERIES = 4
+
+    def setUp(self):
+        self.owner = User.objects.create_user('dueno')
+        self.api = APIClient()
+
+    def create_clients(self, count):
+        for i in range(count):
+            client = Client.objects.create(owner=self.owner, first_name=f'Cliente {i}', last_name='Test')
+            Vehicle.objects.create(client=client, brand='Toyota', model='Yaris', year=2018, plate=f'AB{i:04d}')
+
+    def count_list_queries(self):
+        self.api.force_authenticate(User.objects.get(pk=self.owner.pk))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.api.get('/api/clients/')
+        self.assertEqual(response.status_code, 200)
+        return len(ctx), response.json()['results']
+
+    def test_list_query_count_is_constant(self):
+        self.create_clients(2)
+        few, _ = self.count_list_queries()
+        self.create_clients(6)
+        many, results = self.count_list_queries()
+
+        self.assertEqual(len(results), 8)
+        self.assertEqual(few, many)
+        self.assertEqual(many, self.EXPECTED_QUERIES)
+
+
+class VehicleListQueryTests(TestCase):
+    """Los vehículos sólo muestran el id de su cliente: el listado no consulta nada por fila."""
+
+    # auth (perfil) + página de vehículos
+    EXPECTED_QUERIES = 2
+
+    def test_list_query_count_is_constant(self):
+        owner = User.objects.create_user('dueno')
+        api = APIClient()
+
+        def count(vehicles):
+            client = Client.objects.create(owner=owner, first_name='Cliente', last_name=str(vehicles))
+            for i in range(vehicles):
+                Vehicle.objects.create(client=client, brand='Toyota', model='Yaris', year=2018, plate=f'{vehicles}X{i:04d}')
+            api.force_authenticate(User.objects.get(pk=owner.pk))
+            with CaptureQueriesContext(connection) as ctx:
+                response = api.get('/api/vehicles/')
+            self.assertEqual(response.status_code, 200)
+            return len(ctx)
+
+        self.assertEqual(count(2), count(6))
+        self.assertEqual(count(1), self.EXPECTED_QUERIES)
+
+
+class ClientSearchTests(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user('dueno')
+        self.api = APIClient()
+        self.api.force_authenticate(self.owner)
+        Client.objects.create(owner=self.owner, first_name='José', last_name='González', rut='12.345.678-5')
+        Client.objects.create(owner=self.owner, first_name='Ana', last_name='Muñoz', email='ana@example.com')
+        Client.objects.create(owner=User.objects.create_user('otro'), first_name='José', last_name='González')
+
+    def search(self, term):
+        response = self.api.get('/api/clients/', {'search': term})
+        self.assertEqual(response.status_code, 200)
+        return [client['last_name'] for client in response.json()['results']]
+
+    def test_search_is_accent_insensitive_and_scoped_to_owner(self):
+        self.assertEqual(self.search('gonzalez'), ['González'])
+        self.assertEqual(self.search('MUNOZ'), ['Muñoz'])
+
+    def test_search_matches_every_word_and_unformatted_rut(self):
+        self.assertEqual(self.search('jose 12345678'), ['González'])
+        self.assertEqual(self.search('ana@example'), ['Muñoz'])
+        if connection.vendor != 'postgresql':
+            # Sin pg_trgm cada palabra debe aparecer; en PostgreSQL la similitud puede traer parecidos
+            self.assertEqual(self.search('jose munoz'), [])
+
+    def test_document_follows_edits(self):
+        client = Client.objects.get(owner=self.owner, last_name='Muñoz')
+        client.last_name = 'Peña'
+        client.save(update_fields=['last_name'])
+        self.assertEqual(self.search('pena'), ['Peña'])
+
+
+@skipUnless(connection.vendor == 'postgresql', "Texto completo y trigramas sólo en PostgreSQL")
+class ClientPostgresSearchTests(TestCase):
+    """El camino de PostgreSQL: índices GIN de tsvector y pg_trgm (migración 0003_client_search_document)."""
+
+    setUp = ClientSearchTests.setUp
+    search = ClientSearchTests.search
+
+    def test_typos_are_tolerated(self):
+        self.assertEqual(self.search('gonzales'), ['González'])
+        self.assertEqual(self.search('munos'), ['Muñoz'])
+
+    def test_results_are_ranked_by_relevance(self):
+        Client.objects.create(owner=self.owner, first_name='José', last_name='Muñoz Soto')
+        results = self.search('jose munoz')
+        self.assertEqual(results[0], 'Muñoz Soto')
+        self.assertIn('Muñoz', results)
+
+
+class VehicleLookupTests(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user('dueno')
+        self.api = APIClient()
+        client = Client.objects.create(owner=self.owner, first_name='Ana', last_name='Test')
+        self.vehicle = Vehicle.objects.create(
+            client=client, brand='Toyota', model='Yaris', year=2018, plate='HYKG-99', vin='jt2ae 92e0j3',
+        )
+        self.evaluation = Evaluation.objects.create(owner=self.owner, client=client, vehicle=self.vehicle, status='approved')
+        EvaluationItem.objects.create(evaluation=self.evaluation, description='Frenos', price=20000)
+        WorkOrder.objects.create(evaluation=self.evaluation, owner=self.owner, folio=self.evaluation.folio)
+
+        other = Client.objects.create(owner=User.objects.create_user('otro'), first_name='Otro', last_name='Taller')
+        Vehicle.objects.create(client=other, brand='Kia', model='Rio', year=2020, plate='ZZZZ11')
+
+    def lookup(self, **params):
+        return self.api.get('/api/vehicles/lookup/', params)
+
+    def test_plate_is_normalized_on_save(self):
+        self.assertEqual(self.vehicle.normalized_plate, 'HYKG99')
+        self.assertEqual(self.vehicle.normalized_vin, 'JT2AE92E0J3')
+        self.assertEqual(self.vehicle.owner_id, self.owner.pk)
+
+    def test_lookup_returns_vehicle_client_and_active_work(self):
+        self.api.force_authenticate(User.objects.get(pk=self.owner.pk))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.lookup(plate='hy kg 99')
+        data = response.json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['vehicle']['id'], self.vehicle.pk)
+        self.assertEqual(data['client']['first_name'], 'Ana')
+        self.assertEqual(data['active_evaluation']['id'], self.evaluation.pk)
+        self.assertEqual(len(data['active_evaluation']['items']), 1)
+        self.assertEqual(data['active_work_order']['vehicle_plate'], 'HYKG-99')
+        # auth (perfil) + vehículo con cliente + evaluación + ítems + orden
+        self.assertEqual(len(ctx), 5)
+
+    def test_lookup_by_vin_and_tenant_isolation(self):
+        self.api.force_authenticate(self.owner)
+        self.assertEqual(self.lookup(vin='JT2AE-92E0J3').json()['vehicle']['id'], self.vehicle.pk)
+        self.assertEqual(self.lookup(plate='ZZZZ11').status_code, 404)
+        self.assertEqual(self.lookup().status_code, 400)
+
+
+class ClientImportTests(TestCase):
+
+    HEADER = 'first_name;last_name;rut;email;phone;address;plate;brand;model;year;color;vin\n'
+
+    def setUp(self):
+        self.owner = User.objects.create_user('dueno')
+        self.api = APIClient()
+        self.api.force_authenticate(self.owner)
+        existing = Client.objects.create(owner=self.owner, first_name='Ana', last_name='Soto', rut='11.111.111-1')
+        Vehicle.objects.create(client=existing, brand='Kia', model='Rio', year=2020, plate='AAAA11')
+        self.existing = existing
+        get_stats(self.owner)  # los contadores ya existen antes de importar
+
+    def upload(self, content, name='clientes.csv'):
+        return self.api.post('/api/clients/import/', {'file': SimpleUploadedFile(name, content)}, format='multipart')
+
+    def test_csv_import_deduplicates_and_reports_errors(self):
+        content = (
+            self.HEADER
+            + 'Juan;Pérez;12.345.678-9;;;;HYKG-99;Toyota;Yaris;2018;;\n'
+            + 'Juan;Pérez;123456789;;;;BBBB22;Toyota;Hilux;2015;;\n'    # mismo RUT: un solo cliente
+            + 'Ana;Soto;111111111;;;;aaaa-11;Kia;Rio;2020;;\n'          # patente repetida
+            + 'Ana;Soto;11111111-1;;;;CCCC33;Mazda;3;2019;;\n'          # cliente existente
+            + ';Sin nombre;;correo-malo;;;;;;;;\n'                       # errores de campos
+            + 'Pedro;Rojas;;;;;;;;;;\n'                                  # cliente sin vehículo
+        ).encode()
+        response = self.upload(content)
+        data = response.json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['rows'], 6)
+        self.assertEqual(data['clients_created'], 2)
+        self.assertEqual(data['vehicles_created'], 3)
+        self.assertEqual(data['vehicles_skipped'], 1)
+        self.assertEqual([error['line'] for error in data['errors']], [4, 6])
+        self.assertEqual(set(data['errors'][1]['errors']), {'first_name', 'email'})
+
+        juan = Client.objects.get(owner=self.owner, normalized_rut='123456789')
+        self.assertEqual(juan.vehicles.count(), 2)
+        self.assertIn('perez', juan.search_document)
+        self.assertEqual(self.existing.vehicles.count(), 2)
+        vehicle = Vehicle.objects.get(normalized_plate='HYKG99')
+        self.assertEqual((vehicle.owner_id, vehicle.year), (self.owner.pk, 2018))
+
+        stats = get_stats(self.owner)
+        for field, value in compute_stats(self.owner.pk).items():
+            self.assertEqual(getattr(stats, field), value, field)
+
+    def test_xlsx_import(self):
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(['First_Name', 'Last_Name', 'RUT', 'Plate', 'Brand', 'Model', 'Year'])
+        sheet.append(['Luis', 'Díaz', '9.876.543-2', 'ZZ-TT-10', 'Suzuki', 'Swift', 2021])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+
+        response = self.upload(buffer.getvalue(), name='clientes.xlsx')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['vehicles_created'], 1)
+        self.assertEqual(Vehicle.objects.get(normalized_plate='ZZTT10').client.rut, '9.876.543-2')
+
+    def test_queries_per_chunk_do_not_grow_with_rows(self):
+        def run(count, offset):
+            lines = ''.join(
+                f'Cliente;{i};{i:08d}-{i % 10};;;;PL{i:04d};Toyota;Yaris;2018;;\n'
+                for i in range(offset, offset + count)
+            )
+            rows = self.HEADER + lines
+            from backend.imports import read_rows
+            with CaptureQueriesContext(connection) as ctx:
+                import_clients(read_rows(io.BytesIO(rows.encode()), 'x.csv'), self.owner, chunk_size=50)
+            return len(ctx)
+
+        self.assertEqual(run(10, 0), run(50, 100))
+
+    def test_large_uploads_are_sent_to_the_command(self):
+        def content(count):
+            return (self.HEADER + ''.join(f'Cliente;{i};;;;;;;;;;\n' for i in range(count))).encode()
+
+        with override_settings(IMPORT_MAX_UPLOAD_ROWS=2):
+            response = self.upload(content(3))
+            self.assertEqual(response.status_code, 413)
+            self.assertIn('manage.py import_clients', response.json()['error'])
+            self.assertEqual(Client.objects.filter(owner=self.owner).count(), 1)  # no se importó nada
+
+            response = self.upload(content(2))
+        self.assertEqual((response.status_code, response.json()['rows']), (200, 2))
+
+    def test_rejects_unknown_format(self):
+        self.assertEqual(self.upload(b'hola', name='clientes.pdf').status_code, 400)
+        self.assertEqual(self.api.post('/api/clients/import/', {}, format='multipart').status_code, 400)
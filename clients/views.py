@@ -1,42 +1,142 @@
 # clients/views.py
-from rest_framework import viewsets, permissions, filters, status
+from django.conf import settings
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
+from .imports import import_clients
 from .models import Client, Vehicle
 from .serializers import ClientSerializer, VehicleSerializer
-from accounts.utils import get_data_owner
+from .search import SEARCH_LIMIT, ClientSearchFilter, normalize_identifier
+from backend.conditional import ConditionalGetMixin
+from backend.imports import TooManyRows, check_upload_rows, read_rows
+from backend.serializers import FieldSelection
+from evaluations.models import Evaluation
+from evaluations.serializers import EvaluationSerializer
+from orders.models import WorkOrder
+from orders.serializers import WorkOrderSerializer
+from orders.stats import ACTIVE_ORDER_STATUSES
 
-class ClientViewSet(viewsets.ModelViewSet):
+class ClientViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = ClientSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [filters.SearchFilter]
-    search_fields = ['first_name', 'last_name', 'rut', 'email']
+    etag_resources = ('clients',)
+    filter_backends = [ClientSearchFilter]
+    ordering = '-created_at'
 
     def get_queryset(self):
-        target_user = get_data_owner(self.request.user)
-        return Client.objects.filter(owner=target_user).order_by('-created_at')
+        target_user = self.request.tenant.data_owner
+        queryset = Client.objects.filter(owner=target_user).order_by('-created_at')
+        return ClientSerializer.setup_eager_loading(queryset, selection=FieldSelection.from_request(self.request))
+
+    def list(self, request, *args, **kwargs):
+        if not ClientSearchFilter().get_search_term(request):
+            return super().list(request, *args, **kwargs)
+        # Con ?search= el orden es por relevancia (no sirve para el cursor):
+        # devolvemos los mejores SEARCH_LIMIT en una sola página
+        queryset = self.filter_queryset(self.get_queryset())[:SEARCH_LIMIT]
+        serializer = self.get_serializer(queryset, many=True)
+        return Response({"next": None, "previous": None, "results": serializer.data})
 
     def perform_create(self, serializer):
-        target_user = get_data_owner(self.request.user)
+        target_user = self.request.tenant.data_owner
         serializer.save(owner=target_user)
 
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser])
+    def import_file(self, request):
+        """
+        Carga masiva de clientes y vehículos desde un CSV o XLSX (campo 'file').
+        Columnas y reglas de deduplicación en clients/imports.py. Responde con los
+        contadores y los errores por línea; las filas válidas se guardan igual.
+        Hasta settings.IMPORT_MAX_UPLOAD_ROWS filas (413 si pasa: se usa el comando).
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "Debes adjuntar el archivo en el campo 'file'."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            check_upload_rows(upload, settings.IMPORT_MAX_UPLOAD_ROWS)
+            report = import_clients(read_rows(upload, upload.name), request.tenant.data_owner)
+        except TooManyRows as exc:
+            return Response(
+                {"error": f"{exc} Para cargas grandes usa `python manage.py import_clients <archivo> --owner <usuario>`."},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report.as_dict())
+
 # 👇 NUEVO VIEWSET PARA VEHÍCULOS
 class VehicleViewSet(viewsets.ModelViewSet):
     serializer_class = VehicleSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = '-created_at'
 
     def get_queryset(self):
         # Solo mostramos vehículos de clientes que pertenecen a este taller
-        target_user = get_data_owner(self.request.user)
-        return Vehicle.objects.filter(client__owner=target_user).order_by('-created_at')
+        target_user = self.request.tenant.data_owner
+        return Vehicle.objects.filter(owner=target_user).order_by('-created_at')
 
     def create(self, request, *args, **kwargs):
         # Verificamos que el cliente al que se le asigna el auto sea del taller
         client_id = request.data.get('client')
-        target_user = get_data_owner(request.user)
+        target_user = request.tenant.data_owner
         
         try:
             client = Client.objects.get(id=client_id, owner=target_user)
         except Client.DoesNotExist:
             return Response({"error": "Cliente no válido o no te pertenece."}, status=status.HTTP_400_BAD_REQUEST)
 
-        return super().create(request, *args, **kwargs)
\ No newline at end of file
+        return super().create(request, *args, **kwargs)
+
+    @action(detail=False, methods=['get'])
+    def lookup(self, request):
+        """
+        Busca un vehículo del taller por patente (?plate=) o VIN (?vin=), sin importar
+        mayúsculas, guiones ni espacios, y devuelve de una vez su cliente y su
+        evaluación / orden de trabajo en curso (o null).
+        """
+        plate = normalize_identifier(request.query_params.get('plate'))
+        vin = normalize_identifier(request.query_params.get('vin'))
+        if not plate and not vin:
+            return Response({"error": "Debes indicar 'plate' o 'vin'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        vehicles = Vehicle.objects.filter(owner=request.tenant.data_owner).select_related('client')
+        vehicles = vehicles.filter(normalized_plate=plate) if plate else vehicles.filter(normalized_vin=vin)
+        # Si la patente se repite (ej. el auto cambió de dueño) gana el registro más reciente
+        vehicle = vehicles.order_by('-created_at').first()
+        if vehicle is None:
+            return Response({"error": "Vehículo no encontrado."}, status=status.HTTP_404_NOT_FOUND)
+
+        # Sin anidados repetidos: el cliente y el vehículo ya van arriba
+        evaluation_selection = FieldSelection(expand={'items': {}})
+        evaluation = (
+            EvaluationSerializer.setup_eager_loading(
+                Evaluation.objects.filter(vehicle=vehicle, status__in=Evaluation.ACTIVE_STATUSES),
+                selection=evaluation_selection,
+            )
+            .order_by('-created_at')
+            .first()
+        )
+        order_selection = FieldSelection()
+        work_order = (
+            WorkOrderSerializer.setup_eager_loading(
+                WorkOrder.objects.filter(evaluation__vehicle=vehicle, status__in=ACTIVE_ORDER_STATUSES),
+                order_selection,
+            )
+            .order_by('-created_at')
+            .first()
+        )
+
+        context = self.get_serializer_context()
+        return Response({
+            "vehicle": VehicleSerializer(vehicle, context=context).data,
+            "client": ClientSerializer(vehicle.client, context=context, selection=FieldSelection()).data,
+            "active_evaluation": (
+                EvaluationSerializer(evaluation, context=context, selection=evaluation_selection).data
+                if evaluation else None
+            ),
+            "active_work_order": (
+                WorkOrderSerializer(work_order, context=context, selection=order_selection).data
+                if work_order else None
+            ),
+        })
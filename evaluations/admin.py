@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Evaluation, EvaluationItem
+from .models import Evaluation, EvaluationItem, FolioSequence
 
 class EvaluationItemInline(admin.TabularInline):
     model = EvaluationItem
@@ -23,4 +23,9 @@ class EvaluationAdmin(admin.ModelAdmin):
 class EvaluationItemAdmin(admin.ModelAdmin):
     list_display = ('description', 'evaluation', 'price', 'is_approved')
     list_filter = ('is_approved',)
-    search_fields = ('description', 'evaluation__client__first_name')
\ No newline at end of file
+    search_fields = ('description', 'evaluation__client__first_name')
+
+@admin.register(FolioSequence)
+class FolioSequenceAdmin(admin.ModelAdmin):
+    list_display = ('owner', 'last_folio')
+    search_fields = ('owner__username',)
@@ -0,0 +1,41 @@
+# evaluations/exports.py
+"""Columnas y anotaciones del export de evaluaciones (ver backend/exports.py)."""
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Concat
+
+from .models import EvaluationItem
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+def items_total(evaluation_ref='pk', approved_only=False):
+    """Subquery con SUM(precio * cantidad) de los ítems de la evaluación `evaluation_ref`."""
+    items = EvaluationItem.objects.filter(evaluation=OuterRef(evaluation_ref))
+    if approved_only:
+        items = items.filter(is_approved=True)
+    total = items.order_by().values('evaluation').annotate(
+        total=Sum(F('price') * F('quantity'), output_field=MONEY)
+    ).values('total')
+    return Coalesce(Subquery(total), Value(0), output_field=MONEY)
+
+
+EVALUATION_EXPORT_COLUMNS = [
+    ('Folio', 'folio'),
+    ('Estado', 'status'),
+    ('Fecha', 'created_at'),
+    ('Cliente', 'client_name'),
+    ('RUT', 'client__rut'),
+    ('Patente', 'vehicle__plate'),
+    ('Marca', 'vehicle__brand'),
+    ('Modelo', 'vehicle__model'),
+    ('Total presupuestado', 'quoted_total'),
+    ('Total aprobado', 'approved_total'),
+]
+
+
+def annotate_for_export(queryset):
+    return queryset.annotate(
+        client_name=Concat('client__first_name', Value(' '), 'client__last_name'),
+        quoted_total=items_total(),
+        approved_total=items_total(approved_only=True),
+    )
@@ -0,0 +1,89 @@
+# evaluations/management/commands/bench_folio_allocation.py
+import statistics
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from clients.models import Client, Vehicle
+from evaluations.models import Evaluation, FolioSequence
+
+
+def legacy_next_folio(owner):
+    # Algoritmo anterior (recorre todos los folios del dueño buscando el primer hueco), sólo para comparar
+    next_folio = 1
+    for folio in Evaluation.objects.filter(owner=owner).values_list('folio', flat=True).order_by('folio'):
+        if folio == next_folio:
+            next_folio += 1
+        else:
+            break
+    return next_folio
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la latencia de crear evaluaciones a medida que crece el historial del dueño "
+        "(por defecto hasta 100.000) y la compara con el recorrido de folios anterior."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", default="0,1000,10000,100000",
+            help="Cantidad de evaluaciones existentes en cada medición, separadas por coma.",
+        )
+        parser.add_argument("--samples", type=int, default=50, help="Creaciones medidas por punto.")
+        parser.add_argument("--keep", action="store_true", help="No borrar los datos de prueba.")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted({int(size) for size in options["sizes"].split(",")})
+        except ValueError:
+            raise CommandError("--sizes debe ser una lista de enteros separados por coma.")
+
+        User = get_user_model()
+        owner = User.objects.create_user(username=f"bench-{uuid.uuid4().hex[:10]}")
+        try:
+            self._run(owner, sizes, options["samples"])
+        finally:
+            if not options["keep"]:
+                owner.delete()
+
+    def _run(self, owner, sizes, samples):
+        client = Client.objects.create(owner=owner, first_name="Bench", last_name="Folios")
+        vehicle = Vehicle.objects.create(client=client, brand="Bench", model="Bench", year=2020, plate="BENCH")
+
+        self.stdout.write(f"{'evaluaciones':>12}  {'create p50':>10}  {'create p95':>10}  {'recorrido anterior':>18}")
+        for size in sizes:
+            # Relleno directo hasta `size` filas (sin pasar por save) y secuencia al día
+            existing = Evaluation.objects.filter(owner=owner).count()
+            if size > existing:
+                first = FolioSequence.allocate(owner.pk)
+                Evaluation.objects.bulk_create(
+                    [
+                        Evaluation(owner=owner, client=client, vehicle=vehicle, folio=first + offset)
+                        for offset in range(size - existing)
+                    ],
+                    batch_size=5000,
+                )
+                FolioSequence.objects.filter(owner=owner).update(last_folio=first + size - existing - 1)
+
+            timings = []
+            created = []
+            for _ in range(samples):
+                started = time.perf_counter()
+                created.append(Evaluation.objects.create(owner=owner, client=client, vehicle=vehicle))
+                timings.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            legacy_next_folio(owner)
+            legacy_ms = (time.perf_counter() - started) * 1000
+
+            # Las creaciones medidas no cuentan para el siguiente punto
+            Evaluation.objects.filter(pk__in=[evaluation.pk for evaluation in created]).delete()
+
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(
+                f"{size:>12}  {statistics.median(timings):>8.2f}ms  {p95:>8.2f}ms  {legacy_ms:>16.2f}ms"
+            )
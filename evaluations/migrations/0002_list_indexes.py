@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0002_list_indexes'),
+        ('evaluations', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='evaluation',
+            index=models.Index(fields=['owner', '-folio'], name='evaluation_owner_folio_idx'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def fill_sequences(apps, schema_editor):
+    """
+    Antes de la restricción única: renumera folios repetidos (o vacíos) al final de
+    la serie de cada dueño, arrastrando el folio de su orden de trabajo, y deja la
+    secuencia de cada dueño en su folio más alto.
+    """
+    Evaluation = apps.get_model('evaluations', 'Evaluation')
+    FolioSequence = apps.get_model('evaluations', 'FolioSequence')
+    WorkOrder = apps.get_model('orders', 'WorkOrder')
+
+    owners = Evaluation.objects.order_by().values('owner').annotate(top=Max('folio'))
+    for row in owners:
+        last_folio = row['top'] or 0
+        seen = set()
+        rows = (
+            Evaluation.objects.filter(owner_id=row['owner'])
+            .order_by(F('folio').asc(nulls_last=True), 'id')
+            .values_list('id', 'folio')
+        )
+        for evaluation_id, folio in rows:
+            if folio and folio not in seen:
+                seen.add(folio)
+                continue
+            last_folio += 1
+            Evaluation.objects.filter(pk=evaluation_id).update(folio=last_folio)
+            WorkOrder.objects.filter(evaluation_id=evaluation_id).update(folio=last_folio)
+        FolioSequence.objects.create(owner_id=row['owner'], last_folio=last_folio)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('clients', '0002_list_indexes'),
+        ('evaluations', '0002_list_indexes'),
+        ('orders', '0004_list_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FolioSequence',
+            fields=[
+                ('owner', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='folio_sequence', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('last_folio', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ReleasedFolio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('folio', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.RunPython(fill_sequences, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='evaluation',
+            name='evaluation_owner_folio_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='evaluation',
+            constraint=models.UniqueConstraint(fields=('owner', 'folio'), name='evaluation_owner_folio_uniq'),
+        ),
+        migrations.AddField(
+            model_name='releasedfolio',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='released_folios', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='releasedfolio',
+            constraint=models.UniqueConstraint(fields=('owner', 'folio'), name='released_folio_owner_folio_uniq'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0004_vehicle_owner_normalized_ids'),
+        ('evaluations', '0003_folio_sequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='evaluation',
+            index=models.Index(fields=['owner', 'status'], name='evaluation_owner_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evaluation',
+            index=models.Index(condition=models.Q(('status__in', ['draft', 'sent', 'approved'])), fields=['vehicle', '-created_at'], name='evaluation_vehicle_active_idx'),
+        ),
+    ]
@@ -1,11 +1,65 @@
 # evaluations/models.py
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Max
 from django.conf import settings
 from clients.models import Client, Vehicle
 from external.models import ExternalService
 # 👇 CAMBIO: Importamos Product en lugar de InventoryItem
 from inventory.models import Product 
 
+class FolioSequence(models.Model):
+    """
+    Último folio entregado por dueño. Se bloquea la fila (SELECT ... FOR UPDATE)
+    para asignar el siguiente, así el costo no depende del historial del taller y
+    dos creaciones simultáneas no pueden obtener el mismo número.
+    """
+    owner = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="folio_sequence"
+    )
+    last_folio = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Folios {self.owner_id}: {self.last_folio}"
+
+    @classmethod
+    def allocate(cls, owner_id):
+        """
+        Entrega el siguiente folio del dueño. Debe llamarse dentro de la transacción
+        que inserta la evaluación: el bloqueo dura hasta el commit.
+        Con EVALUATION_FOLIO_REUSE_GAPS activo primero se reutiliza el menor folio liberado.
+        """
+        with transaction.atomic():
+            sequence, _ = cls.objects.select_for_update().get_or_create(
+                owner_id=owner_id,
+                # Dueños sin fila todavía (ej. creados antes de la migración): partimos del máximo actual
+                defaults={'last_folio': lambda: Evaluation.objects.filter(owner_id=owner_id).aggregate(
+                    top=Max('folio'))['top'] or 0},
+            )
+            if getattr(settings, 'EVALUATION_FOLIO_REUSE_GAPS', False):
+                released = ReleasedFolio.objects.filter(owner_id=owner_id).order_by('folio').first()
+                if released is not None:
+                    released.delete()
+                    return released.folio
+
+            sequence.last_folio += 1
+            sequence.save(update_fields=['last_folio'])
+            return sequence.last_folio
+
+
+class ReleasedFolio(models.Model):
+    """Folios de evaluaciones borradas, disponibles para reutilizar (sólo con EVALUATION_FOLIO_REUSE_GAPS)."""
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="released_folios")
+    folio = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'folio'], name='released_folio_owner_folio_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Folio libre #{self.folio} ({self.owner_id})"
+
+
 class Evaluation(models.Model):
     STATUS_CHOICES = [
         ('draft', 'Borrador'),
@@ -13,6 +67,8 @@ class Evaluation(models.Model):
         ('approved', 'Aprobado (Parcial o Total)'),
         ('rejected', 'Rechazado'),
     ]
+    # Evaluación "en curso": un vehículo sólo puede tener una a la vez
+    ACTIVE_STATUSES = ['draft', 'sent', 'approved']
 
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     created_by = models.ForeignKey(
@@ -32,17 +88,28 @@ class Evaluation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            # Un folio por taller; el índice también sirve al listado (ORDER BY folio DESC)
+            models.UniqueConstraint(fields=['owner', 'folio'], name='evaluation_owner_folio_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['owner', 'status'], name='evaluation_owner_status_idx'),
+            # Evaluación en curso de un vehículo (parcial: sólo borrador/enviada/aprobada)
+            models.Index(
+                fields=['vehicle', '-created_at'],
+                condition=models.Q(status__in=['draft', 'sent', 'approved']),
+                name='evaluation_vehicle_active_idx',
+            ),
+        ]
+
     def save(self, *args, **kwargs):
-        if not self.folio:
-            existing_folios = Evaluation.objects.filter(owner=self.owner).values_list('folio', flat=True).order_by('folio')
-            next_folio = 1
-            for folio in existing_folios:
-                if folio == next_folio:
-                    next_folio += 1
-                else:
-                    break
-            self.folio = next_folio
-        super().save(*args, **kwargs)
+        if self.folio:
+            return super().save(*args, **kwargs)
+        # Folio e inserción en la misma transacción: si el INSERT falla no se pierde el número
+        with transaction.atomic():
+            self.folio = FolioSequence.allocate(self.owner_id)
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Eval #{self.folio} - {self.vehicle}"
@@ -2,8 +2,9 @@
 from rest_framework import serializers
 from .models import Evaluation, EvaluationItem
 from clients.serializers import ClientSerializer, VehicleSerializer
+from backend.serializers import DynamicFieldsMixin, expands, nested_selection
 
-class EvaluationItemSerializer(serializers.ModelSerializer):
+class EvaluationItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = EvaluationItem
         fields = [
@@ -11,7 +12,18 @@ class EvaluationItemSerializer(serializers.ModelSerializer):
             'external_service_source', 'inventory_item', 'quantity'
         ]
 
-class EvaluationSerializer(serializers.ModelSerializer):
+class EvaluationItemInputSerializer(serializers.Serializer):
+    """Un ítem tal como lo envía el editor de presupuestos a update_items (sin `id` = ítem nuevo)."""
+    id = serializers.IntegerField(required=False, allow_null=True)
+    description = serializers.CharField(max_length=255)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, default=0)
+    is_approved = serializers.BooleanField(required=False, default=True)
+    externalId = serializers.IntegerField(required=False, allow_null=True, default=None)
+    inventoryId = serializers.IntegerField(required=False, allow_null=True, default=None)
+    qty = serializers.IntegerField(min_value=0, required=False, default=1)
+
+
+class EvaluationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     client_data = ClientSerializer(source='client', read_only=True)
     vehicle_data = VehicleSerializer(source='vehicle', read_only=True)
     items = EvaluationItemSerializer(many=True, read_only=True)
@@ -26,6 +38,26 @@ class EvaluationSerializer(serializers.ModelSerializer):
             'items', 'created_by_name'
         ]
         read_only_fields = ['owner', 'created_at', 'created_by', 'folio']
+        expandable_fields = ['client_data', 'vehicle_data', 'items']
+
+    @staticmethod
+    def setup_eager_loading(queryset, prefix='', selection=None):
+        """
+        Plan de carga para este serializer: cliente, vehículo y creador en el mismo
+        JOIN; vehículos del cliente e ítems en una query cada uno. Los anidados que
+        la `selection` deja fuera no se consultan.
+        """
+        queryset = queryset.select_related(f'{prefix}created_by')
+        if expands(selection, 'client_data'):
+            queryset = queryset.select_related(f'{prefix}client')
+            queryset = ClientSerializer.setup_eager_loading(
+                queryset, prefix=f'{prefix}client__', selection=nested_selection(selection, 'client_data')
+            )
+        if expands(selection, 'vehicle_data'):
+            queryset = queryset.select_related(f'{prefix}vehicle')
+        if expands(selection, 'items'):
+            queryset = queryset.prefetch_related(f'{prefix}items')
+        return queryset
 
     def get_created_by_name(self, obj):
         if obj.created_by:
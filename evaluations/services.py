@@ -0,0 +1,99 @@
+# evaluations/services.py
+from django.db import transaction
+
+from accounts.versions import touch
+from external.models import ExternalService
+from inventory.models import Product
+from .models import Evaluation, EvaluationItem
+
+# Campos que el editor de presupuestos puede cambiar en un ítem
+ITEM_FIELDS = ('description', 'price', 'is_approved', 'external_service_source', 'inventory_item', 'quantity')
+
+
+class ItemSyncResult:
+    def __init__(self, items, created=0, updated=0, deleted=0):
+        self.items = items
+        self.created = created
+        self.updated = updated
+        self.deleted = deleted
+
+
+def _item_values(data):
+    return {
+        'description': data['description'],
+        'price': data['price'],
+        'is_approved': data['is_approved'],
+        'external_service_source_id': data['externalId'],
+        'inventory_item_id': data['inventoryId'],
+        'quantity': data['qty'],
+    }
+
+
+def validate_item_references(items_data, owner):
+    """
+    Revisa de una vez los productos y servicios referidos por los ítems:
+    los productos deben ser del taller `owner`; los servicios, existir en el catálogo.
+    Retorna {índice del ítem: {campo: [error]}}.
+    """
+    product_ids = {data['inventoryId'] for data in items_data if data['inventoryId'] is not None}
+    service_ids = {data['externalId'] for data in items_data if data['externalId'] is not None}
+    own_products = set(
+        Product.objects.filter(owner=owner, pk__in=product_ids).values_list('pk', flat=True)
+    ) if product_ids else set()
+    services = set(
+        ExternalService.objects.filter(pk__in=service_ids).values_list('pk', flat=True)
+    ) if service_ids else set()
+
+    errors = {}
+    for index, data in enumerate(items_data):
+        if data['inventoryId'] is not None and data['inventoryId'] not in own_products:
+            errors.setdefault(index, {})['inventoryId'] = ["Producto no válido o no te pertenece."]
+        if data['externalId'] is not None and data['externalId'] not in services:
+            errors.setdefault(index, {})['externalId'] = ["Servicio externo no encontrado."]
+    return errors
+
+
+def sync_items(evaluation, items_data):
+    """
+    Deja los ítems de `evaluation` iguales a `items_data` (validados con
+    EvaluationItemInputSerializer) tocando sólo lo que cambió: bulk_update de los
+    ítems con `id` que traen cambios, bulk_create de los nuevos y un DELETE de los
+    que ya no vienen. Los ítems conservan su id, así no se rompen las FK que los apuntan.
+
+    Lanza KeyError con el id si un ítem no pertenece a la evaluación.
+    """
+    with transaction.atomic():
+        # Serializa dos guardados simultáneos del mismo presupuesto
+        Evaluation.objects.select_for_update().filter(pk=evaluation.pk).first()
+        current = {item.pk: item for item in EvaluationItem.objects.filter(evaluation=evaluation)}
+
+        to_create, to_update, kept, items = [], [], set(), []
+        for data in items_data:
+            values = _item_values(data)
+            item_id = data.get('id')
+            if item_id is None:
+                item = EvaluationItem(evaluation=evaluation, **values)
+                to_create.append(item)
+                items.append(item)
+                continue
+            item = current.get(item_id)
+            if item is None or item_id in kept:
+                raise KeyError(item_id)
+            kept.add(item_id)
+            items.append(item)
+            if any(getattr(item, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(item, field, value)
+                to_update.append(item)
+
+        removed = current.keys() - kept
+        if removed:
+            EvaluationItem.objects.filter(evaluation=evaluation, pk__in=removed).delete()
+        if to_update:
+            EvaluationItem.objects.bulk_update(to_update, ITEM_FIELDS)
+        if to_create:
+            EvaluationItem.objects.bulk_create(to_create)
+        if removed or to_update or to_create:
+            touch(evaluation.owner_id, 'evaluations')
+
+    return ItemSyncResult(items, created=len(to_create), updated=len(to_update), deleted=len(removed))
@@ -0,0 +1,15 @@
+# evaluations/signals.py
+from django.conf import settings
+from django.db.models.signals import post_delete
+
+from .models import Evaluation, ReleasedFolio
+
+
+def release_folio(sender, instance, **kwargs):
+    # Sólo si la política de reutilización está activa; si no, los huecos quedan como están
+    if not getattr(settings, 'EVALUATION_FOLIO_REUSE_GAPS', False) or not instance.folio:
+        return
+    ReleasedFolio.objects.get_or_create(owner_id=instance.owner_id, folio=instance.folio)
+
+
+post_delete.connect(release_folio, sender=Evaluation, dispatch_uid="evaluation_release_folio")
@@ -1,3 +1,174 @@
-from django.test import TestCase
+import io
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from clients.models import Client, Vehicle
+from external.models import ExternalService
+from inventory.models import Product
+from .models import Evaluation, EvaluationItem, FolioSequence
+
+
+class EvaluationListQueryTests(TestCase):
+    """El listado de evaluaciones debe costar un número fijo de queries, sin importar cuántas filas haya."""
+
+    # auth (perfil) + versión para el ETag + página (JOIN cliente/vehículo/creador) + vehículos del cliente + ítems
+    EXPECTED_QUERIES = 5
+
+    def setUp(self):
+        self.owner = User.objects.create_user('dueno')
+        self.api = APIClient()
+
+    def create_evaluations(self, count):
+        for i in range(count):
+            client = Client.objects.create(owner=self.owner, first_name=f'Cliente {i}', last_name='Test')
+            vehicle = Vehicle.objects.create(client=client, brand='Toyota', model='Yaris', year=2018, plate=f'AB{i:04d}')
+            evaluation = Evaluation.objects.create(owner=self.owner, created_by=self.owner, client=client, vehicle=vehicle)
+            EvaluationItem.objects.create(evaluation=evaluation, description='Frenos', price=20000)
+
+    def count_list_queries(self):
+        self.api.force_authenticate(User.objects.get(pk=self.owner.pk))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.api.get('/api/evaluations/')
+        self.assertEqual(response.status_code, 200)
+        return len(ctx), response.json()['results']
+
+    def test_list_query_count_is_constant(self):
+        self.create_evaluations(2)
+        few, _ = self.count_list_queries()
+        self.create_evaluations(6)
+        many, results = self.count_list_queries()
+
+        self.assertEqual(len(results), 8)
+        self.assertEqual(few, many)
+        self.assertEqual(many, self.EXPECTED_QUERIES)
+        self.assertEqual(len(results[0]['items']), 1)
+        self.assertEqual(len(results[0]['client_data']['vehicles']), 1)
+
+
+class FolioAllocationTests(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user('dueno')
+        self.client_obj = Client.objects.create(owner=self.owner, first_name='Ana', last_name='Test')
+        self.vehicle = Vehicle.objects.create(client=self.client_obj, brand='Kia', model='Rio', year=2020, plate='AA1111')
+
+    def create(self):
+        return Evaluation.objects.create(owner=self.owner, client=self.client_obj, vehicle=self.vehicle)
+
+    def test_folios_follow_the_sequence_without_reusing_gaps(self):
+        first, second, third = self.create(), self.create(), self.create()
+        second.delete()
+
+        self.assertEqual([first.folio, third.folio], [1, 3])
+        self.assertEqual(self.create().folio, 4)
+        self.assertEqual(FolioSequence.objects.get(owner=self.owner).last_folio, 4)
+
+    @override_settings(EVALUATION_FOLIO_REUSE_GAPS=True)
+    def test_gap_reuse_is_opt_in(self):
+        self.create(), self.create(), self.create()
+        Evaluation.objects.get(owner=self.owner, folio=2).delete()
+
+        self.assertEqual(self.create().folio, 2)
+        self.assertEqual(self.create().folio, 4)
+
+    def test_folio_is_unique_per_owner(self):
+        self.create()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Evaluation.objects.create(owner=self.owner, client=self.client_obj, vehicle=self.vehicle, folio=1)
+
+
+class EvaluationExportTests(TestCase):
+
+    def test_xlsx_export(self):
+        from openpyxl import load_workbook
+
+        owner = User.objects.create_user('dueno')
+        client = Client.objects.create(owner=owner, first_name='Ana', last_name='Soto')
+        vehicle = Vehicle.objects.create(client=client, brand='Kia', model='Rio', year=2020, plate='AB1234')
+        evaluation = Evaluation.objects.create(owner=owner, client=client, vehicle=vehicle)
+        EvaluationItem.objects.create(evaluation=evaluation, description='Frenos', price=20000, quantity=2)
+        EvaluationItem.objects.create(evaluation=evaluation, description='Pintura', price=5000, is_approved=False)
+
+        api = APIClient()
+        api.force_authenticate(owner)
+        response = api.get('/api/evaluations/export/', {'file_format': 'xlsx'})
+        self.assertEqual(response.status_code, 200)
+
+        sheet = load_workbook(io.BytesIO(b''.join(response.streaming_content)), read_only=True).active
+        header, row = [list(values) for values in sheet.iter_rows(values_only=True)]
+        values = dict(zip(header, row))
+        self.assertEqual(values['Folio'], evaluation.folio)
+        self.assertEqual(values['Cliente'], 'Ana Soto')
+        self.assertEqual((values['Total presupuestado'], values['Total aprobado']), (45000, 40000))
+
+
+class EvaluationItemSyncTests(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user('dueno')
+        client = Client.objects.create(owner=self.owner, first_name='Ana', last_name='Soto')
+        vehicle = Vehicle.objects.create(client=client, brand='Kia', model='Rio', year=2020, plate='AB1234')
+        self.evaluation = Evaluation.objects.create(owner=self.owner, client=client, vehicle=vehicle)
+        self.brakes = EvaluationItem.objects.create(evaluation=self.evaluation, description='Frenos', price=20000)
+        self.paint = EvaluationItem.objects.create(evaluation=self.evaluation, description='Pintura', price=90000)
+        self.oil = EvaluationItem.objects.create(evaluation=self.evaluation, description='Aceite', price=10000)
+        self.product = Product.objects.create(owner=self.owner, name='Pastillas', sku='PF-1')
+        self.api = APIClient()
+        self.api.force_authenticate(self.owner)
+
+    def save_items(self, items, evaluation=None):
+        evaluation = evaluation or self.evaluation
+        return self.api.post(f'/api/evaluations/{evaluation.pk}/update_items/', {'items': items}, format='json')
+
+    def test_diff_keeps_ids_and_touches_only_changes(self):
+        response = self.save_items([
+            {'id': self.brakes.pk, 'description': 'Frenos', 'price': '20000.00'},          # sin cambios
+            {'id': self.paint.pk, 'description': 'Pintura', 'price': 85000, 'is_approved': False},
+            {'description': 'Pastillas', 'price': 15000, 'inventoryId': self.product.pk, 'qty': 2},
+        ])
+        data = response.json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((data['created'], data['updated'], data['deleted']), (1, 1, 1))
+        self.assertEqual([item['id'] for item in data['items']][:2], [self.brakes.pk, self.paint.pk])
+
+        items = {item.description: item for item in self.evaluation.items.all()}
+        self.assertEqual(set(items), {'Frenos', 'Pintura', 'Pastillas'})
+        self.assertEqual(items['Pintura'].pk, self.paint.pk)
+        self.assertEqual((items['Pintura'].price, items['Pintura'].is_approved), (85000, False))
+        self.assertEqual((items['Pastillas'].inventory_item_id, items['Pastillas'].quantity), (self.product.pk, 2))
+        self.assertFalse(EvaluationItem.objects.filter(pk=self.oil.pk).exists())
+
+    def test_rejects_foreign_references(self):
+        foreign_product = Product.objects.create(owner=User.objects.create_user('otro'), name='Ajeno', sku='X')
+        service = ExternalService.objects.create(owner=self.owner, name='Torno', provider_name='Sur', cost=1)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.save_items([
+                {'description': 'Torno', 'externalId': service.pk},
+                {'description': 'Ajeno', 'inventoryId': foreign_product.pk},
+                {'description': 'Fantasma', 'externalId': 999999},
+            ])
+
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()['items']
+        self.assertEqual(errors[0], {})
+        self.assertIn('inventoryId', errors[1])
+        self.assertIn('externalId', errors[2])
+        self.assertEqual(self.evaluation.items.count(), 3)
+        # Los productos se validan en una sola query para todos los ítems
+        self.assertEqual(len([q for q in ctx.captured_queries if 'inventory_product' in q['sql']]), 1)
+
+    def test_rejects_item_from_another_evaluation(self):
+        other = Evaluation.objects.create(owner=self.owner, client=self.evaluation.client, vehicle=self.evaluation.vehicle)
+        intruder = EvaluationItem.objects.create(evaluation=other, description='Otro', price=1)
+
+        response = self.save_items([{'id': intruder.pk, 'description': 'Robado'}])
+        self.assertEqual(response.status_code, 400)
+        intruder.refresh_from_db()
+        self.assertEqual((intruder.evaluation_id, intruder.description), (other.pk, 'Otro'))
+        self.assertEqual(self.evaluation.items.count(), 3)
@@ -5,63 +5,79 @@ from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
 from django.db import transaction 
 
-from .models import Evaluation, EvaluationItem
-from .serializers import EvaluationSerializer, EvaluationItemSerializer
+from .models import Evaluation
+from .serializers import EvaluationSerializer, EvaluationItemSerializer, EvaluationItemInputSerializer
+from .services import sync_items, validate_item_references
 from orders.models import WorkOrder
 from external.models import ServiceRequest
 from accounts.models import Notification
-from accounts.utils import get_data_owner
-# Importamos Product para la validación de stock
-from inventory.models import Product
+from backend.conditional import ConditionalGetMixin
+from backend.exports import export_format, export_period, export_response
+from backend.serializers import FieldSelection
+from .exports import EVALUATION_EXPORT_COLUMNS, annotate_for_export
+from inventory.services import consume_stock
 
-class EvaluationViewSet(viewsets.ModelViewSet):
+class EvaluationViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = EvaluationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    etag_resources = ('evaluations', 'clients')
+    ordering = '-folio'
 
     def get_queryset(self):
-        target_user = get_data_owner(self.request.user)
-        return Evaluation.objects.filter(owner=target_user).order_by('-folio')
+        target_user = self.request.tenant.data_owner
+        queryset = Evaluation.objects.filter(owner=target_user).order_by('-folio')
+        return EvaluationSerializer.setup_eager_loading(queryset, selection=FieldSelection.from_request(self.request))
 
     def perform_create(self, serializer):
-        target_user = get_data_owner(self.request.user)
+        target_user = self.request.tenant.data_owner
         vehicle = serializer.validated_data.get('vehicle')
         if vehicle:
-            active_statuses = ['draft', 'sent', 'approved']
             exists = Evaluation.objects.filter(
                 vehicle=vehicle, 
-                status__in=active_statuses
+                status__in=Evaluation.ACTIVE_STATUSES
             ).exists()
             if exists:
                 raise ValidationError({"vehicle": "Este vehículo ya tiene una evaluación en curso."})
         
         serializer.save(owner=target_user, created_by=self.request.user)
 
+    # Export para contabilidad: GET /api/evaluations/export/?file_format=csv|xlsx&from=&to=&status=
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        params = request.query_params
+        file_format = export_format(params)
+        queryset = self.get_queryset().prefetch_related(None).filter(**export_period(params))
+        if params.get('status'):
+            queryset = queryset.filter(status=params['status'])
+        return export_response(annotate_for_export(queryset), EVALUATION_EXPORT_COLUMNS, 'evaluaciones', file_format)
+
     @action(detail=True, methods=['post'])
     def update_items(self, request, pk=None):
+        """
+        Guarda los ítems del editor de presupuestos. Los ítems con `id` se actualizan,
+        los sin `id` se crean y los que no vienen se borran (ver services.sync_items).
+        """
         evaluation = self.get_object()
-        items_data = request.data.get('items', [])
-        
-        # Borramos los ítems anteriores para reescribirlos
-        EvaluationItem.objects.filter(evaluation=evaluation).delete()
-        
-        new_items = []
-        for item in items_data:
-            external_id = item.get('externalId') 
-            inventory_id = item.get('inventoryId')
-            qty = item.get('qty', 1)
-            
-            new_items.append(EvaluationItem(
-                evaluation=evaluation,
-                description=item.get('description'),
-                price=item.get('price', 0),
-                is_approved=item.get('is_approved', True),
-                external_service_source_id=external_id,
-                inventory_item_id=inventory_id,
-                quantity=qty
-            ))
-        
-        EvaluationItem.objects.bulk_create(new_items)
-        return Response({'status': 'items updated'})
+        serializer = EvaluationItemInputSerializer(data=request.data.get('items', []), many=True)
+        serializer.is_valid(raise_exception=True)
+        items_data = serializer.validated_data
+
+        reference_errors = validate_item_references(items_data, request.tenant.data_owner)
+        if reference_errors:
+            raise ValidationError({"items": [reference_errors.get(i, {}) for i in range(len(items_data))]})
+
+        try:
+            result = sync_items(evaluation, items_data)
+        except KeyError as exc:
+            raise ValidationError({"items": f"El ítem {exc.args[0]} no pertenece a esta evaluación."})
+
+        return Response({
+            'status': 'items updated',
+            'created': result.created,
+            'updated': result.updated,
+            'deleted': result.deleted,
+            'items': EvaluationItemSerializer(result.items, many=True).data,
+        })
 
     @action(detail=True, methods=['post'])
     def generate_order(self, request, pk=None):
@@ -70,8 +86,10 @@ class EvaluationViewSet(viewsets.ModelViewSet):
         if hasattr(evaluation, 'work_order'):
             return Response({"error": "Ya existe una Orden de Trabajo para esta evaluación."}, status=status.HTTP_400_BAD_REQUEST)
 
-        approved_items = evaluation.items.filter(is_approved=True)
-        if not approved_items.exists():
+        approved_items = list(
+            evaluation.items.filter(is_approved=True).select_related('external_service_source')
+        )
+        if not approved_items:
             return Response({"error": "La evaluación no tiene ítems aprobados."}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
@@ -106,36 +124,18 @@ class EvaluationViewSet(viewsets.ModelViewSet):
                             link="/requests"
                         )
 
-                    # B) Descuento de Inventario (Lógica FIFO por Lotes)
-                    if item.inventory_item:
-                        product_ref = item.inventory_item # Esto es un Product
-                        qty_needed = item.quantity
-                        
-                        # Buscamos lotes con stock > 0, ordenados por vencimiento (el más viejo primero)
-                        batches = product_ref.batches.filter(current_quantity__gt=0).order_by('expiration_date', 'entry_date')
-                        
-                        for batch in batches:
-                            if qty_needed <= 0:
-                                break
-                            
-                            if batch.current_quantity >= qty_needed:
-                                # El lote alcanza para cubrir todo lo que falta
-                                batch.current_quantity -= qty_needed
-                                batch.save()
-                                qty_needed = 0
-                            else:
-                                # El lote se agota, tomamos todo lo que tiene y seguimos buscando
-                                qty_needed -= batch.current_quantity
-                                batch.current_quantity = 0
-                                batch.save()
-                        
-                        if qty_needed > 0:
-                            print(f"ALERTA: Stock insuficiente para {product_ref.name}. Faltaron {qty_needed} unidades.")
+                # 4. Descuento de Inventario (FIFO por lotes, con bloqueo de filas)
+                consumption = consume_stock(
+                    [(item.inventory_item_id, item.quantity) for item in approved_items if item.inventory_item_id],
+                    owner=evaluation.owner,
+                    work_order=work_order
+                )
 
             return Response({
                 "message": "Orden creada exitosamente.", 
                 "order_id": work_order.id,
-                "order_folio": work_order.folio
+                "order_folio": work_order.folio,
+                "stock_shortfalls": consumption.shortfalls
             }, status=status.HTTP_201_CREATED)
 
         except Exception as e:
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('external', '0002_list_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='externalservice',
+            index=models.Index(fields=['-created_at'], name='service_created_idx'),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:07
+
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def normalize(*parts):
+    # Copia de clients.search.normalize_search_text (las migraciones no importan código de la app)
+    text = unicodedata.normalize('NFKD', ' '.join(part for part in parts if part))
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return re.sub(r'\s+', ' ', text.lower()).strip()
+
+
+def fill_search_document(apps, schema_editor):
+    ExternalService = apps.get_model('external', 'ExternalService')
+    batch = []
+    for service in ExternalService.objects.only('name', 'provider_name', 'description').iterator(chunk_size=2000):
+        service.search_document = normalize(service.name, service.provider_name, service.description)
+        batch.append(service)
+        if len(batch) >= 2000:
+            ExternalService.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    if batch:
+        ExternalService.objects.bulk_update(batch, ['search_document'])
+
+
+def create_search_indexes(apps, schema_editor):
+    # Sólo PostgreSQL: en SQLite la búsqueda usa el fallback sin índice
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS service_search_fts_idx ON external_externalservice "
+        "USING gin (to_tsvector('simple', search_document))"
+    )
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS service_search_trgm_idx ON external_externalservice "
+        "USING gin (search_document gin_trgm_ops)"
+    )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS service_search_fts_idx")
+    schema_editor.execute("DROP INDEX IF EXISTS service_search_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('external', '0004_incremental_sync_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='externalservice',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='externalservice',
+            index=models.Index(fields=['category', '-created_at'], name='service_category_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='externalservice',
+            index=models.Index(fields=['category', 'cost'], name='service_category_cost_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='externalservice',
+            index=models.Index(fields=['updated_at'], name='service_updated_idx'),
+        ),
+        migrations.RunPython(fill_search_document, migrations.RunPython.noop),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
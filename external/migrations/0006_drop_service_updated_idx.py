@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:23
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('external', '0005_service_search'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='externalservice',
+            name='service_updated_idx',
+        ),
+    ]
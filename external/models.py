@@ -1,6 +1,8 @@
 from django.db import models
 from django.conf import settings
 
+from clients.search import normalize_search_text
+
 class ExternalService(models.Model):
     CATEGORY_CHOICES = [
         ('mechanic', 'Mecánica Especializada'),
@@ -25,6 +27,26 @@ class ExternalService(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Nombre, proveedor y descripción normalizados para la búsqueda (ver external/search.py).
+    # En PostgreSQL tiene índices GIN de texto completo y trigramas.
+    search_document = models.TextField(blank=True, default='', editable=False)
+
+    class Meta:
+        indexes = [
+            # Catálogo ordenado por fecha
+            models.Index(fields=['-created_at'], name='service_created_idx'),
+            # Catálogo filtrado por categoría (y por rango de costo dentro de ella)
+            models.Index(fields=['category', '-created_at'], name='service_category_created_idx'),
+            models.Index(fields=['category', 'cost'], name='service_category_cost_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.search_document = normalize_search_text(self.name, self.provider_name, self.description)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'search_document'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.name} - {self.provider_name}"
     
@@ -54,6 +76,13 @@ class ServiceRequest(models.Model):
     # Opcional: Vincular a la OT de Iván para referencia
     related_order_id = models.IntegerField(null=True, blank=True, help_text="ID de la WorkOrder de origen")
 
+    class Meta:
+        indexes = [
+            # Bandeja de enviadas / recibidas, paginadas por cursor
+            models.Index(fields=['requester', '-created_at'], name='request_requester_created_idx'),
+            models.Index(fields=['provider', '-created_at'], name='request_provider_created_idx'),
+        ]
+
     def __str__(self):
         return f"Request {self.id} from {self.requester} to {self.provider}"
     
@@ -65,6 +94,11 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['service_request', 'created_at'], name='message_request_created_idx'),
+            # Polling incremental: WHERE service_request = ? AND id > ? ORDER BY id
+            models.Index(fields=['service_request', 'id'], name='message_request_id_idx'),
+        ]
 
     def __str__(self):
         return f"Msg from {self.sender} on Req #{self.service_request.id}"
\ No newline at end of file
@@ -0,0 +1,100 @@
+# external/search.py
+"""
+Filtros, búsqueda y facetas del catálogo de servicios externos (marketplace).
+
+    ?category=paint,electric   una o varias categorías
+    ?min_cost=10000&max_cost=80000
+    ?search=rectificado culata  palabras sobre nombre, proveedor y descripción
+
+Cada servicio guarda en `search_document` su nombre, proveedor y descripción en
+minúsculas y sin tildes, igual que los clientes (ver clients/search.py): en
+PostgreSQL la búsqueda usa los índices GIN de texto completo y de trigramas de
+la migración 0005_service_search; en otros motores cada palabra debe aparecer.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connections
+from django.db.models import Count, F, Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from accounts.versions import get_versions
+from clients.search import SearchDocumentVector, normalize_search_text
+from .models import ExternalService
+
+# Resultados máximos de una búsqueda por texto (una sola página, por relevancia)
+CATALOG_SEARCH_LIMIT = 50
+
+
+def _categories(value):
+    categories = [category.strip() for category in value.split(',') if category.strip()]
+    valid = dict(ExternalService.CATEGORY_CHOICES)
+    unknown = [category for category in categories if category not in valid]
+    if unknown:
+        raise ValidationError({"category": f"Categoría no válida: {', '.join(unknown)}."})
+    return categories
+
+
+def _cost(params, param):
+    try:
+        return Decimal(params[param])
+    except InvalidOperation:
+        raise ValidationError({param: "Debe ser un número."})
+
+
+def search_term(params):
+    return normalize_search_text(params.get('search', ''))
+
+
+def filter_services(queryset, params, exclude=()):
+    """Aplica los filtros del catálogo de `params`, salvo los nombrados en `exclude` (para las facetas)."""
+    if params.get('category') and 'category' not in exclude:
+        queryset = queryset.filter(category__in=_categories(params['category']))
+    if params.get('min_cost'):
+        queryset = queryset.filter(cost__gte=_cost(params, 'min_cost'))
+    if params.get('max_cost'):
+        queryset = queryset.filter(cost__lte=_cost(params, 'max_cost'))
+
+    term = search_term(params)
+    if not term:
+        return queryset
+    if connections[queryset.db].vendor == 'postgresql':
+        # alias (no annotate): la expresión queda fuera del SELECT y del GROUP BY de las facetas
+        query = SearchQuery(term, config='simple', search_type='plain')
+        return queryset.alias(document=SearchDocumentVector('search_document')).filter(
+            Q(document=query) | Q(search_document__trigram_word_similar=term)
+        )
+    for word in term.split():
+        queryset = queryset.filter(search_document__contains=word)
+    return queryset
+
+
+def rank_services(queryset, term):
+    """Ordena por relevancia (sólo PostgreSQL; en otros motores, más recientes primero)."""
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.order_by('-created_at')
+    query = SearchQuery(term, config='simple', search_type='plain')
+    return (
+        queryset.annotate(rank=SearchRank(F('document'), query) + TrigramWordSimilarity(term, 'search_document'))
+        .order_by('-rank', '-created_at')
+    )
+
+
+def category_facets(queryset):
+    """[{value, label, count}] para cada categoría, con una sola query agrupada."""
+    counts = dict(queryset.order_by().values_list('category').annotate(count=Count('id')))
+    return [
+        {"value": value, "label": label, "count": counts.get(value, 0)}
+        for value, label in ExternalService.CATEGORY_CHOICES
+    ]
+
+
+def catalog_version():
+    """Cambia con cualquier alta, edición o baja de un servicio (fila global 'catalog' de accounts.versions)."""
+    return f"catalog={get_versions(None, ['catalog'])['catalog']}"
+
+
+class ServiceCatalogFilter(BaseFilterBackend):
+    def filter_queryset(self, request, queryset, view):
+        return filter_services(queryset, request.query_params)
@@ -1,15 +1,16 @@
 # external/serializers.py
 from rest_framework import serializers
 from .models import ExternalService, ServiceRequest
+from backend.serializers import DynamicFieldsMixin
 
-class ExternalServiceSerializer(serializers.ModelSerializer):
+class ExternalServiceSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = ExternalService
-        fields = '__all__'
+        exclude = ('search_document',)
         read_only_fields = ('owner', 'created_at', 'updated_at')
 
 # 👇 Serializer para las solicitudes B2B
-class ServiceRequestSerializer(serializers.ModelSerializer):
+class ServiceRequestSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     # Campos de lectura para mostrar nombres (útil para el frontend)
     service_name = serializers.CharField(source='service.name', read_only=True)
     requester_name = serializers.CharField(source='requester.username', read_only=True)
@@ -26,13 +27,21 @@ class ServiceRequestSerializer(serializers.ModelSerializer):
             'created_at', 
             'related_order_id'
         ]
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('service', 'requester', 'provider')
         
 from .models import Message # 👈 Importa Message
 
-class MessageSerializer(serializers.ModelSerializer):
+class MessageSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     sender_username = serializers.CharField(source='sender.username', read_only=True)
     
     class Meta:
         model = Message
         fields = ['id', 'service_request', 'sender', 'sender_username', 'content', 'created_at']
-        read_only_fields = ['sender', 'created_at']
\ No newline at end of file
+        read_only_fields = ['sender', 'created_at']
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('sender')
\ No newline at end of file
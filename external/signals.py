@@ -0,0 +1,23 @@
+# external/signals.py
+"""Publica cada mensaje nuevo del chat B2B en el canal de su solicitud (ver backend/pubsub.py)."""
+from django.db import transaction
+from django.db.models.signals import post_save
+
+from backend.pubsub import get_broker
+from .models import Message
+from .serializers import MessageSerializer
+
+
+def chat_channel(service_request_id):
+    return f"service_request:{service_request_id}"
+
+
+def message_created(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    channel = chat_channel(instance.service_request_id)
+    payload = {'event': 'message', 'id': instance.pk, 'data': MessageSerializer(instance).data}
+    transaction.on_commit(lambda: get_broker().publish(channel, payload))
+
+
+post_save.connect(message_created, sender=Message, dispatch_uid="chat_message_publish")
@@ -1,3 +1,272 @@
-from django.test import TestCase
+import asyncio
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import AsyncClient, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from accounts.tokens import StreamTicket
+from backend.conditional import response_cache
+from backend.pubsub import get_broker
+from backend.sse import RESUME_RETRY_MS
+from .models import ExternalService, ServiceRequest, Message
+from .signals import chat_channel
+from .views import CHAT_RESUME_LIMIT
+
+
+class ServiceRequestQueryTests(TestCase):
+    """Solicitudes y mensajes resuelven nombres de usuario/servicio sin una query por fila."""
+
+    def setUp(self):
+        self.requester = User.objects.create_user('solicitante')
+        self.provider = User.objects.create_user('proveedor')
+        self.service = ExternalService.objects.create(
+            owner=self.provider, name='Rectificado', provider_name='Taller Sur', cost=50000,
+        )
+        self.api = APIClient()
+
+    def create_requests(self, count):
+        for _ in range(count):
+            service_request = ServiceRequest.objects.create(
+                requester=self.requester, provider=self.provider, service=self.service,
+            )
+            Message.objects.create(service_request=service_request, sender=self.requester, content='Hola')
+            Message.objects.create(service_request=service_request, sender=self.provider, content='Hola!')
+
+    def count_queries(self, url):
+        self.api.force_authenticate(User.objects.get(pk=self.requester.pk))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.api.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx)
+
+    def test_list_query_counts_are_constant(self):
+        self.create_requests(2)
+        few_requests = self.count_queries('/api/requests/')
+        few_messages = self.count_queries('/api/messages/')
+        self.create_requests(6)
+
+        # auth (perfil) + página
+        self.assertEqual(self.count_queries('/api/requests/'), few_requests)
+        self.assertEqual(self.count_queries('/api/messages/'), few_messages)
+        self.assertEqual(few_requests, 2)
+        self.assertEqual(few_messages, 2)
+
+
+class ChatStreamTests(TestCase):
+
+    def setUp(self):
+        self.requester = User.objects.create_user('solicitante')
+        self.provider = User.objects.create_user('proveedor')
+        service = ExternalService.objects.create(owner=self.provider, name='Rectificado', provider_name='Taller Sur', cost=50000)
+        self.service_request = ServiceRequest.objects.create(requester=self.requester, provider=self.provider, service=service)
+
+    def token(self, user):
+        return str(StreamTicket.for_user(User.objects.get(pk=user.pk)))
+
+    def send(self, sender, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Message.objects.create(service_request=self.service_request, sender=sender, content=content)
+
+    def stream(self, user, **params):
+        params = {'request_id': self.service_request.pk, 'token': self.token(user), **params}
+        return APIClient().get('/api/messages/stream/', params)
+
+    def test_new_messages_are_published_after_commit(self):
+        with mock.patch.object(get_broker(), 'publish') as publish:
+            message = self.send(self.requester, 'Hola')
+        channel, payload = publish.call_args.args
+        self.assertEqual(channel, chat_channel(self.service_request.pk))
+        self.assertEqual((payload['event'], payload['id'], payload['data']['content']), ('message', message.pk, 'Hola'))
+
+    def test_reconnect_resumes_after_last_event_id(self):
+        first = self.send(self.requester, 'Uno')
+        self.send(self.provider, 'Dos')
+        self.send(self.requester, 'Tres')
+
+        body = b''.join(self.stream(self.provider, last_id=first.pk).streaming_content).decode()
+        self.assertNotIn('"Uno"', body)
+        self.assertLess(body.index('"Dos"'), body.index('"Tres"'))
+
+        # Last-Event-ID: 0 es un id válido (todo el historial), no un header vacío
+        params = {'request_id': self.service_request.pk, 'token': self.token(self.provider), 'last_id': first.pk}
+        response = APIClient().get('/api/messages/stream/', params, HTTP_LAST_EVENT_ID='0')
+        self.assertIn('"Uno"', b''.join(response.streaming_content).decode())
+
+        # Sin id previo no se reenvía el historial (se pide por /api/messages/)
+        body = b''.join(self.stream(self.requester).streaming_content).decode()
+        self.assertNotIn('event: message', body)
+
+    def test_long_resume_is_sent_in_batches(self):
+        first = self.send(self.requester, 'Antes')
+        Message.objects.bulk_create(
+            Message(service_request=self.service_request, sender=self.requester, content=f'm{n}')
+            for n in range(CHAT_RESUME_LIMIT + 5)
+        )
+
+        def ids(body):
+            return [int(line[4:]) for line in body.splitlines() if line.startswith('id: ')]
+
+        body = b''.join(self.stream(self.provider, last_id=first.pk).streaming_content).decode()
+        sent = ids(body)
+        self.assertEqual(len(sent), CHAT_RESUME_LIMIT)
+        # Cierra con un retry corto para que EventSource reconecte desde el último id
+        self.assertTrue(body.endswith(f'retry: {RESUME_RETRY_MS}\n\n'))
+
+        body = b''.join(self.stream(self.provider, last_id=sent[-1]).streaming_content).decode()
+        self.assertEqual(len(ids(body)), 5)
+        self.assertNotIn(f'retry: {RESUME_RETRY_MS}', body)
+
+    async def test_live_stream_closes_after_partial_resume(self):
+        first = await sync_to_async(self.send)(self.requester, 'Antes')
+        await Message.objects.abulk_create(
+            Message(service_request=self.service_request, sender=self.requester, content=f'm{n}')
+            for n in range(CHAT_RESUME_LIMIT + 1)
+        )
+        response = await AsyncClient().get('/api/messages/stream/', {
+            'request_id': self.service_request.pk, 'last_id': first.pk,
+            'token': await sync_to_async(self.token)(self.provider),
+        })
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(sum(chunk.startswith(b'id: ') for chunk in chunks), CHAT_RESUME_LIMIT)
+        self.assertEqual(chunks[-1], f'retry: {RESUME_RETRY_MS}\n\n'.encode())
+
+    def test_polling_returns_only_newer_messages(self):
+        api = APIClient()
+        api.force_authenticate(self.provider)
+        first = self.send(self.requester, 'Uno')
+        url = '/api/messages/'
+        params = {'request_id': self.service_request.pk}
+
+        response = api.get(url, {**params, 'since_id': first.pk})
+        self.assertEqual((response.status_code, response.content), (204, b''))
+
+        second = self.send(self.provider, 'Dos')
+        response = api.get(url, {**params, 'since_id': first.pk})
+        self.assertEqual([message['id'] for message in response.json()], [second.pk])
+        self.assertEqual(api.get(url, {'since_id': 'x'}).status_code, 400)
+
+    def test_pages_are_chronological_unless_latest_is_requested(self):
+        api = APIClient()
+        api.force_authenticate(self.provider)
+        sent = [self.send(self.requester, f'm{n}').pk for n in range(5)]
+        params = {'request_id': self.service_request.pk, 'page_size': 2}
+
+        page = api.get('/api/messages/', params).json()
+        self.assertEqual([message['id'] for message in page['results']], sent[:2])
+        self.assertEqual([message['id'] for message in api.get(page['next']).json()['results']], sent[2:4])
+
+        # ?latest=1: primero los más nuevos; `next` trae los anteriores
+        page = api.get('/api/messages/', {**params, 'latest': 1}).json()
+        self.assertEqual([message['id'] for message in page['results']], sent[:-3:-1])
+        older = api.get(page['next']).json()
+        self.assertEqual([message['id'] for message in older['results']], sent[-3:-5:-1])
+
+    def test_only_participants_can_listen(self):
+        self.assertEqual(self.stream(User.objects.create_user('otro')).status_code, 404)
+        self.assertEqual(self.stream(self.requester, last_id='x').status_code, 400)
+
+    async def test_stream_pushes_messages_to_participants(self):
+        response = await AsyncClient().get('/api/messages/stream/', {
+            'request_id': self.service_request.pk, 'token': await sync_to_async(self.token)(self.provider),
+        })
+        events = response.streaming_content
+        self.assertTrue((await anext(events)).startswith(b'retry:'))
+
+        await sync_to_async(get_broker().publish, thread_sensitive=False)(
+            chat_channel(self.service_request.pk), {'event': 'message', 'id': 7, 'data': {'content': 'Hola'}},
+        )
+        chunk = await asyncio.wait_for(anext(events), timeout=5)
+        self.assertEqual(chunk, b'id: 7\nevent: message\ndata: {"content": "Hola"}\n\n')
+        await events.aclose()
+
+
+class ServiceCatalogTests(TestCase):
+
+    def setUp(self):
+        response_cache().clear()
+        self.me = User.objects.create_user('yo')
+        self.provider = User.objects.create_user('proveedor')
+        catalog = [
+            ('Rectificado de culata', 'Tornería Sur', 'lathe', 80000, 'Rectificado y cepillado'),
+            ('Torneado de ejes', 'Tornería Sur', 'lathe', 45000, ''),
+            ('Pintura completa', 'Pinturas Núñez', 'paint', 300000, 'Desabolladura incluida'),
+            ('Scanner y diagnóstico', 'ElectroAuto', 'electric', 20000, 'Diagnóstico eléctrico'),
+        ]
+        for name, provider_name, category, cost, description in catalog:
+            ExternalService.objects.create(
+                owner=self.provider, name=name, provider_name=provider_name,
+                category=category, cost=cost, description=description,
+            )
+        ExternalService.objects.create(owner=self.me, name='Mi rectificado', provider_name='Yo', category='lathe', cost=1000)
+        self.api = APIClient()
+        self.api.force_authenticate(self.me)
+
+    def catalog(self, **params):
+        response = self.api.get('/api/external/catalog/', {'exclude_self': 'true', **params})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def names(self, response):
+        return sorted(service['name'] for service in response.json()['results'])
+
+    def test_filters_and_facets(self):
+        response = self.catalog(category='lathe', max_cost=50000)
+        self.assertEqual(self.names(response), ['Torneado de ejes'])
+        self.assertNotIn('search_document', response.json()['results'][0])
+        # Las facetas no aplican el filtro de categoría, sí el de costo
+        facets = {facet['value']: facet['count'] for facet in response.json()['facets']['category']}
+        self.assertEqual(facets, {'mechanic': 0, 'lathe': 1, 'paint': 0, 'electric': 1, 'other': 0})
+
+        # Sin tildes ni mayúsculas, sobre nombre, proveedor y descripción
+        self.assertEqual(self.names(self.catalog(search='TORNERIA')), ['Rectificado de culata', 'Torneado de ejes'])
+        self.assertEqual(self.names(self.catalog(search='diagnostico electrico')), ['Scanner y diagnóstico'])
+        self.assertEqual(self.names(self.catalog(category='paint,electric', min_cost=25000)), ['Pintura completa'])
+
+        self.assertEqual(self.api.get('/api/external/catalog/', {'category': 'grua'}).status_code, 400)
+        self.assertEqual(self.api.get('/api/external/', {'category': 'paint'}).json()[0]['name'], 'Pintura completa')
+
+    @skipUnless(connection.vendor == 'postgresql', "Texto completo y trigramas sólo en PostgreSQL")
+    def test_postgres_search_tolerates_typos_and_ranks(self):
+        response = self.catalog(search='rectificdo')
+        self.assertEqual(response.json()['results'][0]['name'], 'Rectificado de culata')
+        # Con texto, una sola página por relevancia (sin cursor)
+        self.assertIsNone(response.json().get('next'))
+        self.assertEqual(self.names(self.catalog(search='diagnostico electrco')), ['Scanner y diagnóstico'])
+
+    def test_pages_and_single_grouped_facet_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.catalog(page_size=3)
+        self.assertEqual(len(response.json()['results']), 3)
+        self.assertEqual(len([q for q in ctx.captured_queries if 'GROUP BY' in q['sql']]), 1)
+
+        next_page = self.api.get(response.json()['next'])
+        self.assertEqual(len(next_page.json()['results']), 1)
+
+    def test_cached_pages_refresh_when_a_provider_edits_a_service(self):
+        self.assertEqual(self.catalog()['X-Cache'], 'MISS')
+        self.assertEqual(self.catalog()['X-Cache'], 'HIT')
+
+        service = ExternalService.objects.get(name='Torneado de ejes')
+        service.cost = 50000
+        service.save()
+        response = self.catalog()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        costs = {s['name']: s['cost'] for s in response.json()['results']}
+        self.assertEqual(costs['Torneado de ejes'], '50000.00')
+
+    def test_cached_hit_reads_one_version_row_and_deletes_refresh(self):
+        self.catalog()
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.catalog()['X-Cache'], 'HIT')
+        # Sólo la fila global 'catalog': ni agregados ni lectura de la tabla de servicios
+        self.assertEqual(len(ctx), 1)
+        self.assertNotIn('external_externalservice', ctx.captured_queries[0]['sql'])
+
+        ExternalService.objects.get(name='Pintura completa').delete()
+        response = self.catalog()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertNotIn('Pintura completa', self.names(response))
@@ -2,32 +2,54 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.renderers import JSONRenderer
 from rest_framework.exceptions import PermissionDenied, ValidationError
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
 
 from .models import ExternalService, ServiceRequest, Message 
 from .serializers import ExternalServiceSerializer, ServiceRequestSerializer, MessageSerializer 
-from accounts.utils import get_data_owner
+from .search import (
+    CATALOG_SEARCH_LIMIT, ServiceCatalogFilter, catalog_version, category_facets,
+    filter_services, rank_services, search_term,
+)
+from .signals import chat_channel
+from accounts.authentication import EventStreamJWTAuthentication
+from backend.conditional import ConditionalGetMixin
+from backend.pagination import TenantCursorPagination, rows_since, since_id
+from backend.sse import EventStreamRenderer, PartialBacklog, event_stream
+
+# Mensajes que se reenvían al reconectar (los que el cliente no alcanzó a recibir)
+CHAT_RESUME_LIMIT = 200
 
 # ... (IsOwnerOrReadOnly se mantiene igual) ...
 class IsOwnerOrReadOnly(permissions.BasePermission):
     def has_permission(self, request, view):
         if request.method in permissions.SAFE_METHODS:
             return request.user and request.user.is_authenticated
-        if hasattr(request.user, 'profile') and request.user.profile.role == 'owner':
+        if request.tenant.is_owner:
             return True
         return False
 
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
             return True
-        return obj.owner == get_data_owner(request.user)
+        # Compara ids: no carga al dueño del servicio
+        return obj.owner_id == request.tenant.data_owner.pk
 
 # ... (ExternalServiceViewSet CON LA NUEVA INTEGRACIÓN) ...
-class ExternalServiceViewSet(viewsets.ModelViewSet):
+class ExternalServiceViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = ExternalServiceSerializer
     permission_classes = [IsOwnerOrReadOnly]
+    # ?category=, ?min_cost=, ?max_cost=, ?search= (ver external/search.py)
+    filter_backends = [ServiceCatalogFilter]
+    # Listado completo sin paginar (compatibilidad); la pantalla de contratar usa catalog/
+    pagination_class = None
+    etag_actions = ('list', 'retrieve', 'catalog')
+
+    def get_resource_versions(self, request):
+        # Catálogo global: cambia con los servicios de cualquier taller, no sólo los propios
+        return [catalog_version()]
 
     def get_queryset(self):
         # 1. Obtener todos los servicios base ordenados
@@ -38,34 +60,63 @@ class ExternalServiceViewSet(viewsets.ModelViewSet):
         
         if exclude_self == 'true':
             # Obtenemos al "Dueño real" (Si es Juan, obtiene a Iván)
-            target_user = get_data_owner(self.request.user)
+            target_user = self.request.tenant.data_owner
             
             # Excluimos los servicios que pertenezcan a ese jefe para que no se auto-contraten
             queryset = queryset.exclude(owner=target_user)
 
         return queryset
 
+    @action(detail=False, methods=['get'])
+    def catalog(self, request):
+        """
+        Catálogo paginado para "contratar un servicio":
+        GET /api/external/catalog/?exclude_self=true&category=&min_cost=&max_cost=&search=&cursor=
+
+        Responde {next, previous, results, facets: {category: [{value, label, count}]}}.
+        Los conteos por categoría respetan los demás filtros pero no el de categoría,
+        para mostrar cuántos hay en cada una. Con ?search= vienen los
+        CATALOG_SEARCH_LIMIT más relevantes en una sola página.
+        """
+        params = request.query_params
+        queryset = self.get_queryset()
+        facets = {"category": category_facets(filter_services(queryset, params, exclude=('category',)))}
+
+        services = filter_services(queryset, params)
+        term = search_term(params)
+        if term:
+            results = self.get_serializer(rank_services(services, term)[:CATALOG_SEARCH_LIMIT], many=True).data
+            return Response({"next": None, "previous": None, "results": results, "facets": facets})
+
+        paginator = TenantCursorPagination()
+        page = paginator.paginate_queryset(services, request, view=self)
+        response = paginator.get_paginated_response(self.get_serializer(page, many=True).data)
+        response.data['facets'] = facets
+        return response
+
     def perform_create(self, serializer):
-        if not hasattr(self.request.user, 'profile') or self.request.user.profile.role != 'owner':
+        if not self.request.tenant.is_owner:
             raise PermissionDenied("Solo los dueños pueden crear servicios.")
-        target_user = get_data_owner(self.request.user)
+        target_user = self.request.tenant.data_owner
         serializer.save(owner=target_user)
 
 # ... (ServiceRequestViewSet se mantiene igual) ...
 class ServiceRequestViewSet(viewsets.ModelViewSet):
     serializer_class = ServiceRequestSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = '-created_at'
 
     def get_queryset(self):
-        target_user = get_data_owner(self.request.user)
-        return ServiceRequest.objects.filter(
+        target_user = self.request.tenant.data_owner
+        queryset = ServiceRequest.objects.filter(
             Q(requester=target_user) | Q(provider=target_user)
         ).order_by('-created_at')
+        return ServiceRequestSerializer.setup_eager_loading(queryset)
 
     @action(detail=True, methods=['post'])
     def respond(self, request, pk=None):
         service_req = self.get_object()
-        target_user = get_data_owner(request.user)
+        target_user = request.tenant.data_owner
 
         if service_req.provider != target_user:
             return Response({"error": "No tienes permiso."}, status=status.HTTP_403_FORBIDDEN)
@@ -83,20 +134,39 @@ class MessageViewSet(viewsets.ModelViewSet):
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @property
+    def ordering(self):
+        # Orden cronológico por id (único y creciente; usa message_request_id_idx).
+        # Con ?latest=1 la primera página trae los más nuevos y `next` los anteriores.
+        return '-id' if self.request.query_params.get('latest') == '1' else 'id'
+
     def get_queryset(self):
-        target_user = get_data_owner(self.request.user)
+        target_user = self.request.tenant.data_owner
         
-        # Filtramos mensajes donde soy parte de la solicitud
-        queryset = Message.objects.filter(
-            Q(service_request__requester=target_user) | 
-            Q(service_request__provider=target_user)
-        )
+        # Filtramos mensajes donde soy parte de la solicitud. Con un subquery de ids
+        # (en vez de OR sobre el JOIN) cada lado usa su índice (requester / provider)
+        # y los mensajes se leen por message_request_created_idx.
+        my_requests = ServiceRequest.objects.filter(
+            Q(requester=target_user) | Q(provider=target_user)
+        ).values('id')
+        queryset = Message.objects.filter(service_request__in=my_requests)
 
         request_id = self.request.query_params.get('request_id')
         if request_id:
             queryset = queryset.filter(service_request_id=request_id)
             
-        return queryset
+        return MessageSerializer.setup_eager_loading(queryset)
+
+    def list(self, request, *args, **kwargs):
+        # Polling incremental: ?request_id=<id>&since_id=<último id recibido>.
+        # Sólo los mensajes nuevos, en orden de id; 204 sin cuerpo si no hay nada.
+        last_id = since_id(request.query_params)
+        if last_id is None:
+            return super().list(request, *args, **kwargs)
+        messages = rows_since(self.filter_queryset(self.get_queryset()), last_id)
+        if not messages:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(self.get_serializer(messages, many=True).data)
 
     def perform_create(self, serializer):
         # 1. Obtener ID de la solicitud
@@ -106,11 +176,52 @@ class MessageViewSet(viewsets.ModelViewSet):
 
         # 2. Obtener la solicitud y validar permisos
         service_req = get_object_or_404(ServiceRequest, id=request_id)
-        target_user = get_data_owner(self.request.user)
+        target_user = self.request.tenant.data_owner
 
         # 3. Verificar si el usuario (o su jefe) es parte de la conversación
         if target_user != service_req.requester and target_user != service_req.provider:
             raise PermissionDenied("No tienes permiso para participar en este chat.")
 
         # 4. Guardar el mensaje
-        serializer.save(sender=self.request.user)
\ No newline at end of file
+        serializer.save(sender=self.request.user)
+
+    @action(
+        detail=False, methods=['get'],
+        authentication_classes=[EventStreamJWTAuthentication],
+        renderer_classes=[EventStreamRenderer, JSONRenderer],
+    )
+    def stream(self, request):
+        """
+        Chat en vivo: GET /api/messages/stream/?request_id=<id>&token=<ticket> (text/event-stream).
+
+        Envía un evento `message` (con `id:` = id del mensaje) por cada mensaje nuevo
+        de la solicitud, a los dos participantes. Al reconectar, EventSource manda el
+        header Last-Event-ID (o se puede pasar ?last_id=) y se reenvían sólo los
+        mensajes posteriores, sin volver a pedir el historial. Si son más de
+        CHAT_RESUME_LIMIT se envían esos y se cierra: EventSource reconecta de
+        inmediato desde el último y recibe los siguientes.
+        """
+        request_id = request.query_params.get('request_id')
+        target_user = request.tenant.data_owner
+        participant = ServiceRequest.objects.filter(
+            Q(requester=target_user) | Q(provider=target_user), pk=request_id
+        ) if request_id and request_id.isdigit() else ServiceRequest.objects.none()
+        if not participant.exists():
+            return Response({"error": "Solicitud no encontrada."}, status=status.HTTP_404_NOT_FOUND)
+
+        last_id = since_id(request.META, 'HTTP_LAST_EVENT_ID')
+        if last_id is None:
+            last_id = since_id(request.query_params, 'last_id')
+
+        def missed_messages():
+            if last_id is None:
+                return []
+            # Uno de más para saber si quedan: en ese caso se corta y el cliente reconecta desde el último id
+            messages = rows_since(
+                MessageSerializer.setup_eager_loading(Message.objects.filter(service_request_id=request_id)),
+                last_id, CHAT_RESUME_LIMIT + 1,
+            )
+            events = [('message', MessageSerializer(message).data, message.pk) for message in messages[:CHAT_RESUME_LIMIT]]
+            return PartialBacklog(events) if len(messages) > CHAT_RESUME_LIMIT else events
+
+        return event_stream(request, chat_channel(int(request_id)), initial=missed_messages)
@@ -1,6 +1,6 @@
 # inventory/admin.py
 from django.contrib import admin
-from .models import Product, InventoryBatch
+from .models import Product, InventoryBatch, StockMovement, StockSnapshot
 
 class InventoryBatchInline(admin.TabularInline):
     model = InventoryBatch
@@ -10,17 +10,36 @@ class InventoryBatchInline(admin.TabularInline):
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ("name", "sku", "total_stock", "category", "owner")
+    list_display = ("name", "sku", "stock_on_hand", "reorder_point", "category", "owner")
     search_fields = ("name", "sku", "owner__username")
     list_filter = ("category",)
+    readonly_fields = ("stock_on_hand",)
     inlines = [InventoryBatchInline] # Permite ver los lotes dentro del producto
 
-    # Mostramos el stock total calculado
-    def total_stock(self, obj):
-        return obj.total_stock
-    total_stock.short_description = "Stock Total"
-
 @admin.register(InventoryBatch)
 class InventoryBatchAdmin(admin.ModelAdmin):
     list_display = ("product", "initial_quantity", "current_quantity", "entry_date", "expiration_date")
-    list_filter = ("entry_date", "expiration_date")
\ No newline at end of file
+    list_filter = ("entry_date", "expiration_date")
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "product", "kind", "quantity", "batch", "work_order")
+    list_filter = ("kind", "created_at")
+    search_fields = ("product__name", "product__sku")
+    readonly_fields = [field.name for field in StockMovement._meta.fields]
+
+    # El kardex es de solo inserción
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("product", "taken_at", "quantity")
+    list_filter = ("taken_at",)
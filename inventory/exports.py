@@ -0,0 +1,13 @@
+# inventory/exports.py
+"""Columnas del export del catálogo con su stock (ver backend/exports.py)."""
+
+PRODUCT_EXPORT_COLUMNS = [
+    ('SKU', 'sku'),
+    ('Nombre', 'name'),
+    ('Categoría', 'category'),
+    ('Ubicación', 'location'),
+    ('Precio venta', 'sale_price'),
+    ('Stock', 'stock_on_hand'),
+    ('Punto de reorden', 'reorder_point'),
+    ('Actualizado', 'updated_at'),
+]
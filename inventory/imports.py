@@ -0,0 +1,180 @@
+# inventory/imports.py
+"""
+Carga masiva del catálogo y del stock (lista de precios del proveedor o conteo de bodega).
+
+Columnas (CSV, XLSX o JSON lines; sólo `sku` es obligatoria):
+
+    sku, name, description, category, location, sale_price, reorder_point,
+    quantity, unit_cost, entry_date, expiration_date
+
+- Producto: upsert por (dueño, sku) con bulk_create(update_conflicts=True). Las
+  columnas que no vienen en la fila conservan su valor actual; un SKU nuevo
+  necesita `name`. Si el SKU se repite en el archivo gana la última fila.
+- Stock, según el modo:
+  - 'receipt' (por defecto, lista de precios / guía de despacho): si la fila trae
+    `quantity` > 0 se crea un lote de entrada con esa cantidad (y su movimiento en
+    el kardex), igual que al registrar el lote a mano.
+  - 'count' (conteo de bodega): `quantity` es lo contado (0 incluido) y se ajusta
+    el stock a esa cantidad con movimientos de ajuste: si sobra, un lote nuevo por
+    la diferencia; si falta, se descuenta de los lotes abiertos por FIFO.
+  En los dos, `quantity` vacía no toca el stock; debe ser un entero >= 0 ('00' y
+  '0.0' son cero).
+
+Por lote de IMPORT_CHUNK_SIZE filas: una query para los productos existentes,
+un upsert, un INSERT de lotes, un INSERT de movimientos y un UPDATE del stock,
+todo en una transacción (en un conteo, además, la lectura del stock actual y el
+descuento de consume_stock).
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from accounts.versions import touch
+from backend.imports import IMPORT_CHUNK_SIZE, ImportReport, chunked
+from .models import Product, InventoryBatch, StockMovement
+from .services import consume_stock
+
+PRODUCT_COLUMNS = ('name', 'description', 'category', 'location', 'sale_price', 'reorder_point')
+BATCH_COLUMNS = ('unit_cost', 'entry_date', 'expiration_date')
+
+RECEIPT_MODE = 'receipt'
+COUNT_MODE = 'count'
+IMPORT_MODES = (RECEIPT_MODE, COUNT_MODE)
+
+
+def _build_product(row, owner, existing):
+    product = Product(owner=owner, sku=row['sku'])
+    if existing is not None:
+        for column in PRODUCT_COLUMNS:
+            setattr(product, column, getattr(existing, column))
+    for column in PRODUCT_COLUMNS:
+        if row.get(column, '') != '':
+            setattr(product, column, row[column])
+    product.clean_fields(exclude=['owner'])
+    return product
+
+
+def _quantity(row):
+    """Cantidad de la fila como entero (None si viene vacía)."""
+    value = row.get('quantity', '')
+    if value == '':
+        return None
+    try:
+        quantity = Decimal(value)
+    except InvalidOperation:
+        quantity = None
+    if quantity is None or quantity != quantity.to_integral_value() or quantity < 0:
+        raise ValidationError({'quantity': ["Debe ser un número entero mayor o igual a 0."]})
+    return int(quantity)
+
+
+def _build_batch(row, quantity):
+    values = {column: row[column] for column in BATCH_COLUMNS if row.get(column, '') != ''}
+    batch = InventoryBatch(initial_quantity=quantity, current_quantity=quantity, **values)
+    batch.clean_fields(exclude=['product'])
+    return batch
+
+
+def _import_chunk(chunk, owner, report, mode):
+    skus = {row.get('sku', '') for _, row in chunk}
+    existing = {product.sku: product for product in Product.objects.filter(owner=owner, sku__in=skus)}
+
+    products = {}
+    batches = []  # (lote, sku, tipo de movimiento)
+    counts = {}   # sku -> (cantidad contada, lote con los datos de la fila para lo que sobre)
+    for line, row in chunk:
+        report.rows += 1
+        errors = {}
+        if not row.get('sku'):
+            report.add_error(line, {"sku": ["Este campo es obligatorio."]})
+            continue
+        try:
+            product = _build_product(row, owner, products.get(row['sku'], existing.get(row['sku'])))
+        except ValidationError as exc:
+            errors.update(exc.message_dict)
+        batch = quantity = None
+        try:
+            quantity = _quantity(row)
+            if quantity is not None and (quantity > 0 or mode == COUNT_MODE):
+                batch = _build_batch(row, quantity)
+        except ValidationError as exc:
+            errors.update(exc.message_dict)
+        if errors:
+            report.add_error(line, errors)
+            continue
+        products[product.sku] = product
+        if mode == COUNT_MODE and batch is not None:
+            counts[product.sku] = (quantity, batch)  # si el SKU se repite, vale el último conteo
+        elif batch is not None:
+            batches.append((batch, product.sku, StockMovement.RECEIPT))
+
+    if not products:
+        return
+
+    with transaction.atomic():
+        # Orden por SKU: dos cargas en paralelo bloquean los productos en el mismo orden
+        upserted = Product.objects.bulk_create(
+            sorted(products.values(), key=lambda product: product.sku),
+            update_conflicts=True,
+            unique_fields=['owner', 'sku'],
+            update_fields=[*PRODUCT_COLUMNS, 'updated_at'],
+        )
+        if any(product.pk is None for product in upserted):
+            # Motores sin RETURNING en el upsert: leemos los ids
+            ids = dict(Product.objects.filter(owner=owner, sku__in=products).values_list('sku', 'id'))
+            for product in upserted:
+                product.pk = ids[product.sku]
+
+        removed = 0
+        if counts:
+            # El upsert ya dejó bloqueadas las filas: el stock leído no cambia hasta el commit
+            on_hand = dict(
+                Product.objects.filter(pk__in=[products[sku].pk for sku in counts]).values_list('pk', 'stock_on_hand')
+            )
+            removals = []
+            for sku, (counted, batch) in counts.items():
+                difference = counted - on_hand[products[sku].pk]
+                if difference > 0:
+                    batch.initial_quantity = batch.current_quantity = difference
+                    batches.append((batch, sku, StockMovement.ADJUSTMENT))
+                elif difference < 0:
+                    removals.append((products[sku].pk, -difference))
+            consumption = consume_stock(removals, owner=owner, kind=StockMovement.ADJUSTMENT)
+            removed = sum(allocation['quantity'] for allocation in consumption.allocations)
+
+        for batch, sku, _ in batches:
+            batch.product = products[sku]
+        InventoryBatch.objects.bulk_create([batch for batch, _, _ in batches])
+        StockMovement.objects.bulk_create([
+            StockMovement(
+                product_id=batch.product_id,
+                batch=batch,
+                kind=kind,
+                quantity=batch.current_quantity,
+            )
+            for batch, _, kind in batches
+        ])
+        # bulk_create no pasa por InventoryBatch.save(): recalculamos stock_on_hand
+        Product.recompute_stock(*{batch.product_id for batch, _, _ in batches})
+        touch(owner.pk, 'products')
+
+    report.count('products_created', len(products.keys() - existing.keys()))
+    report.count('products_updated', len(products.keys() & existing.keys()))
+    report.count('batches_created', len(batches))
+    report.count('units_received', sum(batch.current_quantity for batch, _, _ in batches))
+    if mode == COUNT_MODE:
+        report.count('units_removed', removed)
+
+
+def import_inventory(rows, owner, chunk_size=IMPORT_CHUNK_SIZE, mode=RECEIPT_MODE):
+    """Importa las filas (línea, dict) de backend.imports.read_rows al catálogo de `owner` (`mode`: ver arriba)."""
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"Modo de carga no válido: {mode!r} (usa {' o '.join(IMPORT_MODES)}).")
+    report = ImportReport()
+    report.counts = {'products_created': 0, 'products_updated': 0, 'batches_created': 0, 'units_received': 0}
+    if mode == COUNT_MODE:
+        report.counts['units_removed'] = 0
+    for chunk in chunked(rows, chunk_size):
+        _import_chunk(chunk, owner, report, mode)
+    return report
@@ -0,0 +1,107 @@
+# inventory/management/commands/bench_stock_consumption.py
+import random
+import threading
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Sum
+
+from inventory.models import Product, InventoryBatch
+from inventory.services import consume_stock
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de concurrencia de consume_stock: varios hilos descuentan el mismo stock "
+        "en paralelo y al final se verifica que no se haya vendido más de lo que había. "
+        "Pensado para PostgreSQL (SQLite serializa las escrituras)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8, help="Hilos en paralelo.")
+        parser.add_argument("--orders", type=int, default=50, help="Consumos por hilo.")
+        parser.add_argument("--products", type=int, default=3, help="Productos en disputa.")
+        parser.add_argument("--batches", type=int, default=5, help="Lotes por producto.")
+        parser.add_argument("--stock", type=int, default=200, help="Unidades por lote.")
+        parser.add_argument("--max-qty", type=int, default=5, help="Cantidad máxima por línea.")
+        parser.add_argument("--keep", action="store_true", help="No borrar los datos de prueba.")
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite":
+            self.stdout.write(self.style.WARNING(
+                "SQLite no soporta SELECT ... FOR UPDATE; el resultado no es representativo."
+            ))
+
+        User = get_user_model()
+        owner = User.objects.create_user(username=f"bench-{uuid.uuid4().hex[:10]}")
+        try:
+            self._run(owner, options)
+        finally:
+            if not options["keep"]:
+                owner.delete()
+
+    def _run(self, owner, options):
+        products = [
+            Product.objects.create(owner=owner, name=f"Bench {i}", sku=f"BENCH-{i}")
+            for i in range(options["products"])
+        ]
+        InventoryBatch.objects.bulk_create([
+            InventoryBatch(product=product, initial_quantity=options["stock"], current_quantity=options["stock"])
+            for product in products
+            for _ in range(options["batches"])
+        ])
+        Product.recompute_stock(*[product.pk for product in products])
+        initial_total = options["products"] * options["batches"] * options["stock"]
+
+        allocated = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            local_allocated = 0
+            try:
+                for _ in range(options["orders"]):
+                    lines = [
+                        (product.pk, rng.randint(1, options["max_qty"]))
+                        for product in rng.sample(products, rng.randint(1, len(products)))
+                    ]
+                    result = consume_stock(lines, owner=owner)
+                    local_allocated += sum(a["quantity"] for a in result.allocations)
+            except Exception as exc:  # se reporta al final
+                with lock:
+                    errors.append(repr(exc))
+            finally:
+                with lock:
+                    allocated.append(local_allocated)
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(options["workers"])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        remaining = InventoryBatch.objects.filter(product__owner=owner).aggregate(total=Sum("current_quantity"))["total"] or 0
+        on_hand = Product.objects.filter(owner=owner).aggregate(total=Sum("stock_on_hand"))["total"] or 0
+        negative = InventoryBatch.objects.filter(product__owner=owner, current_quantity__lt=0).count()
+        total_allocated = sum(allocated)
+        calls = options["workers"] * options["orders"]
+
+        self.stdout.write(
+            f"{calls} consumos en {elapsed:.2f}s ({calls / elapsed:.1f}/s) con {options['workers']} hilos"
+        )
+        self.stdout.write(
+            f"stock inicial {initial_total}, asignado {total_allocated}, restante {remaining}, stock_on_hand {on_hand}"
+        )
+        for error in errors:
+            self.stdout.write(self.style.ERROR(error))
+
+        if negative or total_allocated + remaining != initial_total or on_hand != remaining:
+            raise CommandError("Inconsistencia detectada: se asignó stock que no existía.")
+        self.stdout.write(self.style.SUCCESS("Sin sobreventa: asignado + restante == stock inicial."))
@@ -0,0 +1,53 @@
+# inventory/management/commands/import_inventory.py
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.imports import IMPORT_CHUNK_SIZE, read_rows
+from inventory.imports import COUNT_MODE, IMPORT_MODES, RECEIPT_MODE, import_inventory
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga una lista de precios o un conteo de stock (CSV, XLSX o JSON lines) en el "
+        "catálogo de un taller: upsert de productos por SKU y lotes de entrada, o con "
+        "--mode count ajuste del stock a lo contado (ver inventory/imports.py para las columnas)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Archivo .csv, .xlsx o .jsonl.")
+        parser.add_argument("--owner", required=True, help="Usuario dueño del taller.")
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="Filas por lote.")
+        parser.add_argument(
+            "--mode", choices=IMPORT_MODES, default=RECEIPT_MODE,
+            help="receipt: `quantity` entra como lote nuevo; count: `quantity` es el stock contado.",
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            owner = User.objects.get(username=options["owner"])
+        except User.DoesNotExist:
+            raise CommandError(f"No existe el usuario {options['owner']!r}.")
+
+        started = time.perf_counter()
+        try:
+            with open(options["path"], "rb") as fileobj:
+                report = import_inventory(
+                    read_rows(fileobj, options["path"]), owner, options["chunk_size"], options["mode"],
+                )
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+
+        result = report.as_dict()
+        self.stdout.write(
+            f"{result['rows']} filas en {elapsed:.2f}s: {result['products_created']} productos nuevos, "
+            f"{result['products_updated']} actualizados, {result['batches_created']} lotes "
+            f"({result['units_received']} unidades), {result['error_count']} filas con errores"
+        )
+        if options["mode"] == COUNT_MODE:
+            self.stdout.write(f"Ajuste por conteo: {result['units_removed']} unidades descontadas")
+        for error in result["errors"]:
+            self.stdout.write(self.style.ERROR(f"línea {error['line']}: {error['errors']}"))
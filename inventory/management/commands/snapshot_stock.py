@@ -0,0 +1,34 @@
+# inventory/management/commands/snapshot_stock.py
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from inventory.models import Product
+from inventory.services import take_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Guarda una foto del stock de cada producto (StockSnapshot). Correrlo periódicamente "
+        "(ej. cada noche) acota cuántos movimientos hay que sumar para consultar stock histórico."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--owner", type=int, help="Solo los productos de este dueño (ID).")
+        parser.add_argument("--at", help="Instante de la foto en ISO 8601 (por defecto, ahora).")
+
+    def handle(self, *args, **options):
+        when = None
+        if options.get("at"):
+            when = parse_datetime(options["at"])
+            if when is None:
+                raise CommandError("--at debe ser una fecha/hora ISO 8601.")
+            if timezone.is_naive(when):
+                when = timezone.make_aware(when)
+
+        products = Product.objects.all()
+        if options.get("owner"):
+            products = products.filter(owner_id=options["owner"])
+
+        count = take_snapshots(products, when)
+        self.stdout.write(self.style.SUCCESS(f"{count} foto(s) de stock guardadas."))
@@ -0,0 +1,41 @@
+# inventory/management/commands/verify_stock.py
+from django.core.management.base import BaseCommand
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
+
+from inventory.models import Product
+
+
+class Command(BaseCommand):
+    help = "Compara Product.stock_on_hand con la suma de sus lotes y, con --fix, corrige los desfases."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--owner", type=int, help="Revisar solo los productos de este dueño (ID).")
+        parser.add_argument("--fix", action="store_true", help="Corregir los productos con diferencias.")
+
+    def handle(self, *args, **options):
+        products = Product.objects.all()
+        if options.get("owner"):
+            products = products.filter(owner_id=options["owner"])
+
+        # Una sola query agrupada: solo vuelven los productos que no cuadran
+        drifted = list(
+            products.annotate(real_stock=Coalesce(Sum("batches__current_quantity"), 0))
+            .exclude(stock_on_hand=F("real_stock"))
+            .order_by("owner_id", "name")
+        )
+
+        for product in drifted:
+            self.stdout.write(self.style.WARNING(
+                f"[{product.owner_id}] {product}: guardado {product.stock_on_hand}, real {product.real_stock}"
+            ))
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("Todo el stock cuadra."))
+            return
+
+        if options["fix"]:
+            Product.recompute_stock(*[product.pk for product in drifted])
+            self.stdout.write(self.style.SUCCESS(f"{len(drifted)} producto(s) corregidos."))
+        else:
+            self.stdout.write(f"{len(drifted)} producto(s) con diferencias. Usa --fix para corregir.")
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:24
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_stock_on_hand(apps, schema_editor):
+    Product = apps.get_model('inventory', 'Product')
+    InventoryBatch = apps.get_model('inventory', 'InventoryBatch')
+    total = (
+        InventoryBatch.objects.filter(product=OuterRef('pk'))
+        .order_by()
+        .values('product')
+        .annotate(total=Sum('current_quantity'))
+        .values('total')
+    )
+    Product.objects.update(stock_on_hand=Coalesce(Subquery(total), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='stock_on_hand',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Stock Disponible'),
+        ),
+        migrations.RunPython(fill_stock_on_hand, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['owner', 'stock_on_hand'], name='product_owner_stock_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:26
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def open_ledger(apps, schema_editor):
+    # Saldo inicial: un ingreso por cada lote con stock, fechado cuando se creó el lote
+    InventoryBatch = apps.get_model('inventory', 'InventoryBatch')
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+    batches = InventoryBatch.objects.filter(current_quantity__gt=0).values_list(
+        'pk', 'product_id', 'current_quantity', 'created_at'
+    )
+    movements = [
+        StockMovement(
+            product_id=product_id,
+            batch_id=batch_id,
+            kind='receipt',
+            quantity=quantity,
+            created_at=created_at,
+        )
+        for batch_id, product_id, quantity, created_at in batches.iterator(chunk_size=2000)
+    ]
+    StockMovement.objects.bulk_create(movements, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_product_stock_on_hand'),
+        ('orders', '0002_dashboardstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('receipt', 'Ingreso'), ('consumption', 'Consumo'), ('adjustment', 'Ajuste')], max_length=20)),
+                ('quantity', models.IntegerField(verbose_name='Cantidad')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('batch', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movements', to='inventory.inventorybatch')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='inventory.product')),
+                ('work_order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='orders.workorder')),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(fields=['product', 'created_at'], name='movement_product_date_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField()),
+                ('quantity', models.IntegerField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='inventory.product')),
+            ],
+            options={
+                'ordering': ['-taken_at'],
+                'constraints': [models.UniqueConstraint(fields=('product', 'taken_at'), name='unique_snapshot_per_product_instant')],
+            },
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_stock_movements'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='reorder_point',
+            field=models.PositiveIntegerField(default=5, verbose_name='Punto de Reorden'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('stock_on_hand__lt', models.F('reorder_point'))), fields=['owner', 'name'], name='product_low_stock_idx'),
+        ),
+    ]
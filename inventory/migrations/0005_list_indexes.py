@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_product_reorder_point'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventorybatch',
+            index=models.Index(fields=['-entry_date'], name='batch_entry_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['owner', 'name'], name='product_owner_name_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventorybatch',
+            index=models.Index(condition=models.Q(('current_quantity__gt', 0)), fields=['product', 'expiration_date', 'entry_date', 'id'], name='batch_open_fifo_idx'),
+        ),
+    ]
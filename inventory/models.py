@@ -1,7 +1,8 @@
 ## inventory/models.py
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
-from django.db.models import Sum
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 # --- TABLA 1: PRODUCTO (El Catálogo - Qué es) ---
@@ -20,6 +21,12 @@ class Product(models.Model):
     # Precio de venta al público (sugerido)
     sale_price = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="Precio Venta")
 
+    # Stock disponible (suma de current_quantity de los lotes). Se mantiene al
+    # crear/editar/consumir lotes; `verify_stock` detecta y corrige desfases.
+    stock_on_hand = models.IntegerField(default=0, editable=False, verbose_name="Stock Disponible")
+    # Bajo este stock el producto aparece en el reporte de stock bajo
+    reorder_point = models.PositiveIntegerField(default=5, verbose_name="Punto de Reorden")
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -28,16 +35,52 @@ class Product(models.Model):
         constraints = [
             models.UniqueConstraint(fields=["owner", "sku"], name="unique_product_sku_per_owner")
         ]
+        indexes = [
+            # Listados filtrados/ordenados por stock (?stock_lte=5, ?ordering=stock_on_hand)
+            models.Index(fields=["owner", "stock_on_hand"], name="product_owner_stock_idx"),
+            # Listado paginado por cursor (orden alfabético)
+            models.Index(fields=["owner", "name"], name="product_owner_name_idx"),
+            # Índice parcial: solo contiene los productos bajo su punto de reorden,
+            # así el reporte no recorre el catálogo completo
+            models.Index(
+                fields=["owner", "name"],
+                condition=models.Q(stock_on_hand__lt=F("reorder_point")),
+                name="product_low_stock_idx",
+            ),
+        ]
         ordering = ["name"]
 
     def __str__(self):
         return f"{self.name} ({self.sku})"
 
-    # Propiedad para obtener el stock total sumando los lotes
+    # Se mantiene por compatibilidad: ahora lee la columna desnormalizada (sin query)
     @property
     def total_stock(self):
-        # Suma la columna 'current_quantity' de todos los lotes asociados
-        return self.batches.aggregate(total=Sum('current_quantity'))['total'] or 0
+        return self.stock_on_hand
+
+    @staticmethod
+    def adjust_stock(product_id, delta):
+        """Suma `delta` al stock disponible del producto con un UPDATE atómico."""
+        if product_id is None or not delta:
+            return
+        Product.objects.filter(pk=product_id).update(stock_on_hand=F('stock_on_hand') + delta)
+
+    @staticmethod
+    def recompute_stock(*product_ids):
+        """Recalcula el stock disponible desde los lotes (un solo UPDATE con subquery)."""
+        product_ids = [pk for pk in product_ids if pk is not None]
+        if not product_ids:
+            return
+        total = (
+            InventoryBatch.objects.filter(product=OuterRef('pk'))
+            .order_by()
+            .values('product')
+            .annotate(total=Sum('current_quantity'))
+            .values('total')
+        )
+        Product.objects.filter(pk__in=product_ids).update(
+            stock_on_hand=Coalesce(Subquery(total), 0)
+        )
 
 
 # --- TABLA 2: LOTE DE INVENTARIO (Las Existencias - Cuántos hay y cuándo vencen) ---
@@ -58,16 +101,168 @@ class InventoryBatch(models.Model):
     expiration_date = models.DateField(null=True, blank=True, verbose_name="Fecha de Vencimiento")
     
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         # Ordenar para que salgan primero los que vencen antes (FIFO)
         ordering = ['expiration_date', 'entry_date']
+        indexes = [
+            # Listado paginado por cursor (más recientes primero)
+            models.Index(fields=['-entry_date'], name='batch_entry_date_idx'),
+            # Lotes abiertos en orden FIFO (parcial: los agotados no se vuelven a leer)
+            models.Index(
+                fields=['product', 'expiration_date', 'entry_date', 'id'],
+                condition=models.Q(current_quantity__gt=0),
+                name='batch_open_fifo_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"Lote {self.id} - {self.product.name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Recordamos lo cargado para sumar solo la diferencia al guardar
+        instance._loaded_stock = (instance.__dict__.get('product_id'), instance.__dict__.get('current_quantity'))
+        return instance
+
     def save(self, *args, **kwargs):
         # Al crear, si no se especifica stock actual, es igual al inicial
         if self.current_quantity is None:
             self.current_quantity = self.initial_quantity
-        super().save(*args, **kwargs)
\ No newline at end of file
+
+        adding = self._state.adding
+        old_product_id, old_quantity = getattr(self, '_loaded_stock', (None, None))
+        new_quantity = self.__dict__.get('current_quantity')
+
+        if new_quantity is None:
+            # current_quantity diferido: no se escribe, el stock no cambia
+            return super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            if not adding:
+                # Lo cargado puede estar viejo (ej. consume_stock descontó después)
+                previous = self._lock_stored(old_product_id, self.product_id)
+                if previous:
+                    old_product_id, old_quantity = previous
+                else:
+                    adding = True
+
+            # (producto, cambio) que produce este guardado
+            if adding:
+                changes = [(self.product_id, new_quantity)]
+            elif old_product_id == self.product_id:
+                changes = [(self.product_id, new_quantity - old_quantity)]
+            else:
+                changes = [(old_product_id, -old_quantity), (self.product_id, new_quantity)]
+
+            for product_id, delta in changes:
+                Product.adjust_stock(product_id, delta)
+
+            super().save(*args, **kwargs)
+
+            StockMovement.objects.bulk_create([
+                StockMovement(
+                    product_id=product_id,
+                    batch=self,
+                    kind=StockMovement.RECEIPT if adding else StockMovement.ADJUSTMENT,
+                    quantity=delta,
+                )
+                for product_id, delta in changes if delta
+            ])
+        self._loaded_stock = (self.product_id, new_quantity)
+
+    def _lock_stored(self, *product_ids):
+        """
+        (producto, stock actual) guardados del lote, bloqueando primero los productos
+        y luego el lote: mismo orden que inventory.services.consume_stock, así no
+        hay deadlocks entre ambos. None si el lote ya no existe.
+        """
+        product_ids = {pk for pk in product_ids if pk is not None}
+        list(Product.objects.select_for_update().filter(pk__in=product_ids).order_by('pk').values_list('pk', flat=True))
+        return (
+            InventoryBatch.objects.select_for_update()
+            .filter(pk=self.pk).values_list('product_id', 'current_quantity').first()
+        )
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            product_id, quantity = self._lock_stored(self.product_id) or (self.product_id, self.current_quantity)
+            Product.adjust_stock(product_id, -(quantity or 0))
+            if quantity:
+                StockMovement.objects.create(
+                    product_id=product_id,
+                    batch=self,
+                    kind=StockMovement.ADJUSTMENT,
+                    quantity=-quantity,
+                )
+            return super().delete(*args, **kwargs)
+
+
+# --- TABLA 3: MOVIMIENTOS DE STOCK (Kardex: cada entrada, salida y ajuste) ---
+class StockMovement(models.Model):
+    """
+    Libro de movimientos de solo inserción. La suma de `quantity` de un producto
+    hasta una fecha es su stock a esa fecha (ver inventory.services.stock_at).
+    """
+    RECEIPT = 'receipt'
+    CONSUMPTION = 'consumption'
+    ADJUSTMENT = 'adjustment'
+    KIND_CHOICES = [
+        (RECEIPT, 'Ingreso'),
+        (CONSUMPTION, 'Consumo'),
+        (ADJUSTMENT, 'Ajuste'),
+    ]
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="movements")
+    batch = models.ForeignKey(
+        InventoryBatch,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="movements"
+    )
+    # OT que originó el consumo (si aplica)
+    work_order = models.ForeignKey(
+        'orders.WorkOrder',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="stock_movements"
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # Positivo = entra stock, negativo = sale
+    quantity = models.IntegerField(verbose_name="Cantidad")
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(fields=['product', 'created_at'], name='movement_product_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.quantity:+d} - {self.product_id}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Los movimientos de stock no se editan; registra un ajuste.")
+        super().save(*args, **kwargs)
+
+
+# --- TABLA 4: FOTOS DE STOCK (para no recorrer todo el historial) ---
+class StockSnapshot(models.Model):
+    """Stock de un producto en un instante; `stock_at` parte de la foto más cercana."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="snapshots")
+    taken_at = models.DateTimeField()
+    quantity = models.IntegerField()
+
+    class Meta:
+        ordering = ['-taken_at']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'taken_at'], name='unique_snapshot_per_product_instant')
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} @ {self.taken_at:%Y-%m-%d %H:%M}: {self.quantity}"
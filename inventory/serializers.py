@@ -1,8 +1,11 @@
 # inventory/serializers.py
 from rest_framework import serializers
-from .models import Product, InventoryBatch
+from .models import Product, InventoryBatch, StockMovement
+from backend.serializers import DynamicFieldsMixin
 
-class InventoryBatchSerializer(serializers.ModelSerializer):
+# Lotes y productos sólo muestran columnas propias e ids de FK: no hay relaciones que
+# precargar, así que no tienen setup_eager_loading (el conteo de queries se prueba en tests.py).
+class InventoryBatchSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = InventoryBatch
         fields = [
@@ -12,15 +15,36 @@ class InventoryBatchSerializer(serializers.ModelSerializer):
         # Permitimos editar TODO menos la fecha de creación
         read_only_fields = ['created_at']
 
-class ProductSerializer(serializers.ModelSerializer):
-    stock_actual = serializers.IntegerField(source='total_stock', read_only=True)
+class ProductSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    stock_actual = serializers.IntegerField(source='stock_on_hand', read_only=True)
 
     class Meta:
         model = Product
         fields = [
             'id', 'name', 'sku', 'description', 
             'category', 'location', 'sale_price', 
-            'stock_actual', 
+            'stock_actual', 'reorder_point',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'owner', 'created_at', 'updated_at']
\ No newline at end of file
+        read_only_fields = ['id', 'owner', 'created_at', 'updated_at']
+
+class StockMovementSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    kind_display = serializers.CharField(source='get_kind_display', read_only=True)
+
+    class Meta:
+        model = StockMovement
+        fields = ['id', 'product', 'batch', 'work_order', 'kind', 'kind_display', 'quantity', 'created_at']
+        read_only_fields = fields
+
+
+class LowStockProductSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    stock_actual = serializers.IntegerField(source='stock_on_hand', read_only=True)
+    missing = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Product
+        fields = ['id', 'name', 'sku', 'category', 'location', 'stock_actual', 'reorder_point', 'missing']
+
+    def get_missing(self, obj):
+        # Unidades que faltan para volver al punto de reorden
+        return obj.reorder_point - obj.stock_on_hand
@@ -0,0 +1,191 @@
+# inventory/services.py
+from collections import OrderedDict
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import DateTimeField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Product, InventoryBatch, StockMovement, StockSnapshot
+from .signals import batches_consumed
+
+# Orden FIFO: primero lo que vence antes, luego lo que entró antes
+FIFO_ORDER = ('expiration_date', 'entry_date', 'id')
+
+
+def low_stock_products(owner):
+    """
+    Productos del dueño cuyo stock disponible está bajo su punto de reorden.
+    Compara las columnas stock_on_hand (suma de lotes ya mantenida) y reorder_point
+    en una sola query servida por el índice parcial product_low_stock_idx.
+    """
+    return Product.objects.filter(owner=owner, stock_on_hand__lt=F('reorder_point')).order_by('name')
+
+
+class StockConsumption:
+    """
+    Resultado de consume_stock.
+    - allocations: [{'product_id', 'batch_id', 'quantity'}] lo descontado de cada lote.
+    - shortfalls:  [{'product_id', 'product_name', 'requested', 'allocated', 'missing'}]
+      productos que no alcanzaron a cubrirse (o que no existen para ese dueño).
+    """
+
+    def __init__(self):
+        self.allocations = []
+        self.shortfalls = []
+
+    @property
+    def has_shortfalls(self):
+        return bool(self.shortfalls)
+
+
+def consume_stock(lines, owner=None, work_order=None, kind=StockMovement.CONSUMPTION):
+    """
+    Descuenta stock por FIFO para varios productos a la vez.
+
+    `lines` es un iterable de (product_id, cantidad); se agrupan por producto.
+    Bloquea (SELECT ... FOR UPDATE) los productos y sus lotes abiertos una sola vez,
+    planifica todo en memoria y escribe con dos bulk_update, así dos órdenes
+    generadas en paralelo no pueden tomar las mismas unidades.
+    Si se pasa `owner`, los productos de otro taller se reportan como faltantes.
+    Lo que no alcanza se descuenta hasta donde hay y se reporta en `shortfalls`.
+    Cada descuento queda en el kardex (StockMovement) ligado a `work_order`, como
+    consumo o, con `kind`, como ajuste (conteos de bodega, ver inventory/imports.py).
+    """
+    requested = OrderedDict()
+    for product_id, quantity in lines:
+        if product_id is None or not quantity or quantity <= 0:
+            continue
+        requested[product_id] = requested.get(product_id, 0) + quantity
+
+    result = StockConsumption()
+    if not requested:
+        return result
+
+    with transaction.atomic():
+        # 1. Bloqueo: productos (en orden de PK, evita deadlocks) y después sus lotes
+        products = Product.objects.select_for_update().filter(pk__in=requested.keys()).order_by('pk')
+        if owner is not None:
+            products = products.filter(owner=owner)
+        products = {product.pk: product for product in products}
+
+        batches_by_product = {}
+        open_batches = (
+            InventoryBatch.objects.select_for_update()
+            .filter(product_id__in=products.keys(), current_quantity__gt=0)
+            .order_by('product_id', *FIFO_ORDER)
+        )
+        for batch in open_batches:
+            batches_by_product.setdefault(batch.product_id, []).append(batch)
+
+        # 2. Plan FIFO en memoria
+        touched_batches = []
+        changes = []
+        for product_id, qty_needed in requested.items():
+            product = products.get(product_id)
+            if product is None:
+                result.shortfalls.append({
+                    "product_id": product_id,
+                    "product_name": None,
+                    "requested": qty_needed,
+                    "allocated": 0,
+                    "missing": qty_needed,
+                })
+                continue
+
+            allocated = 0
+            for batch in batches_by_product.get(product_id, []):
+                if allocated >= qty_needed:
+                    break
+                take = min(batch.current_quantity, qty_needed - allocated)
+                changes.append((product.owner_id, batch.current_quantity, batch.current_quantity - take))
+                batch.current_quantity -= take
+                allocated += take
+                touched_batches.append(batch)
+                result.allocations.append({"product_id": product_id, "batch_id": batch.pk, "quantity": take})
+
+            product.stock_on_hand -= allocated
+            if allocated < qty_needed:
+                result.shortfalls.append({
+                    "product_id": product_id,
+                    "product_name": product.name,
+                    "requested": qty_needed,
+                    "allocated": allocated,
+                    "missing": qty_needed - allocated,
+                })
+
+        # 3. Escritura en bloque
+        if touched_batches:
+            # bulk_update no aplica auto_now
+            now = timezone.now()
+            for batch in touched_batches:
+                batch.updated_at = now
+            for product in products.values():
+                product.updated_at = now
+            InventoryBatch.objects.bulk_update(touched_batches, ['current_quantity', 'updated_at'])
+            Product.objects.bulk_update(products.values(), ['stock_on_hand', 'updated_at'])
+            StockMovement.objects.bulk_create([
+                StockMovement(
+                    product_id=allocation["product_id"],
+                    batch_id=allocation["batch_id"],
+                    work_order=work_order,
+                    kind=kind,
+                    quantity=-allocation["quantity"],
+                )
+                for allocation in result.allocations
+            ])
+            batches_consumed.send(sender=InventoryBatch, changes=changes)
+
+    return result
+
+
+# Fecha "cero" para los productos sin foto previa: se suman todos sus movimientos
+LEDGER_START = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def stock_at(products, when):
+    """
+    Anota `historical_stock` (stock a la fecha `when`) en un queryset de productos.
+
+    Por producto: cantidad de la foto (StockSnapshot) más reciente <= `when`, más
+    la suma de los movimientos posteriores a esa foto y hasta `when`. Todo va en
+    una sola query con subconsultas correlacionadas que usan los índices
+    (product, taken_at) y (product, created_at).
+    """
+    snapshots = StockSnapshot.objects.filter(product=OuterRef('pk'), taken_at__lte=when).order_by('-taken_at')
+    movements = (
+        StockMovement.objects.filter(
+            product=OuterRef('pk'),
+            created_at__gt=OuterRef('snapshot_at'),
+            created_at__lte=when,
+        )
+        .order_by()
+        .values('product')
+        .annotate(total=Sum('quantity'))
+        .values('total')
+    )
+    return products.annotate(
+        snapshot_at=Coalesce(
+            Subquery(snapshots.values('taken_at')[:1]),
+            Value(LEDGER_START, output_field=DateTimeField()),
+        ),
+        snapshot_quantity=Coalesce(Subquery(snapshots.values('quantity')[:1]), 0),
+    ).annotate(
+        historical_stock=F('snapshot_quantity') + Coalesce(Subquery(movements), 0)
+    )
+
+
+def take_snapshots(products, when=None):
+    """
+    Guarda una foto del stock de cada producto a la fecha `when` (por defecto ahora),
+    calculada desde el propio kardex para que foto y movimientos siempre cuadren.
+    """
+    when = when or timezone.now()
+    rows = stock_at(products.order_by(), when).values_list('pk', 'historical_stock')
+    snapshots = [
+        StockSnapshot(product_id=product_id, taken_at=when, quantity=quantity)
+        for product_id, quantity in rows.iterator(chunk_size=2000)
+    ]
+    StockSnapshot.objects.bulk_create(snapshots, batch_size=2000, ignore_conflicts=True)
+    return len(snapshots)
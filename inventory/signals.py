@@ -0,0 +1,9 @@
+# inventory/signals.py
+from django.dispatch import Signal
+
+# Se envía después de que inventory.services.consume_stock descuenta lotes con
+# bulk_update (que no dispara post_save). Argumentos:
+#   changes: lista de (owner_id, cantidad_anterior, cantidad_nueva) por lote tocado
+# Lo escucha accounts.versions (nueva versión de 'products' para los ETag). El
+# stock bajo ya no se cuenta aquí: se consulta con services.low_stock_products.
+batches_consumed = Signal()
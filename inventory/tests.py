@@ -1,3 +1,445 @@
+import csv
+import io
+import json
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.models import Sum
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from backend.conditional import response_cache
+from backend.imports import read_rows
+from clients.models import Client, Vehicle
+from evaluations.models import Evaluation
+from orders.models import WorkOrder
+from .imports import import_inventory
+from .models import Product, InventoryBatch, StockMovement, StockSnapshot
+from .services import consume_stock, low_stock_products, stock_at
+
+
+class InventoryImportTests(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user('dueno')
+        self.api = APIClient()
+        self.api.force_authenticate(self.owner)
+        self.filter = Product.objects.create(owner=self.owner, name='Filtro aceite', sku='FA-1', sale_price=5000, location='A1')
+        InventoryBatch.objects.create(product=self.filter, initial_quantity=3, current_quantity=3)
+
+    def upload(self, content, name='precios.csv'):
+        return self.api.post('/api/products/import/', {'file': SimpleUploadedFile(name, content)}, format='multipart')
+
+    def test_upsert_products_and_receive_stock(self):
+        content = (
+            'sku,name,sale_price,quantity,unit_cost,expiration_date\n'
+            'FA-1,,5990,10,3000,\n'            # existente: precio nuevo, nombre se conserva
+            'BJ-2,Bujía,2500,,,\n'             # nuevo sin stock
+            'AC-3,Aceite 5W30,12000,4,8000,2027-01-31\n'
+            'XX-9,,100,1,,\n'                  # SKU nuevo sin nombre
+            'AC-3,Aceite 5W30 sintético,12500,2,8000,\n'  # SKU repetido: gana la última fila
+        ).encode()
+        response = self.upload(content)
+        data = response.json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['products_created'], 2)
+        self.assertEqual(data['products_updated'], 1)
+        self.assertEqual(data['batches_created'], 3)
+        self.assertEqual(data['units_received'], 16)
+        self.assertEqual([(error['line'], list(error['errors'])) for error in data['errors']], [(5, ['name'])])
+
+        self.filter.refresh_from_db()
+        self.assertEqual((self.filter.name, self.filter.location), ('Filtro aceite', 'A1'))
+        self.assertEqual((self.filter.sale_price, self.filter.stock_on_hand), (5990, 13))
+
+        oil = Product.objects.get(owner=self.owner, sku='AC-3')
+        self.assertEqual((oil.name, oil.stock_on_hand), ('Aceite 5W30 sintético', 6))
+        self.assertEqual(oil.batches.count(), 2)
+        self.assertEqual(
+            sorted(StockMovement.objects.filter(product=oil).values_list('kind', 'quantity')),
+            [('receipt', 2), ('receipt', 4)],
+        )
+        self.assertEqual(Product.objects.get(owner=self.owner, sku='BJ-2').stock_on_hand, 0)
+
+    def test_json_lines_and_tenant_isolation(self):
+        other = User.objects.create_user('otro')
+        Product.objects.create(owner=other, name='Filtro de otro', sku='FA-1')
+        lines = [{'sku': 'FA-1', 'quantity': 2}, {'sku': 'NV-1', 'name': 'Nuevo', 'quantity': 1}]
+        content = '\n'.join(json.dumps(line) for line in lines).encode()
+
+        response = self.upload(content, name='conteo.jsonl')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['products_updated'], 1)
+        self.assertEqual(Product.objects.get(owner=other, sku='FA-1').name, 'Filtro de otro')
+        self.assertEqual(Product.objects.get(owner=self.owner, sku='FA-1').stock_on_hand, 5)
+
+    def test_zero_quantities_do_not_create_batches(self):
+        content = 'sku,name,quantity\nZ-1,Cero,00\nZ-2,Cero decimal,0.0\nZ-3,Decimal,2.5\nZ-4,Texto,dos\n'.encode()
+        data = self.upload(content).json()
+        self.assertEqual(data['batches_created'], 0)
+        self.assertEqual([(error['line'], list(error['errors'])) for error in data['errors']], [(4, ['quantity']), (5, ['quantity'])])
+        self.assertFalse(InventoryBatch.objects.filter(product__sku__startswith='Z-').exists())
+
+    def test_stock_count_adjusts_to_counted_quantity(self):
+        InventoryBatch.objects.create(product=self.filter, initial_quantity=4, current_quantity=4)  # 3 + 4 = 7
+        oil = Product.objects.create(owner=self.owner, name='Aceite', sku='AC-3')
+        InventoryBatch.objects.create(product=oil, initial_quantity=2, current_quantity=2)
+        spark = Product.objects.create(owner=self.owner, name='Bujía', sku='BJ-2')
+        InventoryBatch.objects.create(product=spark, initial_quantity=1, current_quantity=1)
+
+        content = 'sku,quantity,unit_cost\nFA-1,5,\nAC-3,6,8000\nBJ-2,0\nNV-1,\n'.encode()
+        response = self.api.post('/api/products/import/', {
+            'file': SimpleUploadedFile('conteo.csv', content), 'mode': 'count',
+        }, format='multipart')
+        data = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((data['units_received'], data['units_removed'], data['batches_created']), (4, 3, 1))
+        self.assertEqual([(error['line'], list(error['errors'])) for error in data['errors']], [(5, ['name'])])
+
+        stock = dict(Product.objects.filter(owner=self.owner).values_list('sku', 'stock_on_hand'))
+        self.assertEqual(stock, {'FA-1': 5, 'AC-3': 6, 'BJ-2': 0})
+        # Lo que faltaba sale del lote más antiguo primero; todo queda como ajuste en el kardex
+        self.assertEqual(list(self.filter.batches.order_by('id').values_list('current_quantity', flat=True)), [1, 4])
+        self.assertEqual(
+            sorted(StockMovement.objects.filter(product__in=[self.filter, oil]).exclude(kind='receipt').values_list('kind', 'quantity')),
+            [('adjustment', -2), ('adjustment', 4)],
+        )
+        self.assertEqual(oil.batches.get(unit_cost=8000).current_quantity, 4)
+
+        response = self.api.post('/api/products/import/', {
+            'file': SimpleUploadedFile('conteo.csv', content), 'mode': 'inventario',
+        }, format='multipart')
+        self.assertEqual(response.status_code, 400)
+
+    def test_queries_per_chunk_do_not_grow_with_rows(self):
+        def run(count, offset):
+            lines = ''.join(f'SKU-{i},Producto {i},1000,5\n' for i in range(offset, offset + count))
+            content = io.BytesIO(('sku,name,sale_price,quantity\n' + lines).encode())
+            with CaptureQueriesContext(connection) as ctx:
+                import_inventory(read_rows(content, 'x.csv'), self.owner, chunk_size=50)
+            return len(ctx)
+
+        self.assertEqual(run(10, 0), run(50, 1000))
+        self.assertEqual(Product.objects.get(owner=self.owner, sku='SKU-1020').stock_on_hand, 5)
+
+
+class StockOnHandTests(TestCase):
+    """stock_on_hand sigue a los lotes en cada alta, edición, borrado y cambio de producto."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('dueno')
+        self.filter = Product.objects.create(owner=self.owner, name='Filtro aceite', sku='FA-1')
+        self.oil = Product.objects.create(owner=self.owner, name='Aceite', sku='AC-3')
+
+    def stock(self):
+        return dict(Product.objects.filter(owner=self.owner).values_list('sku', 'stock_on_hand'))
+
+    def test_batch_create_update_delete_and_reassign(self):
+        batch = InventoryBatch.objects.create(product=self.filter, initial_quantity=5)
+        self.assertEqual(self.stock(), {'FA-1': 5, 'AC-3': 0})
+
+        batch.current_quantity = 3
+        batch.save()
+        self.assertEqual(self.stock(), {'FA-1': 3, 'AC-3': 0})
+
+        # Instancia leída de nuevo y movida a otro producto: sale de uno y entra al otro
+        batch = InventoryBatch.objects.get(pk=batch.pk)
+        batch.product = self.oil
+        batch.save()
+        self.assertEqual(self.stock(), {'FA-1': 0, 'AC-3': 3})
+
+        batch.delete()
+        self.assertEqual(self.stock(), {'FA-1': 0, 'AC-3': 0})
+        self.assertEqual(
+            list(StockMovement.objects.order_by('id').values_list('product__sku', 'kind', 'quantity')),
+            [('FA-1', 'receipt', 5), ('FA-1', 'adjustment', -2), ('FA-1', 'adjustment', -3),
+             ('AC-3', 'adjustment', 3), ('AC-3', 'adjustment', -3)],
+        )
+
+    def test_stale_instance_saves_against_the_stored_quantity(self):
+        batch = InventoryBatch.objects.create(product=self.filter, initial_quantity=10)
+        stale = InventoryBatch.objects.get(pk=batch.pk)  # cargado con 10
+        consume_stock([(self.filter.pk, 3)], owner=self.owner)  # el lote queda en 7
+
+        stale.current_quantity = 12
+        stale.save()
+        self.assertEqual(self.stock(), {'FA-1': 12, 'AC-3': 0})
+        self.assertEqual(
+            list(StockMovement.objects.order_by('id').values_list('kind', 'quantity')),
+            [('receipt', 10), ('consumption', -3), ('adjustment', 5)],
+        )
+
+        # Borrar una instancia vieja descuenta lo que el lote tiene guardado
+        consume_stock([(self.filter.pk, 2)], owner=self.owner)
+        stale.delete()
+        self.assertEqual(self.stock(), {'FA-1': 0, 'AC-3': 0})
+        self.assertEqual(StockMovement.objects.latest('id').quantity, -10)
+
+    def test_verify_stock_reports_and_fixes_drift(self):
+        InventoryBatch.objects.create(product=self.filter, initial_quantity=5)
+        Product.objects.filter(pk=self.oil.pk).update(stock_on_hand=7)  # desfase (ej. un UPDATE a mano)
+
+        out = io.StringIO()
+        call_command('verify_stock', stdout=out)
+        self.assertIn('guardado 7, real 0', out.getvalue())
+        self.assertEqual(self.stock(), {'FA-1': 5, 'AC-3': 7})
+
+        call_command('verify_stock', fix=True, owner=self.owner.pk, stdout=out)
+        self.assertEqual(self.stock(), {'FA-1': 5, 'AC-3': 0})
+        out = io.StringIO()
+        call_command('verify_stock', stdout=out)
+        self.assertIn('Todo el stock cuadra.', out.getvalue())
+
+
+class StockConsumptionTests(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user('dueno')
+        self.product = Product.objects.create(owner=self.owner, name='Filtro aceite', sku='FA-1')
+        # FIFO: primero el que vence antes, aunque haya entrado después
+        self.late = InventoryBatch.objects.create(
+            product=self.product, initial_quantity=5, current_quantity=5,
+            entry_date=date(2026, 1, 1), expiration_date=date(2027, 6, 30),
+        )
+        self.early = InventoryBatch.objects.create(
+            product=self.product, initial_quantity=2, current_quantity=2,
+            entry_date=date(2026, 2, 1), expiration_date=date(2027, 1, 31),
+        )
+
+    def stock(self):
+        self.product.refresh_from_db()
+        return self.product.stock_on_hand, [
+            batch.current_quantity for batch in InventoryBatch.objects.filter(pk__in=[self.early.pk, self.late.pk]).order_by('expiration_date')
+        ]
+
+    def consumptions(self):
+        return list(StockMovement.objects.filter(kind='consumption').order_by('id').values_list('batch_id', 'quantity'))
+
+    def test_exact_depletion_of_a_batch(self):
+        result = consume_stock([(self.product.pk, 2)], owner=self.owner)
+        self.assertFalse(result.has_shortfalls)
+        self.assertEqual(result.allocations, [{'product_id': self.product.pk, 'batch_id': self.early.pk, 'quantity': 2}])
+        self.assertEqual(self.stock(), (5, [0, 5]))
+        self.assertEqual(self.consumptions(), [(self.early.pk, -2)])
+
+    def test_spills_into_the_next_batch_and_groups_lines(self):
+        result = consume_stock([(self.product.pk, 3), (self.product.pk, 1), (self.product.pk, 0)], owner=self.owner)
+        self.assertEqual([(a['batch_id'], a['quantity']) for a in result.allocations], [(self.early.pk, 2), (self.late.pk, 2)])
+        self.assertEqual(self.stock(), (3, [0, 3]))
+        self.assertEqual(self.consumptions(), [(self.early.pk, -2), (self.late.pk, -2)])
+
+    def test_shortfalls_take_what_there_is(self):
+        foreign = Product.objects.create(owner=User.objects.create_user('otro'), name='Ajeno', sku='FA-1')
+        InventoryBatch.objects.create(product=foreign, initial_quantity=9, current_quantity=9)
+
+        result = consume_stock([(self.product.pk, 10), (foreign.pk, 1)], owner=self.owner)
+        self.assertEqual(result.shortfalls, [
+            {'product_id': self.product.pk, 'product_name': 'Filtro aceite', 'requested': 10, 'allocated': 7, 'missing': 3},
+            {'product_id': foreign.pk, 'product_name': None, 'requested': 1, 'allocated': 0, 'missing': 1},
+        ])
+        self.assertEqual(self.stock(), (0, [0, 0]))
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.stock_on_hand, 9)
+
+    def test_rolls_back_with_the_surrounding_transaction(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                consume_stock([(self.product.pk, 4)], owner=self.owner)
+                raise RuntimeError('falla al crear la orden')
+        self.assertEqual(self.stock(), (7, [2, 5]))
+        self.assertEqual(self.consumptions(), [])
+
+    def test_ledger_rows_link_the_work_order(self):
+        client = Client.objects.create(owner=self.owner, first_name='Ana', last_name='Pérez')
+        vehicle = Vehicle.objects.create(client=client, brand='Kia', model='Rio', year=2020, plate='AB1234')
+        evaluation = Evaluation.objects.create(owner=self.owner, client=client, vehicle=vehicle)
+        order = WorkOrder.objects.create(evaluation=evaluation, owner=self.owner, folio=evaluation.folio)
+
+        consume_stock([(self.product.pk, 3)], owner=self.owner, work_order=order)
+        movements = StockMovement.objects.filter(work_order=order).order_by('id')
+        self.assertEqual([(m.kind, m.batch_id, m.quantity) for m in movements], [
+            ('consumption', self.early.pk, -2), ('consumption', self.late.pk, -1),
+        ])
+        # El kardex cuadra con el stock: entradas - consumos
+        self.assertEqual(self.product.movements.aggregate(total=Sum('quantity'))['total'], self.stock()[0])
+
+
+class LowStockTests(TestCase):
+
+    def test_low_stock_products_compares_each_reorder_point(self):
+        owner = User.objects.create_user('dueno')
+        for sku, name, reorder_point, quantity in (
+            ('A-1', 'Pastillas', 5, 4),   # bajo
+            ('B-2', 'Aceite', 5, 5),      # justo en el punto: no
+            ('C-3', 'Bujía', 0, 0),       # sin punto de reorden
+            ('D-4', 'Correa', 10, 0),     # bajo, sin lotes
+        ):
+            product = Product.objects.create(owner=owner, name=name, sku=sku, reorder_point=reorder_point)
+            if quantity:
+                InventoryBatch.objects.create(product=product, initial_quantity=quantity)
+        Product.objects.create(owner=User.objects.create_user('otro'), name='Ajeno', sku='A-1', reorder_point=5)
+
+        self.assertEqual([product.sku for product in low_stock_products(owner)], ['D-4', 'A-1'])
+
+        # Al consumir, el producto entra al reporte sin recalcular nada
+        consume_stock([(Product.objects.get(owner=owner, sku='B-2').pk, 1)], owner=owner)
+        self.assertEqual([product.sku for product in low_stock_products(owner)], ['B-2', 'D-4', 'A-1'])
+
+        api = APIClient()
+        api.force_authenticate(owner)
+        self.assertEqual([row['sku'] for row in api.get('/api/products/low-stock/').json()], ['B-2', 'D-4', 'A-1'])
+
+
+class StockLedgerTests(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user('dueno')
+        self.product = Product.objects.create(owner=self.owner, name='Filtro aceite', sku='FA-1')
+        self.now = timezone.now()
+        # Historia: +10 hace 3 días, -4 hace 2 días, +5 ayer
+        self.history = [self.now - timedelta(days=days) for days in (3, 2, 1)]
+        InventoryBatch.objects.create(product=self.product, initial_quantity=10, current_quantity=10)
+        self.backdate(self.history[0])
+        consume_stock([(self.product.pk, 4)], owner=self.owner)
+        self.backdate(self.history[1])
+        InventoryBatch.objects.create(product=self.product, initial_quantity=5, current_quantity=5)
+        self.backdate(self.history[2])
+
+    def backdate(self, when):
+        # El kardex no se edita con save(); para armar la historia movemos la fecha con un UPDATE
+        StockMovement.objects.filter(pk=StockMovement.objects.latest('id').pk).update(created_at=when)
+
+    def stock_at(self, when):
+        return stock_at(Product.objects.filter(pk=self.product.pk), when).get().historical_stock
+
+    def test_movements_are_append_only(self):
+        movement = StockMovement.objects.first()
+        movement.quantity = 99
+        with self.assertRaises(ValueError):
+            movement.save()
+
+    def test_stock_at_matches_live_stock_and_past_values(self):
+        self.product.refresh_from_db()
+        self.assertEqual(self.stock_at(self.now), self.product.stock_on_hand)
+        self.assertEqual(self.stock_at(self.now), 11)
+        hour = timedelta(hours=1)
+        self.assertEqual([self.stock_at(when + hour) for when in self.history], [10, 6, 11])
+        self.assertEqual(self.stock_at(self.history[0] - hour), 0)
+
+    def test_snapshot_command_is_the_new_starting_point(self):
+        when = self.history[1] + timedelta(hours=1)
+        other = Product.objects.create(owner=User.objects.create_user('otro'), name='Ajeno', sku='X-1')
+        out = io.StringIO()
+        call_command('snapshot_stock', owner=self.owner.pk, at=when.isoformat(), stdout=out)
+        self.assertIn('1 foto(s)', out.getvalue())
+        self.assertEqual(list(StockSnapshot.objects.values_list('product_id', 'taken_at', 'quantity')), [(self.product.pk, when, 6)])
+        self.assertFalse(other.snapshots.exists())
+
+        # Desde la foto sólo se suman los movimientos posteriores: lo anterior ya no se lee
+        StockMovement.objects.filter(created_at__lt=when).delete()
+        self.assertEqual(self.stock_at(self.now), 11)
+
+        with self.assertRaises(CommandError):
+            call_command('snapshot_stock', at='ayer')
+
+
+class InventoryListQueryTests(TestCase):
+    """Productos y lotes no tienen anidados: el costo del listado no depende de las filas."""
+
+    def setUp(self):
+        response_cache().clear()
+        self.owner = User.objects.create_user('dueno')
+        self.api = APIClient()
+        self.created = 0
+
+    def create_products(self, count):
+        for _ in range(count):
+            self.created += 1
+            product = Product.objects.create(owner=self.owner, name='Filtro', sku=f'F-{self.created:03d}')
+            InventoryBatch.objects.create(product=product, initial_quantity=3)
+            InventoryBatch.objects.create(product=product, initial_quantity=2)
+
+    def count_queries(self, url):
+        self.api.force_authenticate(User.objects.get(pk=self.owner.pk))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.api.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx)
+
+    def test_list_query_counts_are_constant(self):
+        # productos: auth (perfil) + versión para el ETag + página; lotes: auth + página
+        for url, expected in (('/api/products/', 3), ('/api/batches/', 2)):
+            self.create_products(2)
+            few = self.count_queries(url)
+            self.create_products(6)
+            self.assertEqual((few, self.count_queries(url)), (expected, expected))
+
+
+class ProductPaginationTests(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user('dueno')
+        # Nombres y stocks repetidos: sólo el SKU desempata
+        for i in range(7):
+            Product.objects.create(owner=self.owner, name=('Filtro', 'Aceite')[i % 2], sku=f'F-{i:02d}')
+            Product.objects.filter(owner=self.owner, sku=f'F-{i:02d}').update(stock_on_hand=i // 3)
+        self.api = APIClient()
+        self.api.force_authenticate(self.owner)
+
+    def walk(self, **params):
+        skus, url, params = [], '/api/products/', {'page_size': 3, **params}
+        while url:
+            data = self.api.get(url, params).json()
+            skus += [product['sku'] for product in data['results']]
+            url, params = data['next'], {}
+        return skus, data
+
+    def test_cursor_walks_every_product_once_with_ties(self):
+        skus, _ = self.walk()
+        self.assertEqual(skus, ['F-01', 'F-03', 'F-05', 'F-00', 'F-02', 'F-04', 'F-06'])
+
+        # stock 0: F-00..F-02, 1: F-03..F-05, 2: F-06
+        skus, last_page = self.walk(ordering='-stock_on_hand')
+        self.assertEqual(skus, ['F-06', 'F-05', 'F-04', 'F-03', 'F-02', 'F-01', 'F-00'])
+        skus, _ = self.walk(ordering='stock_on_hand')
+        self.assertEqual(skus, [f'F-{i:02d}' for i in range(7)])
+
+        # Volviendo con `previous` desde la última página se recorre lo mismo al revés
+        back, url = [], last_page['previous']
+        while url:
+            data = self.api.get(url).json()
+            back = [product['sku'] for product in data['results']] + back
+            url = data['previous']
+        self.assertEqual(back, ['F-06', 'F-05', 'F-04', 'F-03', 'F-02', 'F-01'])
+
+    def test_tampered_cursor_is_rejected(self):
+        self.assertEqual(self.api.get('/api/products/', {'cursor': 'cD1ub3Rqc29u'}).status_code, 404)
+
+
+class ProductExportTests(TestCase):
+
+    def test_export_applies_list_filters(self):
+        owner = User.objects.create_user('dueno')
+        for sku, quantity in (('A-1', 2), ('B-2', 40)):
+            product = Product.objects.create(owner=owner, name=f'Producto {sku}', sku=sku)
+            InventoryBatch.objects.create(product=product, initial_quantity=quantity, current_quantity=quantity)
+        Product.objects.create(owner=User.objects.create_user('otro'), name='Ajeno', sku='A-1')
+
+        api = APIClient()
+        api.force_authenticate(owner)
+        response = api.get('/api/products/export/', {'stock_lte': 5})
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+
+        self.assertEqual(rows[0][:2], ['SKU', 'Nombre'])
+        self.assertEqual([(row[0], row[5]) for row in rows[1:]], [('A-1', '2')])
 
-# Create your tests here.
+        # El export no pagina: acepta ordenar por stock
+        response = api.get('/api/products/export/', {'ordering': '-stock_on_hand'})
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+        self.assertEqual([row[0] for row in rows[1:]], ['B-2', 'A-1'])
@@ -1,24 +1,89 @@
 # inventory/views.py
-from rest_framework import viewsets, permissions, status
+from rest_framework import viewsets, permissions, status, filters
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import FormParser, MultiPartParser
+from datetime import date, datetime, time, timedelta
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from backend.conditional import ConditionalGetMixin
+from backend.exports import export_format, export_response
+from backend.imports import TooManyRows, check_upload_rows, read_rows
+from backend.pagination import KeysetCursorPagination
+from .exports import PRODUCT_EXPORT_COLUMNS
+from .imports import RECEIPT_MODE, import_inventory
 from .models import Product, InventoryBatch
-from .serializers import ProductSerializer, InventoryBatchSerializer
-from accounts.utils import get_data_owner
+from .serializers import ProductSerializer, InventoryBatchSerializer, StockMovementSerializer, LowStockProductSerializer
+from .services import stock_at, low_stock_products
 
 # --- VIEWSET 1: GESTIÓN DE PRODUCTOS (CATÁLOGO) ---
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = ProductSerializer
     permission_classes = [permissions.IsAuthenticated]
+    etag_resources = ('products',)
+    filter_backends = [filters.OrderingFilter]
+    # ?ordering=stock_on_hand / ?ordering=-stock_on_hand (usa el índice owner+stock).
+    # Nombre y stock repiten valores: el cursor pagina sobre (campo, sku), sku es único por taller.
+    ordering_fields = ['name', 'sku', 'stock_on_hand', 'created_at']
+    ordering = ['name', 'sku']
+    pagination_class = KeysetCursorPagination
+    cursor_tiebreaker = 'sku'
+
+    # Filtros por stock: ?stock_lte=5, ?stock_gte=1
+    STOCK_FILTERS = {'stock_lte': 'stock_on_hand__lte', 'stock_gte': 'stock_on_hand__gte'}
 
     def get_queryset(self):
-        target_user = get_data_owner(self.request.user)
-        return Product.objects.filter(owner=target_user).order_by('name')
+        target_user = self.request.tenant.data_owner
+        queryset = Product.objects.filter(owner=target_user).order_by('name', 'sku')
+
+        for param, lookup in self.STOCK_FILTERS.items():
+            value = self.request.query_params.get(param)
+            if value in (None, ''):
+                continue
+            try:
+                queryset = queryset.filter(**{lookup: int(value)})
+            except ValueError:
+                raise ValidationError({param: "Debe ser un número entero."})
+        return queryset
 
     def perform_create(self, serializer):
-        target_user = get_data_owner(self.request.user)
+        target_user = self.request.tenant.data_owner
         serializer.save(owner=target_user)
 
+    # Carga masiva: POST /api/products/import/ con el archivo en 'file' (CSV, XLSX o JSON lines)
+    # y 'mode' = receipt (por defecto) | count (conteo de bodega).
+    # Columnas y reglas del upsert en inventory/imports.py. Hasta settings.IMPORT_MAX_UPLOAD_ROWS
+    # filas (413 si pasa: se usa el comando import_inventory).
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser])
+    def import_file(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "Debes adjuntar el archivo en el campo 'file'."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            check_upload_rows(upload, settings.IMPORT_MAX_UPLOAD_ROWS)
+            report = import_inventory(
+                read_rows(upload, upload.name), request.tenant.data_owner,
+                mode=request.data.get('mode') or RECEIPT_MODE,
+            )
+        except TooManyRows as exc:
+            return Response(
+                {"error": f"{exc} Para cargas grandes usa `python manage.py import_inventory <archivo> --owner <usuario>`."},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report.as_dict())
+
+    # Export del catálogo con stock: GET /api/products/export/?file_format=csv|xlsx
+    # (acepta los mismos ?stock_lte / ?stock_gte / ?ordering que el listado)
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        file_format = export_format(request.query_params)
+        queryset = self.filter_queryset(self.get_queryset())
+        return export_response(queryset, PRODUCT_EXPORT_COLUMNS, 'inventario', file_format)
+
     # Endpoint extra para ver los lotes de un producto específico
     # GET /api/inventory/products/{id}/batches/
     @action(detail=True, methods=['get'])
@@ -29,14 +94,60 @@ class ProductViewSet(viewsets.ModelViewSet):
         serializer = InventoryBatchSerializer(batches, many=True)
         return Response(serializer.data)
 
+    # Reporte de reposición: GET /api/products/low-stock/
+    @action(detail=False, methods=['get'], url_path='low-stock')
+    def low_stock(self, request):
+        target_user = request.tenant.data_owner
+        serializer = LowStockProductSerializer(low_stock_products(target_user), many=True)
+        return Response(serializer.data)
+
+    # Kardex del producto: GET /api/products/{id}/movements/
+    @action(detail=True, methods=['get'])
+    def movements(self, request, pk=None):
+        product = self.get_object()
+        movements = product.movements.order_by('-created_at', '-id')[:200]
+        serializer = StockMovementSerializer(movements, many=True)
+        return Response(serializer.data)
+
+    # Stock a una fecha: GET /api/products/stock-at/?date=2026-10-01 (cierre de ese día)
+    # o ?at=2026-10-01T09:00:00Z para un instante exacto
+    @action(detail=False, methods=['get'], url_path='stock-at')
+    def historical_stock(self, request):
+        when = self._parse_when(request.query_params)
+        products = stock_at(self.get_queryset(), when).values('id', 'sku', 'name', 'historical_stock')
+        return Response({
+            "at": when,
+            "results": [
+                {"id": p['id'], "sku": p['sku'], "name": p['name'], "stock": p['historical_stock']}
+                for p in products
+            ],
+        })
+
+    @staticmethod
+    def _parse_when(params):
+        if params.get('at'):
+            when = parse_datetime(params['at'])
+            if when is None:
+                raise ValidationError({"at": "Formato de fecha/hora inválido (ISO 8601)."})
+            return when if timezone.is_aware(when) else timezone.make_aware(when)
+        if params.get('date'):
+            try:
+                day = date.fromisoformat(params['date'])
+            except ValueError:
+                raise ValidationError({"date": "La fecha debe tener formato YYYY-MM-DD."})
+            # Cierre del día = justo antes de la medianoche siguiente
+            return timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min)) - timedelta(microseconds=1)
+        return timezone.now()
+
 
 # --- VIEWSET 2: GESTIÓN DE LOTES (ENTRADAS DE MERCADERÍA) ---
 class InventoryBatchViewSet(viewsets.ModelViewSet):
     serializer_class = InventoryBatchSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = '-entry_date'
 
     def get_queryset(self):
-        target_user = get_data_owner(self.request.user)
+        target_user = self.request.tenant.data_owner
         # Filtramos lotes de productos que pertenezcan al usuario
         return InventoryBatch.objects.filter(product__owner=target_user).order_by('-entry_date')
 
@@ -53,7 +164,7 @@ class InventoryBatchViewSet(viewsets.ModelViewSet):
         
         # Seguridad: Validar que el producto al que le agregan stock sea del usuario
         product = serializer.validated_data['product']
-        target_user = get_data_owner(request.user)
+        target_user = request.tenant.data_owner
         
         if product.owner != target_user:
              return Response({"error": "No tienes permiso para agregar stock a este producto."}, status=403)
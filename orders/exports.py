@@ -0,0 +1,27 @@
+# orders/exports.py
+"""Columnas y anotaciones del export de órdenes de trabajo (ver backend/exports.py)."""
+from django.db.models import Value
+from django.db.models.functions import Concat
+
+from evaluations.exports import items_total
+
+WORK_ORDER_EXPORT_COLUMNS = [
+    ('Folio', 'folio'),
+    ('Estado', 'status'),
+    ('Creada', 'created_at'),
+    ('Última actualización', 'updated_at'),
+    ('Cliente', 'client_name'),
+    ('RUT', 'evaluation__client__rut'),
+    ('Patente', 'evaluation__vehicle__plate'),
+    ('Marca', 'evaluation__vehicle__brand'),
+    ('Modelo', 'evaluation__vehicle__model'),
+    ('Mecánico', 'mechanic__username'),
+    ('Total aprobado', 'approved_total'),
+]
+
+
+def annotate_for_export(queryset):
+    return queryset.annotate(
+        client_name=Concat('evaluation__client__first_name', Value(' '), 'evaluation__client__last_name'),
+        approved_total=items_total('evaluation_id', approved_only=True),
+    )
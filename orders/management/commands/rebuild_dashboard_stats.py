@@ -0,0 +1,45 @@
+# orders/management/commands/rebuild_dashboard_stats.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.models import DashboardStats
+from orders.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = "Recalcula los contadores del dashboard (DashboardStats) y reporta las diferencias encontradas."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--owner",
+            help="ID o username del dueño a recalcular. Si se omite, se recalculan todos.",
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        owner = options.get("owner")
+
+        if owner:
+            lookup = {"pk": owner} if owner.isdigit() else {"username": owner}
+            try:
+                owner_ids = [User.objects.get(**lookup).pk]
+            except User.DoesNotExist:
+                raise CommandError(f"No existe el usuario '{owner}'.")
+        else:
+            # Dueños con datos propios (los empleados no tienen fila de stats)
+            owner_ids = list(
+                User.objects.filter(profile__employer__isnull=True).values_list("pk", flat=True)
+            ) + list(DashboardStats.objects.values_list("owner_id", flat=True))
+            owner_ids = sorted(set(owner_ids))
+
+        with_drift = 0
+        for owner_id in owner_ids:
+            _, drift = rebuild_stats(owner_id)
+            if drift:
+                with_drift += 1
+                detail = ", ".join(f"{field}: {stored} -> {real}" for field, (stored, real) in drift.items())
+                self.stdout.write(self.style.WARNING(f"Dueño {owner_id}: {detail}"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(owner_ids)} dueño(s) recalculados, {with_drift} con diferencias corregidas."
+        ))
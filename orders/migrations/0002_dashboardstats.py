@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('orders', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardStats',
+            fields=[
+                ('owner', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='dashboard_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('orders_pending', models.IntegerField(default=0)),
+                ('orders_in_progress', models.IntegerField(default=0)),
+                ('orders_waiting_parts', models.IntegerField(default=0)),
+                ('orders_finished', models.IntegerField(default=0)),
+                ('orders_delivered', models.IntegerField(default=0)),
+                ('evals_draft', models.IntegerField(default=0)),
+                ('evals_sent', models.IntegerField(default=0)),
+                ('evals_approved', models.IntegerField(default=0)),
+                ('evals_rejected', models.IntegerField(default=0)),
+                ('total_clients', models.IntegerField(default=0)),
+                ('total_vehicles', models.IntegerField(default=0)),
+                ('low_stock_batches', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:28
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_dashboardstats'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='dashboardstats',
+            name='low_stock_batches',
+        ),
+    ]
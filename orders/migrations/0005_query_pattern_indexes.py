@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evaluations', '0004_query_pattern_indexes'),
+        ('orders', '0004_list_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(fields=['owner', 'status'], name='workorder_owner_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(condition=models.Q(('status__in', ['finished', 'delivered'])), fields=['owner', 'updated_at'], name='workorder_finished_idx'),
+        ),
+    ]
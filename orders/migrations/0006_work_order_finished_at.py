@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_updated_at(apps, schema_editor):
+    # Sin historial de estados: para las ya terminadas, la última edición es lo más cercano
+    WorkOrder = apps.get_model('orders', 'WorkOrder')
+    WorkOrder.objects.filter(status__in=['finished', 'delivered']).update(finished_at=models.F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evaluations', '0004_query_pattern_indexes'),
+        ('orders', '0005_query_pattern_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='workorder',
+            name='workorder_finished_idx',
+        ),
+        migrations.AddField(
+            model_name='workorder',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Fecha de término'),
+        ),
+        migrations.RunPython(copy_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(condition=models.Q(('status__in', ['finished', 'delivered'])), fields=['owner', 'finished_at'], name='workorder_finished_at_idx'),
+        ),
+    ]
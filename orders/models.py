@@ -1,6 +1,7 @@
 # orders/models.py
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from evaluations.models import Evaluation
 
 class WorkOrder(models.Model):
@@ -11,6 +12,8 @@ class WorkOrder(models.Model):
         ('finished', 'Terminado'),
         ('delivered', 'Entregado'),
     ]
+    FINISHED_STATUSES = ['finished', 'delivered']
+
     evaluation = models.OneToOneField(Evaluation, on_delete=models.CASCADE, related_name='work_order')
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="work_orders")
     mechanic = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="assigned_orders")
@@ -30,10 +33,75 @@ class WorkOrder(models.Model):
     
     start_date = models.DateTimeField(null=True, blank=True)
     end_date = models.DateTimeField(null=True, blank=True)
+    # Cuándo pasó a terminada/entregada (lo fija save(); los ingresos se agrupan por esta fecha)
+    finished_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Fecha de término")
     internal_notes = models.TextField(blank=True, verbose_name="Notas para mecánico")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Listado paginado por cursor: WHERE owner = ? ORDER BY created_at DESC
+            models.Index(fields=['owner', '-created_at'], name='workorder_owner_created_idx'),
+            # Conteos y filtros por estado del taller
+            models.Index(fields=['owner', 'status'], name='workorder_owner_status_idx'),
+            # Ingresos (orders.stats.revenue_series): sólo órdenes terminadas/entregadas, por fecha de término
+            models.Index(
+                fields=['owner', 'finished_at'],
+                condition=models.Q(status__in=['finished', 'delivered']),
+                name='workorder_finished_at_idx',
+            ),
+        ]
+
     def __str__(self):
         # Usamos el Folio para la representación en texto
-        return f"OT #{self.folio} - {self.evaluation.vehicle}"
\ No newline at end of file
+        return f"OT #{self.folio} - {self.evaluation.vehicle}"
+
+    def save(self, *args, **kwargs):
+        # Terminada -> entregada conserva la fecha; si se reabre, se borra
+        if self.status in self.FINISHED_STATUSES:
+            if self.finished_at is None:
+                self.finished_at = timezone.now()
+        else:
+            self.finished_at = None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'status' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'finished_at'}
+        super().save(*args, **kwargs)
+
+class DashboardStats(models.Model):
+    """
+    Contadores del dashboard por taller (dueño de los datos).
+    Se mantienen con incrementos atómicos desde orders/signals.py, así el
+    bloque de KPIs se resuelve con una sola lectura por clave primaria.
+    Si los contadores se desfasan, se recalculan con `rebuild_dashboard_stats`.
+    (El stock bajo no va aquí: depende del punto de reorden de cada producto,
+    ver inventory.services.low_stock_products.)
+    """
+    owner = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="dashboard_stats"
+    )
+
+    # Órdenes de trabajo por estado
+    orders_pending = models.IntegerField(default=0)
+    orders_in_progress = models.IntegerField(default=0)
+    orders_waiting_parts = models.IntegerField(default=0)
+    orders_finished = models.IntegerField(default=0)
+    orders_delivered = models.IntegerField(default=0)
+
+    # Evaluaciones por estado
+    evals_draft = models.IntegerField(default=0)
+    evals_sent = models.IntegerField(default=0)
+    evals_approved = models.IntegerField(default=0)
+    evals_rejected = models.IntegerField(default=0)
+
+    total_clients = models.IntegerField(default=0)
+    total_vehicles = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats de {self.owner_id}"
@@ -2,9 +2,13 @@
 from rest_framework import serializers
 from .models import WorkOrder
 from evaluations.serializers import EvaluationSerializer
+from backend.serializers import DynamicFieldsMixin, expands, nested_selection
 
-class WorkOrderSerializer(serializers.ModelSerializer):
+class WorkOrderSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     evaluation_data = EvaluationSerializer(source='evaluation', read_only=True)
+    # Datos planos para los listados, sin tener que expandir la evaluación
+    vehicle_plate = serializers.CharField(source='evaluation.vehicle.plate', read_only=True)
+    client_name = serializers.SerializerMethodField()
     mechanic_name = serializers.SerializerMethodField()
     updated_by_name = serializers.SerializerMethodField()
     updated_by_role = serializers.SerializerMethodField()
@@ -15,16 +19,34 @@ class WorkOrderSerializer(serializers.ModelSerializer):
             'id', 
             'folio',  # 👈 DEBE ESTAR AQUÍ
             'evaluation', 'evaluation_data', 
+            'vehicle_plate', 'client_name',
             'owner', 
             'mechanic', 'mechanic_name', 
             'status', 
             'last_status_change_by',
             'updated_by_name',
             'updated_by_role',
-            'start_date', 'end_date', 'internal_notes', 
+            'start_date', 'end_date', 'finished_at', 'internal_notes', 
             'created_at'
         ]
-        read_only_fields = ['owner', 'created_at']
+        read_only_fields = ['owner', 'finished_at', 'created_at']
+        expandable_fields = ['evaluation_data']
+
+    @staticmethod
+    def setup_eager_loading(queryset, selection=None):
+        """Plan de carga: usuarios (con perfil) en el JOIN y la evaluación anidada con su propio plan."""
+        queryset = queryset.select_related(
+            'evaluation__client', 'evaluation__vehicle', 'mechanic', 'last_status_change_by__profile'
+        )
+        if expands(selection, 'evaluation_data'):
+            queryset = EvaluationSerializer.setup_eager_loading(
+                queryset, prefix='evaluation__', selection=nested_selection(selection, 'evaluation_data')
+            )
+        return queryset
+
+    def get_client_name(self, obj):
+        client = obj.evaluation.client
+        return f"{client.first_name} {client.last_name}"
 
     def get_mechanic_name(self, obj):
         if obj.mechanic: return obj.mechanic.username
@@ -0,0 +1,96 @@
+# orders/signals.py
+"""
+Mantiene DashboardStats al día con cada escritura de órdenes, evaluaciones,
+clientes y vehículos.
+
+Cada modelo seguido define una función `state(instance)` que dice en qué
+contador cae la fila: (dueño, campo) o None si no cuenta. Guardamos ese estado
+al cargar la instancia (post_init) y al guardar comparamos contra el nuevo:
+si cambió, restamos en el contador viejo y sumamos en el nuevo. Los UPDATE
+corren dentro de la misma transacción que la escritura que los provoca.
+"""
+from django.contrib.auth.models import User
+from django.db.models.signals import post_init, post_save, pre_delete
+
+from .models import WorkOrder
+from .stats import ORDER_STATUS_FIELDS, EVAL_STATUS_FIELDS, bump
+from evaluations.models import Evaluation
+from clients.models import Client, Vehicle
+
+UNKNOWN = object()
+
+
+def _loaded(instance, *attnames):
+    # Evita disparar queries extra si la instancia se cargó con .only()/.defer()
+    return all(name in instance.__dict__ for name in attnames)
+
+
+def _order_state(instance):
+    if not _loaded(instance, 'owner_id', 'status'):
+        return UNKNOWN
+    field = ORDER_STATUS_FIELDS.get(instance.status)
+    return (instance.owner_id, field) if field else None
+
+
+def _evaluation_state(instance):
+    if not _loaded(instance, 'owner_id', 'status'):
+        return UNKNOWN
+    field = EVAL_STATUS_FIELDS.get(instance.status)
+    return (instance.owner_id, field) if field else None
+
+
+def _client_state(instance):
+    if not _loaded(instance, 'owner_id'):
+        return UNKNOWN
+    return (instance.owner_id, 'total_clients')
+
+
+def _vehicle_state(instance):
+    if not _loaded(instance, 'owner_id'):
+        return UNKNOWN
+    return (instance.owner_id, 'total_vehicles')
+
+
+# modelo -> función de estado
+TRACKED = {
+    WorkOrder: _order_state,
+    Evaluation: _evaluation_state,
+    Client: _client_state,
+    Vehicle: _vehicle_state,
+}
+
+
+def _apply(old, new):
+    if old is UNKNOWN or new is UNKNOWN or old == new:
+        return
+    for state, delta in ((old, -1), (new, 1)):
+        if state is None or state[0] is None:
+            continue
+        owner_id, field = state
+        bump(owner_id, **{field: delta})
+
+
+def remember_state(sender, instance, **kwargs):
+    instance._dashboard_state = TRACKED[sender](instance)
+
+
+def update_counters_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:  # loaddata
+        return
+    new = TRACKED[sender](instance)
+    old = None if created else getattr(instance, '_dashboard_state', UNKNOWN)
+    _apply(old, new)
+    instance._dashboard_state = new
+
+
+def update_counters_on_delete(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, User):  # se está borrando la cuenta: su fila de contadores se borra con ella
+        return
+    _apply(TRACKED[sender](instance), None)
+
+
+for model in TRACKED:
+    post_init.connect(remember_state, sender=model, dispatch_uid=f"dashboard_init_{model.__name__}")
+    post_save.connect(update_counters_on_save, sender=model, dispatch_uid=f"dashboard_save_{model.__name__}")
+    pre_delete.connect(update_counters_on_delete, sender=model, dispatch_uid=f"dashboard_delete_{model.__name__}")
+
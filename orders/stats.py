@@ -0,0 +1,190 @@
+# orders/stats.py
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, DateField, DecimalField, F, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from accounts.versions import touch
+from .models import WorkOrder, DashboardStats
+from evaluations.models import Evaluation
+from clients.models import Client, Vehicle
+
+ACTIVE_ORDER_STATUSES = ['pending', 'in_progress', 'waiting_parts']
+FINISHED_ORDER_STATUSES = WorkOrder.FINISHED_STATUSES
+
+# Estado -> columna del contador en DashboardStats
+ORDER_STATUS_FIELDS = {status: f"orders_{status}" for status, _ in WorkOrder.STATUS_CHOICES}
+EVAL_STATUS_FIELDS = {status: f"evals_{status}" for status, _ in Evaluation.STATUS_CHOICES}
+
+COUNTER_FIELDS = (
+    list(ORDER_STATUS_FIELDS.values())
+    + list(EVAL_STATUS_FIELDS.values())
+    + ['total_clients', 'total_vehicles']
+)
+
+
+def compute_stats(owner_id):
+    """Calcula los contadores desde cero con las tablas reales (4 queries)."""
+    values = {field: 0 for field in COUNTER_FIELDS}
+
+    orders = WorkOrder.objects.filter(owner_id=owner_id).values('status').annotate(count=Count('id'))
+    for row in orders:
+        if row['status'] in ORDER_STATUS_FIELDS:
+            values[ORDER_STATUS_FIELDS[row['status']]] = row['count']
+
+    evals = Evaluation.objects.filter(owner_id=owner_id).values('status').annotate(count=Count('id'))
+    for row in evals:
+        if row['status'] in EVAL_STATUS_FIELDS:
+            values[EVAL_STATUS_FIELDS[row['status']]] = row['count']
+
+    values['total_clients'] = Client.objects.filter(owner_id=owner_id).count()
+    values['total_vehicles'] = Vehicle.objects.filter(owner_id=owner_id).count()
+    return values
+
+
+def rebuild_stats(owner_id):
+    """
+    Recalcula la fila de contadores de un dueño.
+    Retorna (stats, drift) donde drift = {campo: (guardado, real)} para los que no cuadraban.
+    """
+    with transaction.atomic():
+        # Creamos la fila si falta y la bloqueamos, para que los incrementos concurrentes esperen
+        # al recálculo. Si otra request la crea al mismo tiempo, get_or_create vuelve a leerla.
+        stats, created = DashboardStats.objects.select_for_update().get_or_create(owner_id=owner_id)
+        values = compute_stats(owner_id)
+
+        drift = {}
+        if not created:
+            for field, real in values.items():
+                stored = getattr(stats, field)
+                if stored != real:
+                    drift[field] = (stored, real)
+
+        for field, real in values.items():
+            setattr(stats, field, real)
+        stats.save()
+        if drift:
+            # Las respuestas cacheadas del dashboard mostraban los contadores desfasados
+            touch(owner_id, 'orders')
+    return stats, drift
+
+
+def get_stats(owner):
+    """Lee los contadores del dueño; la primera vez se construyen desde las tablas."""
+    try:
+        return DashboardStats.objects.get(owner_id=owner.pk)
+    except DashboardStats.DoesNotExist:
+        stats, _ = rebuild_stats(owner.pk)
+        return stats
+
+
+def bump(owner_id, **deltas):
+    """
+    Suma/resta en los contadores de un dueño con un UPDATE atómico (F()).
+    Si el dueño todavía no tiene fila, se construye completa al confirmar la
+    transacción: así no se pierde el cambio si otra request la estaba creando
+    (su recálculo no veía esta escritura todavía sin confirmar).
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if owner_id is None or not deltas:
+        return
+    updated = DashboardStats.objects.filter(owner_id=owner_id).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+    if not updated:
+        transaction.on_commit(lambda: rebuild_stats(owner_id))
+
+
+# --- Ingresos (gráfico de barras) ---
+
+REVENUE_TRUNCS = {
+    'month': TruncMonth,
+    'week': TruncWeek,  # semanas ISO, parten el lunes
+    'day': TruncDay,
+}
+
+# Tope de barras por consulta para no devolver series gigantes (ej. 10 años por día)
+MAX_REVENUE_BUCKETS = 400
+
+
+def bucket_start(day, granularity):
+    if granularity == 'month':
+        return day.replace(day=1)
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def next_bucket(day, granularity):
+    if granularity == 'month':
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    if granularity == 'week':
+        return day + timedelta(days=7)
+    return day + timedelta(days=1)
+
+
+def bucket_label(day, granularity):
+    if granularity == 'month':
+        return day.strftime("%Y-%m")
+    return day.isoformat()
+
+
+def revenue_buckets(start, end, granularity, limit=None):
+    """Inicios de periodo de calendario que cubren [start, end] (ambos inclusive)."""
+    buckets = []
+    current = bucket_start(start, granularity)
+    while current <= end and (limit is None or len(buckets) < limit):
+        buckets.append(current)
+        current = next_bucket(current, granularity)
+    return buckets
+
+
+def revenue_series(owner, start, end, granularity='month'):
+    """
+    Ingresos de órdenes terminadas/entregadas entre `start` y `end` (fechas, inclusive),
+    agrupados por mes/semana/día en la base de datos: SUM(precio * cantidad) de los
+    ítems aprobados. Cada orden cae en el periodo de su `finished_at` (fecha de término).
+    Retorna una lista con todos los periodos del rango, rellenando con 0 los vacíos.
+    """
+    trunc = REVENUE_TRUNCS[granularity]
+    tz = timezone.get_current_timezone()
+    start_dt = timezone.make_aware(datetime.combine(start, time.min), tz)
+    end_dt = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz)
+
+    rows = (
+        WorkOrder.objects.filter(
+            owner=owner,
+            status__in=FINISHED_ORDER_STATUSES,
+            finished_at__gte=start_dt,
+            finished_at__lt=end_dt,
+            evaluation__items__is_approved=True,
+        )
+        .annotate(bucket=trunc('finished_at', output_field=DateField()))
+        .values('bucket')
+        .annotate(total=Sum(
+            F('evaluation__items__price') * F('evaluation__items__quantity'),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        ))
+        .order_by('bucket')
+    )
+    totals = {row['bucket']: row['total'] for row in rows}
+
+    return [
+        {
+            "name": bucket_label(bucket, granularity),
+            "period_start": bucket,
+            "total": totals.get(bucket) or 0,
+        }
+        for bucket in revenue_buckets(start, end, granularity)
+    ]
+
+
+def default_revenue_range(today=None, months=6):
+    """Últimos `months` meses de calendario, incluido el actual."""
+    today = today or timezone.localdate()
+    start = today.replace(day=1)
+    for _ in range(months - 1):
+        start = (start - timedelta(days=1)).replace(day=1)
+    return start, today
@@ -1,3 +1,287 @@
+import csv
+import io
+from datetime import date, datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import UserProfile
+from clients.models import Client, Vehicle
+from evaluations.models import Evaluation, EvaluationItem
+from .models import DashboardStats, WorkOrder
+from .stats import COUNTER_FIELDS, MAX_REVENUE_BUCKETS, compute_stats, get_stats, rebuild_stats
+
+
+class WorkOrderListQueryTests(TestCase):
+    """El listado de órdenes debe costar un número fijo de queries, sin importar cuántas filas haya."""
+
+    # auth (perfil) + versión para el ETag + página de órdenes (JOIN evaluación/cliente/vehículo/usuarios) + vehículos + ítems
+    EXPECTED_QUERIES = 5
+
+    def setUp(self):
+        self.owner = User.objects.create_user('dueno')
+        self.mechanic = User.objects.create_user('mecanico')
+        UserProfile.objects.create(user=self.mechanic, role='mechanic', employer=self.owner)
+        self.api = APIClient()
+
+    def create_orders(self, count):
+        for i in range(count):
+            client = Client.objects.create(owner=self.owner, first_name=f'Cliente {i}', last_name='Test')
+            vehicle = Vehicle.objects.create(client=client, brand='Toyota', model='Yaris', year=2018, plate=f'AB{i:04d}')
+            Vehicle.objects.create(client=client, brand='Kia', model='Rio', year=2020, plate=f'CD{i:04d}')
+            evaluation = Evaluation.objects.create(owner=self.owner, created_by=self.owner, client=client, vehicle=vehicle)
+            EvaluationItem.objects.create(evaluation=evaluation, description='Cambio de aceite', price=10000)
+            EvaluationItem.objects.create(evaluation=evaluation, description='Filtro', price=5000)
+            WorkOrder.objects.create(
+                evaluation=evaluation, owner=self.owner, folio=evaluation.folio,
+                mechanic=self.mechanic, last_status_change_by=self.mechanic,
+            )
+
+    def count_list_queries(self, query=''):
+        # Usuario recién cargado en cada request, como lo entrega la autenticación real
+        self.api.force_authenticate(User.objects.get(pk=self.owner.pk))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.api.get(f'/api/orders/{query}')
+        self.assertEqual(response.status_code, 200)
+        return len(ctx), response.json()['results']
+
+    def test_list_query_count_is_constant(self):
+        self.create_orders(2)
+        few, _ = self.count_list_queries()
+        self.create_orders(6)
+        many, results = self.count_list_queries()
+
+        self.assertEqual(len(results), 8)
+        self.assertEqual(few, many)
+        self.assertEqual(many, self.EXPECTED_QUERIES)
+
+    def test_nested_data_is_complete(self):
+        self.create_orders(1)
+        _, results = self.count_list_queries()
+        order = results[0]
+
+        self.assertEqual(order['mechanic_name'], 'mecanico')
+        self.assertEqual(order['updated_by_role'], 'Mecánico')
+        self.assertEqual(len(order['evaluation_data']['client_data']['vehicles']), 2)
+        self.assertEqual(len(order['evaluation_data']['items']), 2)
+        self.assertEqual(order['evaluation_data']['created_by_name'], 'dueno')
+
+    def test_sparse_fields_skip_nested_queries(self):
+        self.create_orders(3)
+        queries, results = self.count_list_queries('?fields=id,folio,status,vehicle_plate,mechanic_name')
+
+        # auth (perfil) + versión para el ETag + página: sin prefetch de vehículos ni ítems
+        self.assertEqual(queries, 3)
+        self.assertEqual(set(results[0]), {'id', 'folio', 'status', 'vehicle_plate', 'mechanic_name'})
+        self.assertEqual(results[0]['vehicle_plate'], 'AB0002')
+
+    def test_expand_loads_only_requested_branch(self):
+        self.create_orders(3)
+        queries, results = self.count_list_queries('?fields=folio&expand=evaluation_data.items')
+        evaluation = results[0]['evaluation_data']
+
+        # auth (perfil) + versión para el ETag + página + ítems
+        self.assertEqual(queries, 4)
+        self.assertEqual(set(results[0]), {'folio', 'evaluation_data'})
+        self.assertIn('items', evaluation)
+        self.assertNotIn('client_data', evaluation)
+        self.assertNotIn('vehicle_data', evaluation)
+        self.assertEqual(len(evaluation['items']), 2)
+
+    def test_nested_fields_with_dotted_paths(self):
+        self.create_orders(1)
+        _, results = self.count_list_queries('?fields=folio,evaluation_data.status,evaluation_data.client_data.first_name')
+
+        self.assertEqual(results[0]['evaluation_data'], {'status': 'draft', 'client_data': {'first_name': 'Cliente 0'}})
+
+
+class WorkOrderExportTests(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user('dueno')
+        self.api = APIClient()
+        for i, status in enumerate(['pending', 'finished']):
+            client = Client.objects.create(owner=self.owner, first_name='José', last_name=f'Núñez {i}', rut=f'1234567{i}-k')
+            vehicle = Vehicle.objects.create(client=client, brand='Toyota', model='Yaris', year=2018, plate=f'AB{i:04d}')
+            evaluation = Evaluation.objects.create(owner=self.owner, client=client, vehicle=vehicle)
+            EvaluationItem.objects.create(evaluation=evaluation, description='Frenos', price=20000, quantity=2)
+            EvaluationItem.objects.create(evaluation=evaluation, description='Pintura', price=90000, is_approved=False)
+            WorkOrder.objects.create(evaluation=evaluation, owner=self.owner, folio=evaluation.folio, status=status)
+
+        other = User.objects.create_user('otro')
+        client = Client.objects.create(owner=other, first_name='Otro', last_name='Taller')
+        vehicle = Vehicle.objects.create(client=client, brand='Kia', model='Rio', year=2020, plate='ZZ0000')
+        evaluation = Evaluation.objects.create(owner=other, client=client, vehicle=vehicle)
+        WorkOrder.objects.create(evaluation=evaluation, owner=other, folio=evaluation.folio)
+
+    def export(self, query=''):
+        self.api.force_authenticate(User.objects.get(pk=self.owner.pk))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.api.get(f'/api/orders/export/{query}')
+            content = b''.join(response.streaming_content).decode('utf-8-sig')
+        return response, list(csv.reader(io.StringIO(content))), len(ctx)
+
+    def test_csv_export_streams_projected_rows(self):
+        response, rows, queries = self.export()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment; filename="ordenes.csv"', response['Content-Disposition'])
+        header, *data = rows
+        self.assertEqual(header[0], 'Folio')
+        self.assertEqual(len(data), 2)
+        by_header = dict(zip(header, data[0]))
+        self.assertEqual(by_header['Cliente'], 'José Núñez 1')
+        self.assertEqual(by_header['Patente'], 'AB0001')
+        self.assertEqual(float(by_header['Total aprobado']), 40000)
+        # auth (perfil) + una sola query con todo proyectado
+        self.assertEqual(queries, 2)
+
+    def test_export_filters(self):
+        _, rows, _ = self.export('?status=finished')
+        self.assertEqual([row[1] for row in rows[1:]], ['finished'])
+        _, rows, _ = self.export('?from=2000-01-01&to=2000-01-31')
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(self.api.get('/api/orders/export/?file_format=pdf').status_code, 400)
+
+
+class DashboardStatsTests(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user('dueno')
+        self.client_obj = Client.objects.create(owner=self.owner, first_name='José', last_name='Núñez')
+        self.vehicle = Vehicle.objects.create(client=self.client_obj, brand='Toyota', model='Yaris', year=2018, plate='AB0001')
+
+    def create_order(self, status='pending'):
+        evaluation = Evaluation.objects.create(owner=self.owner, client=self.client_obj, vehicle=self.vehicle)
+        return WorkOrder.objects.create(evaluation=evaluation, owner=self.owner, folio=evaluation.folio, status=status)
+
+    def assertCountersMatch(self):
+        stats = DashboardStats.objects.get(owner=self.owner)
+        real = compute_stats(self.owner.pk)
+        self.assertEqual({field: getattr(stats, field) for field in COUNTER_FIELDS}, real)
+        return real
+
+    def test_counters_follow_creates_transitions_and_deletes(self):
+        get_stats(self.owner)
+        order = self.create_order()
+        self.assertEqual(self.assertCountersMatch()['orders_pending'], 1)
+
+        for status in ('in_progress', 'finished', 'delivered'):
+            order.status = status
+            order.save()
+            counters = self.assertCountersMatch()
+        self.assertEqual((counters['orders_pending'], counters['orders_delivered']), (0, 1))
+
+        # Instancia recién leída (post_init recuerda el estado cargado)
+        evaluation = Evaluation.objects.get(pk=order.evaluation_id)
+        evaluation.status = 'approved'
+        evaluation.save()
+        self.assertEqual(self.assertCountersMatch()['evals_approved'], 1)
+
+        Vehicle.objects.create(client=self.client_obj, brand='Kia', model='Rio', year=2020, plate='CD0002')
+        self.assertEqual(self.assertCountersMatch()['total_vehicles'], 2)
+
+        order.delete()
+        self.assertEqual(self.assertCountersMatch()['orders_delivered'], 0)
+        # En cascada: el cliente se lleva vehículos y evaluaciones
+        self.client_obj.delete()
+        self.assertEqual(self.assertCountersMatch(), {field: 0 for field in COUNTER_FIELDS})
+
+    def test_first_write_without_row_builds_it_after_commit(self):
+        # Sin fila el UPDATE no toca nada: se recalcula completa al confirmar, con la escritura ya visible
+        self.assertFalse(DashboardStats.objects.filter(owner=self.owner).exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_order()
+        stats = DashboardStats.objects.get(owner=self.owner)
+        self.assertEqual((stats.orders_pending, stats.total_clients), (1, 1))
+
+    def test_rebuild_locks_existing_row_and_reports_drift(self):
+        get_stats(self.owner)
+        DashboardStats.objects.filter(owner=self.owner).update(total_clients=5)
+        stats, drift = rebuild_stats(self.owner.pk)
+        self.assertEqual(drift, {'total_clients': (5, 1)})
+        self.assertEqual(stats.total_clients, 1)
+        self.assertEqual(rebuild_stats(self.owner.pk)[1], {})
+
+    def test_deleting_the_account_does_not_rebuild_its_stats(self):
+        self.create_order()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.owner.delete()
+        connection.check_constraints()
+        self.assertFalse(DashboardStats.objects.exists())
+
+
+class RevenueStatsTests(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user('dueno')
+        self.client_obj = Client.objects.create(owner=self.owner, first_name='José', last_name='Núñez')
+        self.vehicle = Vehicle.objects.create(client=self.client_obj, brand='Toyota', model='Yaris', year=2018, plate='AB0001')
+        self.api = APIClient()
+        self.api.force_authenticate(self.owner)
+
+    def create_order(self, price, status='pending'):
+        evaluation = Evaluation.objects.create(owner=self.owner, client=self.client_obj, vehicle=self.vehicle)
+        EvaluationItem.objects.create(evaluation=evaluation, description='Frenos', price=price, quantity=2)
+        EvaluationItem.objects.create(evaluation=evaluation, description='Pintura', price=99999, is_approved=False)
+        return WorkOrder.objects.create(evaluation=evaluation, owner=self.owner, folio=evaluation.folio, status=status)
+
+    def finish(self, order, when):
+        order.status = 'finished'
+        order.save()
+        WorkOrder.objects.filter(pk=order.pk).update(finished_at=when)
+
+    def revenue(self, **params):
+        return self.api.get('/api/orders/stats/revenue/', params)
+
+    def test_finished_at_follows_status_transitions(self):
+        order = self.create_order(1000)
+        self.assertIsNone(order.finished_at)
+        order.status = 'finished'
+        order.save(update_fields=['status'])
+        finished_at = WorkOrder.objects.get(pk=order.pk).finished_at
+        self.assertIsNotNone(finished_at)
+
+        order = WorkOrder.objects.get(pk=order.pk)
+        order.status = 'delivered'
+        order.internal_notes = 'Retirado por el cliente'
+        order.save()
+        self.assertEqual(WorkOrder.objects.get(pk=order.pk).finished_at, finished_at)
+
+        order.status = 'in_progress'  # reabierta
+        order.save()
+        self.assertIsNone(WorkOrder.objects.get(pk=order.pk).finished_at)
+
+    def test_buckets_by_finish_date_and_fills_empty_periods(self):
+        tz = timezone.get_current_timezone()
+        january = self.create_order(10000)
+        self.finish(january, datetime(2026, 1, 20, 12, tzinfo=tz))
+        self.finish(self.create_order(5000), datetime(2026, 3, 2, 12, tzinfo=tz))
+        self.create_order(7000)  # sin terminar: no suma
+
+        # Editarla después no la mueve de mes
+        january = WorkOrder.objects.get(pk=january.pk)
+        january.internal_notes = 'Garantía revisada'
+        january.save()
+
+        response = self.revenue(**{'from': '2026-01-01', 'to': '2026-04-30'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row['name'], float(row['total'])) for row in response.json()['results']],
+            [('2026-01', 20000), ('2026-02', 0), ('2026-03', 10000), ('2026-04', 0)],
+        )
+
+    def test_rejects_ranges_over_max_buckets(self):
+        start = date(2025, 1, 1)
+        last_allowed = start + timedelta(days=MAX_REVENUE_BUCKETS - 1)
+        response = self.revenue(**{'from': start.isoformat(), 'to': last_allowed.isoformat(), 'granularity': 'day'})
+        self.assertEqual(len(response.json()['results']), MAX_REVENUE_BUCKETS)
 
-# Create your tests here.
+        response = self.revenue(**{'from': start.isoformat(), 'to': (last_allowed + timedelta(days=1)).isoformat(), 'granularity': 'day'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.revenue(granularity='year').status_code, 400)
@@ -1,6 +1,6 @@
 from django.urls import path # 👈 Importar path
 from rest_framework.routers import DefaultRouter
-from .views import WorkOrderViewSet, DashboardStatsView # 👈 Importar la nueva vista
+from .views import WorkOrderViewSet, DashboardStatsView, RevenueStatsView # 👈 Importar la nueva vista
 
 router = DefaultRouter()
 router.register(r'orders', WorkOrderViewSet, basename='orders')
@@ -8,4 +8,5 @@ router.register(r'orders', WorkOrderViewSet, basename='orders')
 urlpatterns = [
     # Ruta personalizada para las estadísticas
     path('orders/stats/', DashboardStatsView.as_view(), name='dashboard-stats'),
+    path('orders/stats/revenue/', RevenueStatsView.as_view(), name='revenue-stats'),
 ] + router.urls
\ No newline at end of file
@@ -3,31 +3,37 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.views import APIView 
 from rest_framework.response import Response 
 from rest_framework.decorators import action
-from django.db.models import Count
-from django.utils import timezone
-from datetime import timedelta
+from datetime import date
 from django.db import transaction # Importante para atomicidad
+from django.utils import timezone
 
 from .models import WorkOrder
 from .serializers import WorkOrderSerializer
-from evaluations.models import Evaluation
-# 👇 CAMBIO: Importamos InventoryBatch (donde está el stock real)
-from inventory.models import InventoryBatch 
-from clients.models import Client, Vehicle 
+from .stats import (
+    get_stats, ORDER_STATUS_FIELDS, ACTIVE_ORDER_STATUSES, FINISHED_ORDER_STATUSES,
+    REVENUE_TRUNCS, MAX_REVENUE_BUCKETS, revenue_buckets, revenue_series, default_revenue_range,
+)
+from inventory.services import low_stock_products
 from external.models import ServiceRequest
 from accounts.models import Notification
-from accounts.utils import get_data_owner
+from backend.conditional import ConditionalGetMixin
+from backend.exports import export_format, export_period, export_response
+from backend.serializers import FieldSelection
+from .exports import WORK_ORDER_EXPORT_COLUMNS, annotate_for_export
 
-class WorkOrderViewSet(viewsets.ModelViewSet):
+class WorkOrderViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = WorkOrderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    etag_resources = ('orders', 'evaluations', 'clients')
+    ordering = '-created_at'
 
     def get_queryset(self):
-        target_user = get_data_owner(self.request.user)
-        return WorkOrder.objects.filter(owner=target_user).order_by('-created_at')
+        target_user = self.request.tenant.data_owner
+        queryset = WorkOrder.objects.filter(owner=target_user).order_by('-created_at')
+        return WorkOrderSerializer.setup_eager_loading(queryset, FieldSelection.from_request(self.request))
 
     def perform_create(self, serializer):
-        target_user = get_data_owner(self.request.user)
+        target_user = self.request.tenant.data_owner
         serializer.save(owner=target_user)
 
     def perform_update(self, serializer):
@@ -36,67 +42,93 @@ class WorkOrderViewSet(viewsets.ModelViewSet):
         else:
             serializer.save()
 
-class DashboardStatsView(APIView):
+    # Export para contabilidad: GET /api/orders/export/?file_format=csv|xlsx&from=&to=&status=
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        params = request.query_params
+        file_format = export_format(params)
+        # Mismo filtro por taller que el listado, sin el plan de carga (se proyecta con values())
+        queryset = self.get_queryset().prefetch_related(None).filter(**export_period(params))
+        if params.get('status'):
+            queryset = queryset.filter(status=params['status'])
+        return export_response(annotate_for_export(queryset), WORK_ORDER_EXPORT_COLUMNS, 'ordenes', file_format)
+
+class DashboardStatsView(ConditionalGetMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
+    # KPIs, stock bajo e ingresos: cambia con cualquiera de estos recursos
+    etag_resources = ('orders', 'evaluations', 'clients', 'products')
+
+    def get_etag_extra(self, request):
+        # El gráfico de ingresos es de los últimos 6 meses contados desde hoy
+        return timezone.localdate().isoformat()
 
     def get(self, request):
-        target_user = get_data_owner(request.user)
+        target_user = request.tenant.data_owner
         
-        # KPIs
-        active_orders = WorkOrder.objects.filter(owner=target_user, status__in=['pending', 'in_progress', 'waiting_parts']).count()
-        finished_orders = WorkOrder.objects.filter(owner=target_user, status__in=['finished', 'delivered']).count()
-        draft_evals = Evaluation.objects.filter(owner=target_user, status='draft').count()
-        approved_evals = Evaluation.objects.filter(owner=target_user, status='approved').count()
-        rejected_evals = Evaluation.objects.filter(owner=target_user, status='rejected').count()
-        total_clients = Client.objects.filter(owner=target_user).count()
-        total_vehicles = Vehicle.objects.filter(client__owner=target_user).count()
-
-        # Stock bajo: Buscamos productos cuyo stock total (suma de lotes) sea bajo
-        # Esta query es compleja, por simplicidad contaremos lotes con poco stock
-        low_stock = InventoryBatch.objects.filter(
-            product__owner=target_user, 
-            current_quantity__lte=5,
-            current_quantity__gt=0
-        ).count()
-
-        # Gráficos
-        orders_by_status = WorkOrder.objects.filter(owner=target_user).values('status').annotate(count=Count('id'))
-        
-        today = timezone.now()
-        six_months_ago = today - timedelta(days=180)
+        # KPIs: una sola lectura por PK de los contadores mantenidos por señales
+        stats = get_stats(target_user)
+        active_orders = sum(getattr(stats, ORDER_STATUS_FIELDS[s]) for s in ACTIVE_ORDER_STATUSES)
+        finished_orders = sum(getattr(stats, ORDER_STATUS_FIELDS[s]) for s in FINISHED_ORDER_STATUSES)
+
+        # Gráficos (mismo formato que el antiguo values('status').annotate(count))
+        orders_by_status = [
+            {"status": status, "count": getattr(stats, field)}
+            for status, field in ORDER_STATUS_FIELDS.items()
+            if getattr(stats, field)
+        ]
         
-        revenue_orders_qs = WorkOrder.objects.filter(
-            owner=target_user,
-            status__in=['finished', 'delivered'],
-            updated_at__gte=six_months_ago
-        ).prefetch_related('evaluation__items')
-
-        revenue_per_month = {}
-        for i in range(5, -1, -1):
-            d = today - timedelta(days=i*30)
-            key = d.strftime("%Y-%m")
-            revenue_per_month[key] = 0
-            
-        for order in revenue_orders_qs:
-            total = sum(item.price for item in order.evaluation.items.all() if item.is_approved)
-            month_key = order.updated_at.strftime("%Y-%m")
-            if month_key in revenue_per_month:
-                revenue_per_month[month_key] += total
-                
-        revenue_chart_data = [{"name": k, "total": v} for k, v in revenue_per_month.items()]
+        # Ingresos de los últimos 6 meses de calendario, agregados en la base de datos
+        start, end = default_revenue_range()
+        revenue_chart_data = [
+            {"name": row["name"], "total": row["total"]}
+            for row in revenue_series(target_user, start, end, 'month')
+        ]
 
         return Response({
             "kpis": {
                 "active_orders": active_orders,
                 "finished_orders": finished_orders,
                 "pending_evals": 0, # Placeholder
-                "draft_evals": draft_evals,
-                "approved_evals": approved_evals,
-                "rejected_evals": rejected_evals,
-                "low_stock": low_stock,
-                "total_clients": total_clients,
-                "total_vehicles": total_vehicles
+                "draft_evals": stats.evals_draft,
+                "approved_evals": stats.evals_approved,
+                "rejected_evals": stats.evals_rejected,
+                "low_stock": low_stock_products(target_user).count(),
+                "total_clients": stats.total_clients,
+                "total_vehicles": stats.total_vehicles
             },
-            "pie_data": list(orders_by_status),
+            "pie_data": orders_by_status,
             "bar_data": revenue_chart_data
-        })
\ No newline at end of file
+        })
+
+class RevenueStatsView(APIView):
+    """
+    GET /api/orders/stats/revenue/?from=YYYY-MM-DD&to=YYYY-MM-DD&granularity=month|week|day
+    Por defecto: últimos 6 meses de calendario agrupados por mes.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        target_user = request.tenant.data_owner
+        default_start, default_end = default_revenue_range()
+
+        granularity = request.query_params.get('granularity', 'month')
+        if granularity not in REVENUE_TRUNCS:
+            return Response({"error": "granularity debe ser month, week o day."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            start = date.fromisoformat(request.query_params['from']) if request.query_params.get('from') else default_start
+            end = date.fromisoformat(request.query_params['to']) if request.query_params.get('to') else default_end
+        except ValueError:
+            return Response({"error": "Las fechas deben tener formato YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if start > end:
+            return Response({"error": "'from' no puede ser posterior a 'to'."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(revenue_buckets(start, end, granularity, limit=MAX_REVENUE_BUCKETS + 1)) > MAX_REVENUE_BUCKETS:
+            return Response({"error": "Rango demasiado grande para esa granularidad."}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "granularity": granularity,
+            "from": start,
+            "to": end,
+            "results": revenue_series(target_user, start, end, granularity),
+        })
@@ -0,0 +1,21 @@
+#!/usr/bin/env bash
+# exit on error
+set -o errexit
+
+# Servidor ASGI: gunicorn con workers de uvicorn. Los streams SSE (chat y
+# notificaciones) sólo empujan en vivo así; con backend.wsgi degradan a polling.
+#
+# El broker de memoria (PUBSUB_BROKER por defecto) sólo reparte dentro de un
+# proceso: con él se levanta un único worker. Para más workers hay que apuntar
+# PUBSUB_BROKER a un broker compartido.
+WORKERS=${WEB_CONCURRENCY:-1}
+BROKER=${PUBSUB_BROKER:-backend.pubsub.InProcessBroker}
+if [ "$WORKERS" -gt 1 ] && [ "$BROKER" = "backend.pubsub.InProcessBroker" ]; then
+    echo "WEB_CONCURRENCY=$WORKERS necesita un PUBSUB_BROKER compartido (el de memoria no cruza workers)" >&2
+    exit 1
+fi
+
+exec gunicorn backend.asgi:application \
+    --worker-class uvicorn.workers.UvicornWorker \
+    --bind 0.0.0.0:${PORT:-8000} \
+    --workers "$WORKERS"